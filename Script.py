@@ -24,9 +24,18 @@ Olay aman vishwakarma ne add Kiya hai
 /pin_broadcast - Pin broadcast message [FOR ADMINS USE ONLY]  
 /restart - Restart the bot [FOR ADMINS USE ONLY]  
 /stats - Show bot statistics [FOR ADMINS USE ONLY]  
+/top - Most watched files of the last hours [FOR ADMINS USE ONLY]  
 /blocked - List of blocked users [FOR ADMINS USE ONLY]  
 /verified_users - List of verified users [FOR ADMINS USE ONLY]  
 
+# Client Pool 🤖  
+/clients - Health and load of the streaming clients [ADMINS ONLY]  
+/addclient - Add a bot token to the pool without restarting [ADMINS ONLY]  
+/removeclient - Drain and remove a client [ADMINS ONLY]  
+/quarantine - Take a client out of rotation [ADMINS ONLY]  
+/readmit - Put a quarantined client back [ADMINS ONLY]  
+/speedtest - Measure the speed of every client and DC [ADMINS ONLY]  
+
 # Premium Control 💎  
 /add_premium - Grant premium access to a user [ADMINS ONLY]  
 /remove_premium - Remove premium access [ADMINS ONLY]
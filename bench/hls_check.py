@@ -0,0 +1,132 @@
+import os
+import sys
+import asyncio
+import argparse
+import tempfile
+from typing import List, Optional
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+# HLS playlist check: `python -m bench.hls_check` or `python -m bench.hls_check movie.mp4 ...`
+# Builds the /hls playlist of MP4 files with the real layout parser, then plays it
+# through ffmpeg's HLS demuxer (PyAV, `pip install av`) the way a player would:
+# the EXT-X-MAP init section followed by each byte-range segment. Every frame of
+# the file has to decode through the playlist, and the EXTINF durations have to
+# add up to the file's duration.
+# Without files it generates a fragmented MP4 with a sidx, which must play, and a
+# progressive one and a fragmented one without sidx, which must get no playlist.
+
+os.environ.setdefault("DATABASE_URI", "mongodb://127.0.0.1:1")  # Parsing never queries MongoDB
+
+SAMPLES = {
+    # name: (movflags, expect a playlist)
+    "fragmented_sidx.mp4": ("frag_keyframe+empty_moov+default_base_moof+global_sidx", True),
+    "fragmented.mp4": ("frag_keyframe+empty_moov+default_base_moof", False),
+    "progressive.mp4": ("", False),
+}
+
+
+def import_av():
+    try:
+        import av
+    except ImportError:
+        raise SystemExit("The check plays the playlists with PyAV: pip install av")
+    return av
+
+
+def generate(path: str, movflags: str, seconds: int = 12, fps: int = 25) -> None:
+    """Encodes a small H.264 clip with a keyframe every 2 seconds."""
+    av = import_av()
+    with av.open(path, "w", format="mp4", options={"movflags": movflags} if movflags else {}) as output:
+        stream = output.add_stream("libx264", rate=fps)
+        stream.width, stream.height, stream.pix_fmt = 160, 120, "yuv420p"
+        stream.codec_context.options = {"g": str(2 * fps), "keyint_min": str(2 * fps), "sc_threshold": "0"}
+        for i in range(seconds * fps):
+            frame = av.VideoFrame(160, 120, "yuv420p")
+            for plane in frame.planes:
+                plane.update(bytes([(i * 7) % 256]) * plane.buffer_size)
+            output.mux(stream.encode(frame))
+        output.mux(stream.encode())
+
+
+async def build_playlist(path: str, target_duration: float) -> Optional[str]:
+    from web.utils.mp4 import RangeReader, parse_layout
+    from web.utils.hls import build_segments, render_playlist
+
+    with open(path, "rb") as f:
+        data = f.read()
+    chunk_size = 64 * 1024
+
+    async def fetch_part(offset: int) -> bytes:
+        return data[offset:offset + chunk_size]
+
+    layout = await parse_layout(RangeReader(fetch_part, len(data), chunk_size))
+    segments = build_segments(layout, target_duration) if layout else []
+    if not segments:
+        return None
+    return render_playlist(layout, segments, os.path.basename(path))
+
+
+def check(path: str, target_duration: float, expect: Optional[bool]) -> bool:
+    av = import_av()
+    name = os.path.basename(path)
+    playlist = asyncio.run(build_playlist(path, target_duration))
+    if playlist is None:
+        ok = expect is not True
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: no playlist (404)")
+        return ok
+    if expect is False:
+        print(f"FAIL {name}: got a playlist, expected none")
+        return False
+
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        expected = sum(1 for _ in container.decode(stream))
+        duration = float(stream.duration * stream.time_base) if stream.duration else container.duration / 1e6
+
+    # The playlist points at the file by name, next to it
+    with tempfile.NamedTemporaryFile("w", suffix=".m3u8", dir=os.path.dirname(os.path.abspath(path)), delete=False) as f:
+        f.write(playlist)
+    try:
+        options = {"allowed_extensions": "ALL", "allowed_segment_extensions": "ALL"}
+        with av.open(f.name, options=options) as container:
+            played = sum(1 for _ in container.decode(video=0))
+    finally:
+        os.unlink(f.name)
+
+    listed = sum(float(line[8:].rstrip(",")) for line in playlist.splitlines() if line.startswith("#EXTINF:"))
+    segments = playlist.count("#EXTINF:")
+    ok = played == expected and abs(listed - duration) <= 0.1
+    print(
+        f"{'ok  ' if ok else 'FAIL'} {name}: {segments} segments, {played}/{expected} frames played, "
+        f"{listed:.2f}s listed for {duration:.2f}s"
+    )
+    return ok
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.hls_check", description="Play /hls playlists through ffmpeg's HLS demuxer")
+    parser.add_argument("files", nargs="*", help="MP4 files to check, generated samples when empty")
+    parser.add_argument("--segment-duration", type=float, default=6, help="HLS_SEGMENT_DURATION to build with (default: 6)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    results: List[bool] = []
+    if args.files:
+        for path in args.files:
+            results.append(check(path, args.segment_duration, None))
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            for name, (movflags, expect) in SAMPLES.items():
+                path = os.path.join(directory, name)
+                generate(path, movflags)
+                results.append(check(path, args.segment_duration, expect))
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+import os
+import sys
+import json
+import heapq
+import asyncio
+import logging
+import argparse
+import itertools
+from contextlib import aclosing
+from typing import Dict, Iterator, List
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+# Access log replay: `python -m bench.replay access.log --sizes 0 64 256 --policies lru lfu`
+# Runs every range of an ACCESS_LOG through the real streamer, read-ahead and part cache
+# against a fake upstream that answers at once, for every combination of cache size,
+# eviction policy and READ_AHEAD_PARTS, and reports how many parts the cache served
+# and how much Telegram traffic it saved.
+# Requests are replayed one after the other and background prefetches finish before
+# the next one, so concurrent players sharing a fetch in flight are not modelled.
+
+os.environ.setdefault("DATABASE_URI", "mongodb://127.0.0.1:1")  # The streaming path never queries MongoDB
+
+from bench.stream_bench import FakeClient, git_commit
+
+
+def read_log(paths: List[str]) -> Iterator:
+    """Yields the accesses of every file in time order, the files of several workers merged."""
+    from web.utils.access_log import Access
+
+    def accesses(path: str):
+        with open(path) as f:
+            for line in f:
+                access = Access.parse(line)
+                if access is not None:
+                    yield access
+
+    return heapq.merge(*(accesses(path) for path in paths), key=lambda access: access.time)
+
+
+class FakeUpstream:
+    def __init__(self, sizes: Dict[int, int]):
+        """Media session answering every GetFile at once with zeros, counting what was asked."""
+        self.sizes = sizes
+        self.requests = 0
+        self.bytes = 0
+        self.blocks: Dict[int, bytes] = {}
+
+    async def send(self, request, *args, **kwargs):
+        from pyrogram import raw
+        size = self.sizes[request.location.id]
+        length = max(0, min(request.limit, size - request.offset))
+        if length not in self.blocks:
+            self.blocks[length] = bytes(length)
+        self.requests += 1
+        self.bytes += length
+        await asyncio.sleep(0)
+        return raw.types.upload.File(type=raw.types.storage.FileUnknown(), mtime=0, bytes=self.blocks[length])
+
+    async def stop(self):
+        pass
+
+
+class Clock:
+    """Log time for the read-ahead tracker, so replaying fast doesn't change which ranges count as sequential."""
+    now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+async def replay(log: List, size: int, policy: str, read_ahead: int) -> Dict:
+    from pyrogram.file_id import FileId, FileType
+    from web.server import multi_clients, work_loads
+    from web.utils import custom_dl, readahead
+    from web.utils.part_cache import PartCache
+
+    class ReplayCache(PartCache):
+        """Tells the reads of streams, and which of them needed no upstream request, from prefetches."""
+        reads = 0
+        read_hits = 0
+        read_bytes = 0
+
+        async def get_or_fetch(self, key, fetch, store=False):
+            fetched = False
+
+            async def counted():
+                nonlocal fetched
+                fetched = True
+                return await fetch()
+
+            data = await super().get_or_fetch(key, counted, store)
+            if not store:
+                self.reads += 1
+                self.read_bytes += len(data)
+                self.read_hits += not fetched
+            return data
+
+    upstream = FakeUpstream({access.media_id: access.file_size for access in log})
+    cache = ReplayCache(size * 1024 * 1024, policy)
+    clock = Clock()
+
+    async def generate_media_session(self, client, file_id):
+        return upstream
+
+    custom_dl.ByteStreamer.generate_media_session = generate_media_session
+    custom_dl.part_cache = cache
+    readahead.time = clock
+    readahead.access_tracker = readahead.AccessTracker()
+    readahead.READ_AHEAD_PARTS = read_ahead
+
+    multi_clients.clear()
+    work_loads.clear()
+    multi_clients[0] = FakeClient(0)
+    work_loads[0] = 0
+    tg_connect = custom_dl.ByteStreamer(multi_clients[0])
+
+    sent = 0
+    for access in log:
+        clock.now = access.time
+        file_id = FileId(file_type=FileType.DOCUMENT, dc_id=4, media_id=access.media_id, access_hash=0, file_reference=b"")
+        file_id.file_size = access.file_size
+        file_id.mime_type = "video/mp4" if access.video else "application/octet-stream"
+        if read_ahead:
+            readahead.schedule_read_ahead(
+                tg_connect, file_id, access.viewer, access.first, access.last, custom_dl.CHUNK_SIZE
+            )
+
+        # Stop where the player went away, the parts it never asked for are never fetched
+        received = 0
+        if access.sent:
+            last = min(access.last, access.first + access.sent - 1)
+            async with aclosing(tg_connect.iter_range(file_id, 0, access.first, last)) as stream:
+                async for chunk in stream:
+                    received += len(chunk)
+        sent += received
+        if read_ahead:
+            readahead.access_tracker.stopped(access.viewer, access.media_id, access.first, received)
+        while readahead._background:
+            await asyncio.gather(*readahead._background)
+
+    saved = cache.read_bytes - upstream.bytes
+    return {
+        "size_mb": size,
+        "policy": policy,
+        "read_ahead": read_ahead,
+        "reads": cache.reads,
+        "hits": cache.read_hits,
+        "hit_ratio": round(cache.read_hits / cache.reads, 4) if cache.reads else None,
+        "upstream_requests": upstream.requests,
+        "upstream_mb": round(upstream.bytes / 1024 ** 2, 2),
+        "saved_mb": round(saved / 1024 ** 2, 2),
+        "saved_pct": round(saved / cache.read_bytes * 100, 2) if cache.read_bytes else None,
+        "sent_mb": round(sent / 1024 ** 2, 2),
+    }
+
+
+async def run(args) -> Dict:
+    from web.utils.part_cache import POLICIES
+    for policy in args.policies:
+        if policy not in POLICIES:
+            raise SystemExit(f"Unknown policy {policy}, use one of {', '.join(POLICIES)}")
+
+    log = list(itertools.islice(read_log(args.logs), args.limit or None))
+    if not log:
+        raise SystemExit("No accesses in the log")
+    results = []
+    for size, policy, read_ahead in itertools.product(args.sizes, args.policies, args.read_ahead):
+        if size == 0 and policy != args.policies[0]:
+            continue  # Nothing to evict without a cache
+        result = await replay(log, size, policy, read_ahead)
+        results.append(result)
+        logging.info(f"Replayed with {size} MB {policy}, read-ahead {read_ahead}: {result}")
+
+    return {
+        "commit": git_commit(),
+        "logs": args.logs,
+        "accesses": len(log),
+        "files": len({access.media_id for access in log}),
+        "span_s": round(log[-1].time - log[0].time, 1),
+        "results": results,
+    }
+
+
+def print_table(report: Dict) -> None:
+    print(f"{report['accesses']} accesses to {report['files']} files over {report['span_s']}s")
+    print(f"{'cache MB':>9}{'policy':>8}{'ahead':>7}{'hit ratio':>11}{'upstream MB':>13}{'saved MB':>10}{'saved':>9}")
+    for r in sorted(report["results"], key=lambda r: -r["saved_mb"]):
+        hit_ratio = f"{r['hit_ratio'] * 100:.1f}%" if r["hit_ratio"] is not None else "-"
+        saved_pct = f"{r['saved_pct']:.1f}%" if r["saved_pct"] is not None else "-"
+        print(
+            f"{r['size_mb']:>9}{r['policy']:>8}{r['read_ahead']:>7}{hit_ratio:>11}"
+            f"{r['upstream_mb']:>13}{r['saved_mb']:>10}{saved_pct:>9}"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.replay", description="Replay an ACCESS_LOG against part cache settings")
+    parser.add_argument("logs", nargs="+", help="Access log files, those of several stream workers are merged")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 64, 256], help="Part cache sizes in MB (default: 0 64 256)")
+    parser.add_argument("--policies", nargs="+", default=["lru", "fifo", "lfu"], help="Eviction policies (default: lru fifo lfu)")
+    parser.add_argument("--read-ahead", type=int, nargs="+", default=[4], help="READ_AHEAD_PARTS values, 0 disables SMART_READ_AHEAD (default: 4)")
+    parser.add_argument("--limit", type=int, default=0, help="Replay only the first N accesses")
+    parser.add_argument("--output", help="Also write the results as JSON here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    print_table(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
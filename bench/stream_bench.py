@@ -0,0 +1,359 @@
+import os
+import sys
+import json
+import time
+import random
+import signal
+import asyncio
+import logging
+import argparse
+import subprocess
+from typing import Dict, List, Optional
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+# Streaming benchmark without Telegram: `python -m bench.stream_bench --help`
+# The web app runs in a child process with fake clients whose media sessions answer
+# upload.GetFile locally with the configured latency, bandwidth, jitter and errors.
+# Everything between the HTTP request and Session.send is the real code.
+# The parent drives it with full-file and Range clients and writes a JSON report;
+# `--compare old.json new.json` diffs two reports.
+
+os.environ.setdefault("DATABASE_URI", "mongodb://127.0.0.1:1")  # The streaming path never queries MongoDB
+
+REPORT_VERSION = 1
+SECURE_HASH = "AgADbe"
+PATTERN_SIZE = 1024 * 1024 + 4093  # Not a multiple of the part size, so every part differs
+
+
+def file_data(pattern: bytes, offset: int, length: int) -> bytes:
+    start = offset % len(pattern)
+    data = pattern[start:start + length]
+    while len(data) < length:
+        data += pattern[:length - len(data)]
+    return data
+
+
+def make_pattern(seed: int) -> bytes:
+    return random.Random(seed).randbytes(PATTERN_SIZE)
+
+
+# ---------------------------------------------------------------- server side
+
+class FakeMediaSession:
+    def __init__(self, args, sizes: Dict[int, int], pattern: bytes):
+        """
+        Stands in for a pyrogram media Session. Parts share one link of `bandwidth`
+        MB/s per session, then take `latency` ± `jitter` ms to arrive; `error_rate`
+        of the requests time out like a stalled Telegram connection.
+        """
+        self.latency = args.latency / 1000
+        self.jitter = args.jitter / 1000
+        self.bandwidth = args.bandwidth * 1024 * 1024
+        self.error_rate = args.error_rate
+        self.sizes = sizes
+        self.pattern = pattern
+        self.link_free = 0.0
+        self.rng = random.Random(args.seed)
+
+    async def send(self, request, *args, **kwargs):
+        from pyrogram import raw
+        loop = asyncio.get_running_loop()
+        delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+        if self.error_rate and self.rng.random() < self.error_rate:
+            await asyncio.sleep(delay)
+            raise TimeoutError("Injected error")
+
+        size = self.sizes[request.location.id]
+        data = file_data(self.pattern, request.offset, max(0, min(request.limit, size - request.offset)))
+        if self.bandwidth:
+            start = max(loop.time(), self.link_free)
+            self.link_free = start + len(data) / self.bandwidth
+            delay += self.link_free - loop.time()
+        await asyncio.sleep(delay)
+        return raw.types.upload.File(type=raw.types.storage.FileUnknown(), mtime=0, bytes=data)
+
+    async def stop(self):
+        pass
+
+
+class FakeClient:
+    def __init__(self, index: int):
+        self.index = index
+        self.me = None
+        self.media_sessions = {}
+
+
+async def serve(args) -> None:
+    from aiohttp import web
+    from pyrogram.file_id import FileId, FileType
+    from web import web_server
+    from web.server import multi_clients, work_loads
+    from web.utils import custom_dl
+
+    logging.basicConfig(level=logging.WARNING)
+    pattern = make_pattern(args.seed)
+    sizes = {id: args.file_size * 1024 * 1024 for id in range(1, args.files + 1)}
+    sessions: Dict[int, FakeMediaSession] = {}
+
+    async def generate_media_session(self, client, file_id):
+        if client.index not in sessions:
+            sessions[client.index] = FakeMediaSession(args, sizes, pattern)
+        return sessions[client.index]
+
+    async def get_file_properties(self, id: int):
+        if id not in sizes:
+            from web.server.exceptions import FIleNotFound
+            raise FIleNotFound
+        file_id = FileId(file_type=FileType.DOCUMENT, dc_id=4, media_id=id, access_hash=0, file_reference=b"")
+        file_id.file_size = sizes[id]
+        file_id.mime_type = "video/mp4"
+        file_id.file_name = f"bench{id}.mp4"
+        file_id.unique_id = SECURE_HASH + str(id)
+        file_id.duration = 0
+        file_id.thumb_file_id = file_id.thumb_unique_id = None
+        file_id.thumb_size = 0
+        return file_id
+
+    custom_dl.ByteStreamer.generate_media_session = generate_media_session
+    custom_dl.ByteStreamer.create_media_session = lambda self, client, dc_id: generate_media_session(self, client, None)
+    custom_dl.ByteStreamer.get_file_properties = get_file_properties
+
+    multi_clients.clear()
+    work_loads.clear()
+    for index in range(args.clients):
+        multi_clients[index] = FakeClient(index)
+        work_loads[index] = 0
+
+    runner = web.AppRunner(await web_server())
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", args.port).start()
+    print("READY", flush=True)
+
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    await stop.wait()
+    await runner.cleanup()
+
+
+# ---------------------------------------------------------------- load side
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p90": None, "p99": None, "max": None}
+    values = sorted(values)
+
+    def at(q: float) -> float:
+        return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 2)
+    return {"p50": at(0.50), "p90": at(0.90), "p99": at(0.99), "max": round(values[-1] * 1000, 2)}
+
+
+class Load:
+    def __init__(self, args):
+        self.args = args
+        self.base = f"http://127.0.0.1:{args.port}"
+        self.file_size = args.file_size * 1024 * 1024
+        self.pattern = make_pattern(args.seed) if args.verify else None
+        self.rng = random.Random(args.seed)
+        self.ttfb: List[float] = []
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+
+    async def fetch(self, session, id: int, first: Optional[int] = None, last: Optional[int] = None) -> None:
+        headers = {"Range": f"bytes={first}-{last}"} if first is not None else {}
+        started = time.perf_counter()
+        self.requests += 1
+        try:
+            async with session.get(f"{self.base}/{SECURE_HASH}{id}", headers=headers) as resp:
+                if resp.status not in (200, 206):
+                    self.errors += 1
+                    return
+                expected = (last - first + 1) if first is not None else self.file_size
+                received, offset = 0, first or 0
+                async for chunk in resp.content.iter_any():
+                    if not received:
+                        self.ttfb.append(time.perf_counter() - started)
+                    if self.pattern and chunk != file_data(self.pattern, offset + received, len(chunk)):
+                        raise ValueError(f"Wrong bytes at offset {offset + received}")
+                    received += len(chunk)
+                self.bytes += received
+                if received != expected:
+                    self.errors += 1
+        except Exception as e:
+            logging.debug(f"Request for {id} failed: {e}")
+            self.errors += 1
+
+    async def full_client(self, session, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            await self.fetch(session, self.rng.randint(1, self.args.files))
+
+    async def range_client(self, session, deadline: float) -> None:
+        size = min(self.args.range_size * 1024, self.file_size)
+        while time.perf_counter() < deadline:
+            first = self.rng.randrange(0, self.file_size - size + 1)
+            await self.fetch(session, self.rng.randint(1, self.args.files), first, first + size - 1)
+
+    async def run(self) -> float:
+        import aiohttp
+        deadline = time.perf_counter() + self.args.duration
+        connector = aiohttp.TCPConnector(limit=0)
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=30)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(self.full_client(session, deadline) for _ in range(self.args.full)),
+                *(self.range_client(session, deadline) for _ in range(self.args.ranges)),
+            )
+            return time.perf_counter() - started
+
+
+async def sample_rss(process, peak: List[int], done: asyncio.Event) -> None:
+    while not done.is_set():
+        try:
+            peak[0] = max(peak[0], process.memory_info().rss)
+        except Exception:
+            return
+        await asyncio.sleep(0.05)
+
+
+async def bench(args) -> Dict:
+    import psutil
+    command = [sys.executable, "-m", "bench.stream_bench", "--serve"] + [
+        f"--{name.replace('_', '-')}={getattr(args, name)}" for name in SERVER_OPTIONS
+    ]
+    child = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    try:
+        line = await asyncio.get_running_loop().run_in_executor(None, child.stdout.readline)
+        if line.strip() != "READY":
+            raise SystemExit(f"Benchmark server did not start (exit code {child.poll()})")
+        server = psutil.Process(child.pid)
+        cpu = server.cpu_times()
+        peak, done = [server.memory_info().rss], asyncio.Event()
+        sampler = asyncio.create_task(sample_rss(server, peak, done))
+
+        load = Load(args)
+        elapsed = await load.run()
+        done.set()
+        await sampler
+        after = server.cpu_times()
+    finally:
+        child.send_signal(signal.SIGTERM)
+        child.wait()
+
+    cpu_seconds = (after.user - cpu.user) + (after.system - cpu.system)
+    gigabytes = load.bytes / 1024 ** 3
+    return {
+        "version": REPORT_VERSION,
+        "commit": git_commit(),
+        "time": int(time.time()),
+        "config": {name: getattr(args, name) for name in SERVER_OPTIONS + LOAD_OPTIONS},
+        "duration_s": round(elapsed, 3),
+        "requests": load.requests,
+        "errors": load.errors,
+        "bytes": load.bytes,
+        "throughput_mb_s": round(load.bytes / elapsed / 1024 ** 2, 2),
+        "ttfb_ms": percentiles(load.ttfb),
+        "server": {
+            "cpu_s": round(cpu_seconds, 3),
+            "cpu_s_per_gb": round(cpu_seconds / gigabytes, 3) if gigabytes else None,
+            "peak_rss_mb": round(peak[0] / 1024 ** 2, 1),
+        },
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+# ---------------------------------------------------------------- comparison
+
+# (path in the report, True when higher is better)
+METRICS = [
+    (("throughput_mb_s",), True),
+    (("ttfb_ms", "p50"), False),
+    (("ttfb_ms", "p99"), False),
+    (("server", "cpu_s_per_gb"), False),
+    (("server", "peak_rss_mb"), False),
+    (("errors",), False),
+]
+
+
+def compare(old: Dict, new: Dict, max_regression: float) -> int:
+    """Prints the change of every metric, returns 1 if one got worse by more than `max_regression` %."""
+    if old.get("config") != new.get("config"):
+        print("Warning: the reports were made with different settings")
+    failed = 0
+    print(f"{'metric':<24}{'old':>12}{'new':>12}{'change':>10}")
+    for path, higher_is_better in METRICS:
+        a, b = old, new
+        for key in path:
+            a, b = (a or {}).get(key), (b or {}).get(key)
+        name = ".".join(path)
+        if a is None or b is None:
+            print(f"{name:<24}{str(a):>12}{str(b):>12}{'':>10}")
+            continue
+        change = (b - a) / a * 100 if a else (0.0 if a == b else float("inf"))
+        worse = -change if higher_is_better else change
+        mark = ""
+        if worse > max_regression:
+            mark, failed = "  REGRESSION", 1
+        print(f"{name:<24}{a:>12}{b:>12}{change:>+9.1f}%{mark}")
+    return failed
+
+
+SERVER_OPTIONS = ["port", "clients", "files", "file_size", "latency", "jitter", "bandwidth", "error_rate", "seed"]
+LOAD_OPTIONS = ["full", "ranges", "range_size", "duration", "verify"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.stream_bench", description="Streaming path benchmark with fake Telegram media sessions")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=28626)
+    parser.add_argument("--clients", type=int, default=1, help="Fake bot clients (default: 1)")
+    parser.add_argument("--files", type=int, default=8, help="Distinct files requested (default: 8)")
+    parser.add_argument("--file-size", type=int, default=64, help="MB per file (default: 64)")
+    parser.add_argument("--latency", type=float, default=40, help="ms per GetFile request (default: 40)")
+    parser.add_argument("--jitter", type=float, default=10, help="± ms added to the latency (default: 10)")
+    parser.add_argument("--bandwidth", type=float, default=0, help="MB/s per media session, 0 = unlimited (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0, help="Share of GetFile requests that time out (default: 0)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--full", type=int, default=8, help="Concurrent full-file downloaders (default: 8)")
+    parser.add_argument("--ranges", type=int, default=32, help="Concurrent Range clients (default: 32)")
+    parser.add_argument("--range-size", type=int, default=512, help="KB per Range request (default: 512)")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of load (default: 20)")
+    parser.add_argument("--verify", action="store_true", help="Check every received byte")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two reports instead of running")
+    parser.add_argument("--max-regression", type=float, default=10, help="Percent a metric may get worse in --compare (default: 10)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.compare:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        return compare(old, new, args.max_regression)
+    if args.serve:
+        asyncio.run(serve(args))
+        return 0
+
+    report = asyncio.run(bench(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,6 +24,11 @@ from web import web_server, check_expired_premium
 from web.server import Webavbot
 from utils import temp, ping_server
 from web.server.clients import initialize_clients
+from web.server.drain import drainer, listen_socket
+from web.utils.client_pool import client_pool
+from web.utils.speedtest import speedtest
+from web.worker import start_workers
+from web.utils.worker_stats import publish_loop
 
 #Dont Remove My Credit @AV_BOTz_UPDATE 
 #This Repo Is By @BOT_OWNER26 
@@ -47,7 +52,10 @@ async def start():
     print('\n')
     print('Initalizing Your Bot')
     bot_info = await Webavbot.get_me()
-    await initialize_clients()
+    await initialize_clients(0, STREAM_WORKERS)
+    asyncio.create_task(client_pool.monitor())
+    if SPEEDTEST_FILES and SPEEDTEST_INTERVAL:
+        asyncio.create_task(speedtest.monitor(SPEEDTEST_INTERVAL))
     for name in files:
         with open(name) as a:
             patt = Path(a.name)
@@ -81,8 +89,11 @@ async def start():
     await Webavbot.send_message(chat_id=SUPPORT_GROUP, text=f"<b>{me.mention} ʀᴇsᴛᴀʀᴛᴇᴅ 🤖</b>")
     app = web.AppRunner(await web_server())
     await app.setup()
-    bind_address = "0.0.0.0"
-    await web.TCPSite(app, bind_address, PORT).start()
+    await drainer.serve(app, listen_socket(PORT, reuse_port=STREAM_WORKERS > 1))
+    if STREAM_WORKERS > 1:
+        asyncio.create_task(publish_loop(0))
+        start_workers()
+        logging.info(f"Started {STREAM_WORKERS - 1} stream workers on port {PORT}")
     await idle()
 
 #Dont Remove My Credit @AV_BOTz_UPDATE 
@@ -1,4 +1,5 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError, OperationFailure
 from datetime import datetime, timedelta
 from info import DB_URL, DB_NAME 
 import time, pytz
@@ -12,6 +13,8 @@ class Database:
         self.blocked_users = mydb.blocked_users
         self.blocked_channels = mydb.blocked_channels
         self.files = mydb.files
+        self.file_stats = mydb.file_stats
+        self.replicas = mydb.replicas
         
     # 🧑‍💻 USER SYSTEM ------------------------------
 
@@ -136,6 +139,73 @@ class Database:
     async def total_blocked_channels_count(self):
         return await self.blocked_channels.count_documents({})
 
+    # 🔥 FILE POPULARITY SYSTEM ---------------------
+
+    async def inc_file_stats(self, operations):
+        await self.file_stats.bulk_write(operations, ordered=False)
+
+    async def expire_file_stats(self, seconds: int):
+        # Hourly counters remove themselves once they are older than the retention
+        try:
+            await self.file_stats.create_index("hour", expireAfterSeconds=seconds)
+        except OperationFailure as e:
+            if e.code != 85:  # IndexOptionsConflict: the retention changed since the index was made
+                raise
+            await self.file_stats.database.command(
+                "collMod", self.file_stats.name, index={"keyPattern": {"hour": 1}, "expireAfterSeconds": seconds}
+            )
+
+    async def top_files(self, since: datetime, limit: int = 10, sort: str = "views"):
+        pipeline = [
+            {"$match": {"hour": {"$gte": since}}},
+            # $last takes the name and hash of the newest hour
+            {"$sort": {"hour": 1}},
+            {"$group": {
+                "_id": "$file_id",
+                "views": {"$sum": "$views"},
+                "requests": {"$sum": "$requests"},
+                "bytes": {"$sum": "$bytes"},
+                "viewers": {"$push": {"$ifNull": ["$viewers", []]}},
+                "name": {"$last": "$name"},
+                "hash": {"$last": "$hash"},
+            }},
+            # A viewer seen in several hours counts once
+            {"$set": {"ips": {"$size": {"$reduce": {
+                "input": "$viewers", "initialValue": [], "in": {"$setUnion": ["$$value", "$$this"]},
+            }}}}},
+            {"$unset": "viewers"},
+            {"$sort": {sort: -1}},
+            {"$limit": limit},
+        ]
+        return [doc async for doc in self.file_stats.aggregate(pipeline)]
+
+    # 🪞 HOT FILE REPLICA SYSTEM ---------------------
+
+    async def claim_replicas(self, id: int) -> bool:
+        # Only the process that creates the record copies the file
+        try:
+            await self.replicas.insert_one({"_id": id, "replicas": [], "hot_until": datetime.utcnow(), "retired": None})
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def set_replicas(self, id: int, replicas):
+        await self.replicas.update_one({"_id": id}, {"$set": {"replicas": replicas}})
+
+    async def touch_replicas(self, id: int):
+        await self.replicas.update_one({"_id": id, "retired": None}, {"$max": {"hot_until": datetime.utcnow()}})
+
+    async def retire_replicas(self, id: int) -> bool:
+        result = await self.replicas.update_one({"_id": id, "retired": None}, {"$set": {"retired": datetime.utcnow()}})
+        return result.modified_count == 1
+
+    async def get_all_replicas(self):
+        return [doc async for doc in self.replicas.find({})]
+
+    async def delete_replicas(self, id: int) -> bool:
+        result = await self.replicas.delete_one({"_id": id})
+        return result.deleted_count == 1
+
     async def get_user(self, user_id):
         user_data = await self.users.find_one({"id": user_id})
         return user_data
@@ -21,6 +21,9 @@ BOT_TOKEN = environ.get('BOT_TOKEN', '672782:AAE3VrD2SewKmu6ytwU4H1vRtfc')  # Te
 
 # 👑, Channels & Logs
 BIN_CHANNEL = int(environ.get("BIN_CHANNEL", '-1001973960964'))  # File storage channel
+# Only append to BIN_CHANNELS: the position of a channel is part of the links of its files
+BIN_CHANNELS = [BIN_CHANNEL] + [int(c) for c in environ.get("BIN_CHANNELS", "").split() if int(c) != BIN_CHANNEL]  # Extra storage channels new files are spread over
+STORAGE_POLICY = environ.get("STORAGE_POLICY", "round_robin").lower()  # How files are spread over BIN_CHANNELS: round_robin, random or user
 LOG_CHANNEL = int(environ.get("LOG_CHANNEL", '-1002110971750'))  # General log channel
 PREMIUM_LOGS = int(environ.get("PREMIUM_LOGS", '-1002227216574'))  # Premium user actions log
 VERIFIED_LOG = int(environ.get('VERIFIED_LOG', '-1002227216574'))  # Verified user actions log
@@ -50,6 +53,9 @@ MAINTENANCE_MODE = get_bool("MAINTENANCE_MODE", False)  # Put bot in maintenance
 PROTECT_CONTENT = get_bool('PROTECT_CONTENT', False)  # Enable content protection
 PUBLIC_FILE_STORE = get_bool('PUBLIC_FILE_STORE', True)  # Public or private file visibility
 BATCH_PROTECT_CONTENT = get_bool('BATCH_PROTECT_CONTENT', False)  # Batch file protection
+BATCH_LINK_EXPIRE = int(environ.get('BATCH_LINK_EXPIRE', '21600'))  # Seconds the web link of a batch sent by /start works
+ZIP_CONCURRENCY = int(environ.get('ZIP_CONCURRENCY', '2'))  # Batch ZIPs built at once per process, 0 for no limit
+ZIP_PER_IP = int(environ.get('ZIP_PER_IP', '1'))  # Batch ZIPs built at once for one IP, 0 for no limit
 
 # 🔗 Shortlink Configuration
 SHORTLINK_URL = environ.get('SHORTLINK_URL', 'techvjlink.site')  # Shortener site
@@ -82,6 +88,52 @@ WAIFU_DELETE_TIME = int(environ.get('WAIFU_DELETE_TIME', 60))  # Auto-delete wai
 # ⚙️ Worker Configuration
 WORKERS = int(getenv('WORKERS', '4'))  # Number of async workers
 MULTI_CLIENT = False  # Enable multi-client handling (if needed)
+STREAM_WORKERS = int(getenv('STREAM_WORKERS', '1'))  # Processes serving streams on the same port (Linux SO_REUSEPORT)
+STREAM_WORKER_INDEX = int(getenv('STREAM_WORKER_INDEX', '0'))  # Set by bot.py for the stream worker processes it starts
+STREAM_NODE = get_bool('STREAM_NODE', False)  # Set by stream_node.py, the streaming-only entry point
+DRAIN_TIMEOUT = int(getenv('DRAIN_TIMEOUT', '600'))  # Seconds /restart lets running streams finish before the old process exits
+SESSION_DIR = environ.get('SESSION_DIR', 'sessions')  # Session files of the MULTI_TOKEN clients and stream workers, empty keeps them in memory
+CLIENT_ERROR_LIMIT = int(getenv('CLIENT_ERROR_LIMIT', '5'))  # Errors within a minute that take a client out of rotation
+CLIENT_FLOOD_LIMIT = int(getenv('CLIENT_FLOOD_LIMIT', '60'))  # A FloodWait at least this long (seconds) takes a client out at once
+CLIENT_PROBATION = int(getenv('CLIENT_PROBATION', '300'))  # Seconds a quarantined client sits out, doubled every time it fails again
+CLIENT_HEALTH_INTERVAL = int(getenv('CLIENT_HEALTH_INTERVAL', '60'))  # Seconds between health checks of every client
+
+# ⚡ Streaming Performance
+HEDGE_REQUESTS = get_bool("HEDGE_REQUESTS", False)  # Re-send slow Telegram parts on a second media session
+HEDGE_BUDGET = float(environ.get("HEDGE_BUDGET", "0.05"))  # Max share of part requests that may be hedged (0.05 = 5%)
+HEDGE_MIN_DELAY = float(environ.get("HEDGE_MIN_DELAY", "0.05"))  # Never hedge a part earlier than this (seconds)
+WRITE_COALESCE_SIZE = int(environ.get("WRITE_COALESCE_SIZE", str(64 * 1024)))  # Small writes are merged up to this many bytes
+STREAM_MEMORY_BUDGET = int(environ.get("STREAM_MEMORY_BUDGET", "256"))  # MB of part data all streams may hold in flight
+STREAM_READ_AHEAD = int(environ.get("STREAM_READ_AHEAD", "2"))  # Parts fetched ahead of the player per stream
+PART_CACHE_SIZE = int(environ.get("PART_CACHE_SIZE", "64"))  # MB of prefetched file parts kept in memory
+PART_CACHE_POLICY = environ.get("PART_CACHE_POLICY", "lru").lower()  # Part evicted first when the cache is full: lru, fifo or lfu
+SMART_READ_AHEAD = get_bool("SMART_READ_AHEAD", True)  # Warm the file tail and the next ranges a player is likely to request
+READ_AHEAD_PARTS = int(environ.get("READ_AHEAD_PARTS", "4"))  # Parts prefetched after a sequential Range request
+FASTSTART = get_bool("FASTSTART", False)  # Serve MP4s with moov at the end as moov-first files
+HLS_SEGMENT_DURATION = float(environ.get("HLS_SEGMENT_DURATION", "6"))  # Target length of /hls segments in seconds
+WATCH_WARMUP = get_bool("WATCH_WARMUP", True)  # Prepare the stream in the background when a watch page is opened
+INGEST_WARMUP = get_bool("INGEST_WARMUP", True)  # Prefetch the first part of every newly forwarded file
+INGEST_WARMUP_TAIL = get_bool("INGEST_WARMUP_TAIL", True)  # Also prefetch the last part of new files
+INGEST_WARMUP_RATE = float(environ.get("INGEST_WARMUP_RATE", "30"))  # New files warmed per minute across all clients
+UPLOAD_TOKEN = environ.get("UPLOAD_TOKEN", "")  # Bearer token of the /upload route, empty disables web uploads
+ADMIN_TOKEN = environ.get("ADMIN_TOKEN", "")  # Bearer token of the admin web routes (/speedtest), empty disables them
+UPLOAD_CONNECTIONS = int(environ.get("UPLOAD_CONNECTIONS", "4"))  # Parallel connections used by each web upload
+CLIENT_AFFINITY = get_bool("CLIENT_AFFINITY", True)  # Serve each file from the same client unless it is overloaded
+AFFINITY_LOAD_FACTOR = float(environ.get("AFFINITY_LOAD_FACTOR", "1.25"))  # Max load of a client relative to the average before files spill over
+THUMB_CACHE_SIZE = int(environ.get("THUMB_CACHE_SIZE", "16"))  # MB of thumbnails kept in memory
+THUMB_CACHE_DIR = environ.get("THUMB_CACHE_DIR", "thumbs")  # Disk cache of thumbnails, empty to disable
+SPEEDTEST_FILES = list(map(int, environ.get("SPEEDTEST_FILES", "").split()))  # Link ids of the /speedtest reference files, ideally one per DC
+SPEEDTEST_SIZE = int(environ.get("SPEEDTEST_SIZE", "8"))  # MB pulled from each reference file by each client
+SPEEDTEST_INTERVAL = int(environ.get("SPEEDTEST_INTERVAL", "0"))  # Seconds between automatic speedtests, 0 runs them on demand only
+SPEEDTEST_MIN_SPEED = float(environ.get("SPEEDTEST_MIN_SPEED", "0"))  # Clients pulling fewer MB/s in a speedtest are quarantined, 0 never
+ACCESS_LOG = environ.get("ACCESS_LOG", "")  # File the streamed ranges are appended to for `bench.replay`, empty to disable
+ACCESS_LOG_FLUSH = float(environ.get("ACCESS_LOG_FLUSH", "10"))  # Seconds access log lines are buffered before they are written
+POPULARITY_FLUSH = float(environ.get("POPULARITY_FLUSH", "60"))  # Seconds per-file view counters are gathered before one MongoDB bulk write, 0 disables them
+POPULARITY_RETENTION = int(environ.get("POPULARITY_RETENTION", "30"))  # Days the hourly view counters are kept
+TOP_WINDOWS = list(map(int, environ.get("TOP_WINDOWS", "1 24 168").split()))  # Hours covered by the /top lists
+REPLICA_RATE = float(environ.get("REPLICA_RATE", "0"))  # Stream requests per minute (per process) that make a file hot and get it copied, 0 disables replicas
+REPLICA_COUNT = int(environ.get("REPLICA_COUNT", "2"))  # Copies of a hot file, put in the next storage channels
+REPLICA_GRACE = int(environ.get("REPLICA_GRACE", "10800"))  # Seconds retired copies are kept for the streams still reading them
 
 # 🔧 App/Heroku Configuration
 name = str(environ.get('name', 'avbotz'))  # Project name
@@ -3,7 +3,7 @@ from pyrogram import Client, filters
 from pyrogram.types import Message
 from info import * 
 
-BYPASS_IDS = ADMINS + AUTH_CHANNEL + [BIN_CHANNEL, LOG_CHANNEL, PREMIUM_LOGS, VERIFIED_LOG]
+BYPASS_IDS = ADMINS + AUTH_CHANNEL + BIN_CHANNELS + [LOG_CHANNEL, PREMIUM_LOGS, VERIFIED_LOG]
 
 @Client.on_message(~filters.service, group=0)  # group=0 allows continue_propagation
 async def maintenance_checker(client, message: Message):
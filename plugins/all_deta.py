@@ -3,8 +3,9 @@ import os
 import asyncio
 from pyrogram import Client, filters
 from pyrogram.types import Message
-from info import ADMINS
+from info import ADMINS, DRAIN_TIMEOUT
 from database.users_db import db
+from web.server.drain import drainer
 
 # ✅ Bot Stats Command
 @Client.on_message(filters.private & filters.command("stats") & filters.user(ADMINS))
@@ -36,9 +37,21 @@ async def bot_stats(client: Client, message: Message):
 @Client.on_message(filters.private & filters.command("restart") & filters.user(ADMINS))
 async def restart(client: Client, message: Message):
     msg = await message.reply_text("<i>♻️ Restarting the bot, please wait...</i>")
-    await asyncio.sleep(2)
+    if drainer.sock is None:
+        # Not serving through bot.py, nothing to hand over
+        await asyncio.sleep(2)
+        try:
+            await msg.edit("<i>✅ Bot restarted successfully!</i>")
+        except:
+            pass
+        os.execl(sys.executable, sys.executable, *sys.argv)
+
+    # The new process takes over the port and the bot, running streams finish here
+    if await drainer.restart():
+        text = f"<i>✅ Bot restarted successfully!</i>\n<i>Old process drains for up to {DRAIN_TIMEOUT}s.</i>"
+    else:
+        text = "<i>❌ Restart failed, the bot keeps running. Check the logs.</i>"
     try:
-        await msg.edit("<i>✅ Bot restarted successfully!</i>")
+        await msg.edit(text)
     except:
         pass
-    os.execl(sys.executable, sys.executable, *sys.argv)
@@ -135,4 +135,7 @@ async def gen_link_batch(bot, message: Message):
     os.remove(filename)
 
     file_id, ref = unpack_new_file_id(post.document.file_id)
-    await sts.edit(f"Here is your link\nContains `{og_msg}` files.\nhttps://t.me/{BOT_USERNAME}?start=BATCH-{file_id}")
+    await sts.edit(
+        f"Here is your link\nContains `{og_msg}` files.\nhttps://t.me/{BOT_USERNAME}?start=BATCH-{file_id}"
+        "\n\nOpening it in the bot also gives a web link to stream or download the files."
+    )
@@ -2,8 +2,10 @@ import asyncio
 import os
 import random
 from web.utils.file_properties import get_hash
+from web.utils.warmup import ingest_warmer
+from web.utils.storage import storage
 from pyrogram import Client, filters, enums
-from info import BIN_CHANNEL, URL, CHANNEL, BOT_USERNAME, IS_SHORTLINK, CHANNEL_FILE_CAPTION, HOW_TO_OPEN
+from info import BIN_CHANNEL, URL, CHANNEL, BOT_USERNAME, IS_SHORTLINK, CHANNEL_FILE_CAPTION, HOW_TO_OPEN, INGEST_WARMUP
 from utils import get_size, get_shortlink
 from Script import script
 from database.users_db import db
@@ -30,10 +32,12 @@ async def channel_receive_handler(bot: Client, broadcast: Message):
                 return
         file = broadcast.document or broadcast.video
         file_name = file.file_name if file else "Unknown File"
-        msg = await broadcast.forward(chat_id=BIN_CHANNEL)
-        raw_stream = f"{URL}watch/{msg.id}/avbotz.mkv?hash={get_hash(msg)}"
-        raw_download = f"{URL}{msg.id}?hash={get_hash(msg)}"
-        raw_file_link = f"https://t.me/{BOT_USERNAME}?start=file_{msg.id}"
+        msg, link_id = await storage.forward(broadcast, chat_id)
+        if INGEST_WARMUP:
+            ingest_warmer.add(link_id)
+        raw_stream = f"{URL}watch/{link_id}/avbotz.mkv?hash={get_hash(msg)}"
+        raw_download = f"{URL}{link_id}?hash={get_hash(msg)}"
+        raw_file_link = f"https://t.me/{BOT_USERNAME}?start=file_{link_id}"
         if IS_SHORTLINK:
             stream = await get_shortlink(raw_stream)
             download = await get_shortlink(raw_download)
@@ -51,7 +55,7 @@ async def channel_receive_handler(bot: Client, broadcast: Message):
             [InlineKeyboardButton("• ꜱᴛʀᴇᴀᴍ •", url=stream),
              InlineKeyboardButton("• ᴅᴏᴡɴʟᴏᴀᴅ •", url=download)],
             [InlineKeyboardButton('• ᴄʜᴇᴄᴋ ʜᴇʀᴇ ᴛᴏ ɢᴇᴛ ғɪʟᴇ •', url=file_link)],
-            [InlineKeyboardButton("• ᴇᴍʙᴇᴅ •", callback_data=f"get_embed_{msg.id}")]
+            [InlineKeyboardButton("• ᴇᴍʙᴇᴅ •", callback_data=f"get_embed_{link_id}")]
         ]
         if IS_SHORTLINK:
             buttons_list.append([
@@ -0,0 +1,123 @@
+import asyncio
+from pyrogram import Client, filters
+from pyrogram.types import Message
+from info import ADMINS, DRAIN_TIMEOUT, SPEEDTEST_FILES
+from web.server import multi_clients
+from web.utils.client_pool import client_pool, QUARANTINED
+from web.utils.speedtest import speedtest
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+STATE_ICONS = {"active": "✅", "probation": "🟡", "quarantined": "⛔", "draining": "⏳"}
+
+
+def client_index(message: Message):
+    if len(message.command) < 2 or not message.command[1].isdigit():
+        return None
+    return int(message.command[1])
+
+
+# 🤖 Client Pool Status
+@Client.on_message(filters.private & filters.command("clients") & filters.user(ADMINS))
+async def list_clients(client: Client, message: Message):
+    lines = ["🤖 <b>Streaming Clients</b>\n"]
+    for entry in client_pool.stats():
+        line = (
+            f"{STATE_ICONS.get(entry['state'], '')} <code>{entry['index']}</code> "
+            f"@{entry['bot']} - {entry['state']}, load {entry['load']}"
+        )
+        if entry.get("reason"):
+            line += f"\n      <i>{entry['reason']}, {entry['seconds_left']}s left</i>"
+        lines.append(line)
+    lines.append(f"\n<b>Quarantines so far:</b> <code>{client_pool.quarantines}</code>")
+    await message.reply_text("\n".join(lines), quote=True)
+
+
+# ➕ Add Client
+@Client.on_message(filters.private & filters.command("addclient") & filters.user(ADMINS))
+async def add_client(client: Client, message: Message):
+    if len(message.command) < 2:
+        return await message.reply_text("<b>Usage:</b> <code>/addclient bot_token</code>")
+    token = message.command[1]
+    # Don't leave the token in the chat history
+    try:
+        await message.delete()
+    except Exception:
+        pass
+    msg = await message.reply_text("<i>⏳ Logging in the new client...</i>")
+    try:
+        index = await client_pool.add(token)
+    except Exception as e:
+        return await msg.edit(f"<b>❌ Could not add the client:</b> <code>{e}</code>")
+    await msg.edit(f"<b>✅ Client <code>{index}</code> (@{multi_clients[index].me.username}) is serving now.</b>")
+
+
+# ➖ Remove Client
+@Client.on_message(filters.private & filters.command("removeclient") & filters.user(ADMINS))
+async def remove_client(client: Client, message: Message):
+    index = client_index(message)
+    if index is None:
+        return await message.reply_text("<b>Usage:</b> <code>/removeclient client_number</code>")
+    if index == 0 or index not in multi_clients:
+        return await message.reply_text("<b>❌ No removable client with that number in this process.</b>")
+    msg = await message.reply_text(
+        f"<i>⏳ Client {index} gets no new streams, waiting up to {DRAIN_TIMEOUT}s for its running ones...</i>"
+    )
+
+    async def remove():
+        # Runs apart from the handler, draining can take minutes
+        try:
+            running = await client_pool.remove(index)
+        except Exception as e:
+            running, text = 0, f"<b>❌ Could not remove client <code>{index}</code>:</b> <code>{e}</code>"
+        else:
+            text = f"<b>✅ Client <code>{index}</code> removed.</b>"
+        if running:
+            text += f"\n<i>{running} streams were still running and got cut off.</i>"
+        try:
+            await msg.edit(text)
+        except Exception:
+            pass
+
+    asyncio.create_task(remove())
+
+
+# ⛔ Quarantine / Readmit
+@Client.on_message(filters.private & filters.command(["quarantine", "readmit"]) & filters.user(ADMINS))
+async def quarantine_client(client: Client, message: Message):
+    index = client_index(message)
+    if index is None or index not in multi_clients:
+        return await message.reply_text(f"<b>Usage:</b> <code>/{message.command[0]} client_number</code>")
+    if message.command[0] == "quarantine":
+        client_pool.quarantine(index, f"Quarantined by {message.from_user.id}")
+        await message.reply_text(f"<b>⛔ Client <code>{index}</code> is out of rotation until it passes a health check.</b>")
+    else:
+        if client_pool.state(index) != QUARANTINED:
+            return await message.reply_text(f"<b>Client <code>{index}</code> isn't quarantined.</b>")
+        client_pool.readmit(index)
+        await message.reply_text(f"<b>✅ Client <code>{index}</code> is back in rotation.</b>")
+
+
+# 🚀 Speedtest
+@Client.on_message(filters.private & filters.command("speedtest") & filters.user(ADMINS))
+async def run_speedtest(client: Client, message: Message):
+    if not SPEEDTEST_FILES:
+        return await message.reply_text("<b>❌ Set SPEEDTEST_FILES to the message ids of some reference files first.</b>")
+    msg = await message.reply_text(f"<i>⏳ Testing {len(multi_clients)} clients on {len(SPEEDTEST_FILES)} files...</i>")
+    if speedtest.task is None or speedtest.task.done():
+        speedtest.task = asyncio.create_task(speedtest.run())
+    await speedtest.task
+    report = speedtest.report()
+
+    def line(name, entry):
+        speed = f"{entry['mb_per_s']} MB/s" if entry["mb_per_s"] is not None else "-"
+        ttfb = f"{entry['ttfb_ms']} ms" if entry["ttfb_ms"] is not None else "-"
+        return f"<code>{name}</code> {speed}, first byte {ttfb}, errors {entry['errors']}"
+
+    lines = ["🚀 <b>Speedtest</b>\n", "<b>Clients</b>"]
+    lines += [line(index, entry) for index, entry in report["clients"].items()]
+    lines += ["\n<b>DCs</b>"]
+    lines += [line(f"DC{dc}", entry) for dc, entry in report["dcs"].items()]
+    await msg.edit("\n".join(lines))
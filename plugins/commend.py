@@ -4,9 +4,12 @@ from database.users_db import db
 from pyrogram import Client, filters, enums
 from pyrogram.errors import *
 from pyrogram.types import *
-from info import BOT_USERNAME, URL, BATCH_PROTECT_CONTENT, ADMINS, PROTECT_CONTENT, OWNER_USERNAME, SUPPORT, PICS, FILE_PIC, CHANNEL, VERIFIED_LOG, LOG_CHANNEL, FSUB, BIN_CHANNEL, VERIFY_EXPIRE, BATCH_FILE_CAPTION, FILE_CAPTION, VERIFY_IMG, QR_CODE
+from info import BOT_USERNAME, URL, BATCH_PROTECT_CONTENT, BATCH_LINK_EXPIRE, ADMINS, PROTECT_CONTENT, OWNER_USERNAME, SUPPORT, PICS, FILE_PIC, CHANNEL, VERIFIED_LOG, LOG_CHANNEL, FSUB, BIN_CHANNEL, VERIFY_EXPIRE, BATCH_FILE_CAPTION, FILE_CAPTION, VERIFY_IMG, QR_CODE
 from datetime import datetime
 from web.utils.file_properties import get_hash
+from web.utils.batch import batch_manifests, sign_batch
+from web.utils.render_template import get_batch_url
+from web.utils.storage import resolve
 from utils import get_readable_time, verify_user, check_token, get_size
 from web.utils import StartTime, __version__
 from plugins.avbot import is_user_joined, av_verification, av_x_verification
@@ -16,7 +19,6 @@ import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
-BATCH_FILES = {}  
 
 @Client.on_message(filters.command("start") & filters.incoming)
 async def start(client, message):
@@ -53,8 +55,9 @@ async def start(client, message):
     if msg.startswith("file_"):
         _, file_id = msg.split("_", 1)
 
-        # Get the original message from BIN_CHANNEL
-        original_message = await client.get_messages(int(BIN_CHANNEL), int(file_id))
+        # Get the original message from its storage channel
+        chat_id, message_id = resolve(int(file_id))
+        original_message = await client.get_messages(chat_id, message_id)
 
         # Detect media
         media = original_message.document or original_message.video or original_message.audio
@@ -68,8 +71,8 @@ async def start(client, message):
         # Send with caption and protect_content
         return await client.copy_message(
             chat_id=message.from_user.id,
-            from_chat_id=int(BIN_CHANNEL),
-            message_id=int(file_id),
+            from_chat_id=chat_id,
+            message_id=message_id,
             caption=caption,
             protect_content=PROTECT_CONTENT
 	)
@@ -110,18 +113,12 @@ async def start(client, message):
             if not verified:
                 return  # If not verified, exit
         sts = await message.reply("<b>Please wait...</b>")
-        msgs = BATCH_FILES.get(file_id)
-        if not msgs:
-            try:
-                downloaded_file = await client.download_media(file_id)
-                with open(downloaded_file, "r", encoding="utf-8") as f:
-                    msgs = json.load(f)
-                os.remove(downloaded_file)
-                BATCH_FILES[file_id] = msgs
-            except Exception as e:
-                await sts.edit("❌ FAILED to load file.")
-                logger.exception("Unable to open batch JSON file.")
-                return await client.send_message(LOG_CHANNEL, f"❌ UNABLE TO OPEN FILE: {e}")
+        try:
+            msgs = await batch_manifests.get(file_id)
+        except Exception as e:
+            await sts.edit("❌ FAILED to load file.")
+            logger.exception("Unable to open batch JSON file.")
+            return await client.send_message(LOG_CHANNEL, f"❌ UNABLE TO OPEN FILE: {e}")
         for msg in msgs:
             title = msg.get("title")
             size = get_size(int(msg.get("size", 0)))
@@ -162,6 +159,12 @@ async def start(client, message):
             await asyncio.sleep(1)
 
         await sts.delete()
+        # The web routes only open with this token, so they don't skip the checks above
+        await message.reply_text(
+            f"<b>🌐 Stream online (link works for {get_readable_time(BATCH_LINK_EXPIRE)}):</b>\n"
+            f"{get_batch_url(file_id, token=sign_batch(file_id, user_id))}",
+            disable_web_page_preview=True
+        )
         return
 	    
 @Client.on_callback_query()
@@ -337,7 +340,8 @@ async def cb_handler(client: Client, query: CallbackQuery):
         if not file_data:
             return await query.answer("⚠️ Nᴏ ᴍᴏʀᴇ ғɪʟᴇꜱ.", show_alert=True)
         try:
-            original_message = await client.get_messages(BIN_CHANNEL, file_id)
+            chat_id, message_id = resolve(file_id)
+            original_message = await client.get_messages(chat_id, message_id)
             media = original_message.document or original_message.video or original_message.audio
             caption = None
             if media:
@@ -346,8 +350,8 @@ async def cb_handler(client: Client, query: CallbackQuery):
                 caption = FILE_CAPTION.format(CHANNEL, file_name)
             await client.copy_message(
                 chat_id=user_id,
-                from_chat_id=BIN_CHANNEL,
-                message_id=file_id,
+                from_chat_id=chat_id,
+                message_id=message_id,
                 caption=caption,
                 protect_content=PROTECT_CONTENT
             )
@@ -365,7 +369,7 @@ async def cb_handler(client: Client, query: CallbackQuery):
             return await query.answer("⚠️ Yᴏᴜ ᴀʀᴇ ɴᴏᴛ ᴀᴜᴛʜᴏʀɪᴢᴇᴅ ᴛᴏ ᴅᴇʟᴇᴛᴇ ᴛʜɪꜱ ғɪʟᴇ!", show_alert=True)
         await db.files.delete_one({"file_id": file_msg_id})
         try:
-            await client.delete_messages(BIN_CHANNEL, file_msg_id)
+            await client.delete_messages(*resolve(file_msg_id))
         except:
             pass
         await query.answer("✅ Fɪʟᴇ ᴅᴇʟᴇᴛᴇᴅ ꜱᴜᴄᴄᴇꜱꜱғᴜʟʟʏ!", show_alert=True)
@@ -373,7 +377,7 @@ async def cb_handler(client: Client, query: CallbackQuery):
 	
     elif query.data.startswith("get_embed_"):
         file_id = int(query.data.split("_")[2])
-        msg = await client.get_messages(BIN_CHANNEL, file_id)
+        msg = await client.get_messages(*resolve(file_id))
         hash_str = get_hash(msg)
         filename = (msg.document or msg.video or msg.audio).file_name or f"AV_File_{file_id}.mkv"
         embed_url = f"{URL}watch/{file_id}/{filename}?hash={hash_str}&minimal=true"
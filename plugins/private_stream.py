@@ -2,9 +2,11 @@ import time
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from pyrogram.errors import FloodWait
-from info import URL, BOT_USERNAME, BIN_CHANNEL, CHANNEL, PROTECT_CONTENT, FSUB, MAX_FILES
+from info import URL, BOT_USERNAME, BIN_CHANNEL, CHANNEL, PROTECT_CONTENT, FSUB, MAX_FILES, INGEST_WARMUP
 from database.users_db import db
 from web.utils.file_properties import get_hash
+from web.utils.warmup import ingest_warmer
+from web.utils.storage import storage
 from utils import get_size
 from plugins.avbot import av_verification, is_user_allowed, is_user_joined
 from Script import script
@@ -45,11 +47,13 @@ async def private_receive_handler(c: Client, m: Message):
             return
 
     try:
-        forwarded = await m.forward(chat_id=BIN_CHANNEL)
+        forwarded, link_id = await storage.forward(m, user_id)
+        if INGEST_WARMUP:
+            ingest_warmer.add(link_id)
         hash_str = get_hash(forwarded)
-        stream = f"{URL}watch/{forwarded.id}/AV_File_{int(time.time())}.mkv?hash={hash_str}"
-        download = f"{URL}{forwarded.id}?hash={hash_str}"
-        file_link = f"https://t.me/{BOT_USERNAME}?start=file_{forwarded.id}"
+        stream = f"{URL}watch/{link_id}/AV_File_{int(time.time())}.mkv?hash={hash_str}"
+        download = f"{URL}{link_id}?hash={hash_str}"
+        file_link = f"https://t.me/{BOT_USERNAME}?start=file_{link_id}"
         share_link = f"https://t.me/share/url?url={file_link}"
 
         # ✅ Save file in MongoDB
@@ -57,7 +61,7 @@ async def private_receive_handler(c: Client, m: Message):
             "user_id": user_id,
             "file_name": file_name,
             "file_size": file_size,
-            "file_id": forwarded.id,
+            "file_id": link_id,
             "hash": hash_str,
             "timestamp": time.time()
         })
@@ -78,8 +82,8 @@ async def private_receive_handler(c: Client, m: Message):
                  InlineKeyboardButton("• ᴅᴏᴡɴʟᴏᴀᴅ •", url=download)],
                 [InlineKeyboardButton("• ɢᴇᴛ ғɪʟᴇ •", url=file_link),
                  InlineKeyboardButton("• ꜱʜᴀʀᴇ•", url=share_link)],
-                [InlineKeyboardButton("• ᴇᴍʙᴇᴅ •", callback_data=f"get_embed_{forwarded.id}")],
-                [InlineKeyboardButton("• ᴅᴇʟᴇᴛᴇ ғɪʟᴇ •", callback_data=f"deletefile_{forwarded.id}"),
+                [InlineKeyboardButton("• ᴇᴍʙᴇᴅ •", callback_data=f"get_embed_{link_id}")],
+                [InlineKeyboardButton("• ᴅᴇʟᴇᴛᴇ ғɪʟᴇ •", callback_data=f"deletefile_{link_id}"),
                  InlineKeyboardButton("• ᴄʟᴏꜱᴇ •", callback_data="close_data")]
             ])
         )
@@ -0,0 +1,45 @@
+import html
+from pyrogram import Client, filters
+from pyrogram.types import Message
+from info import ADMINS, TOP_WINDOWS
+from utils import get_size
+from web.utils.popularity import popularity, SORT_KEYS
+from web.utils.render_template import get_stream_url
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+
+# 🔥 Hottest Files
+@Client.on_message(filters.private & filters.command("top") & filters.user(ADMINS))
+async def top_files(client: Client, message: Message):
+    windows, sort = TOP_WINDOWS, "views"
+    for arg in message.command[1:]:
+        if arg.isdigit() and int(arg) > 0:
+            windows = [int(arg)]
+        elif arg.lower() in SORT_KEYS:
+            sort = arg.lower()
+        else:
+            return await message.reply_text(
+                f"<b>Usage:</b> <code>/top [hours] [{'|'.join(SORT_KEYS)}]</code>", quote=True
+            )
+
+    # Keeps the reply within Telegram's message length
+    limit = 10 if len(windows) == 1 else 5
+    lines = [f"🔥 <b>Top Files by {sort}</b>"]
+    for hours in windows:
+        lines.append(f"\n<b>Last {hours}h</b>")
+        try:
+            files = await popularity.top(hours, limit, sort)
+        except Exception as e:
+            return await message.reply_text(f"<b>❌ Could not read the counters:</b> <code>{e}</code>", quote=True)
+        if not files:
+            lines.append("<i>No streams yet</i>")
+        for rank, file in enumerate(files, 1):
+            name = html.escape((file["name"] or f"File {file['id']}")[:48])
+            lines.append(
+                f"{rank}. <a href='{get_stream_url(file['id'], file['hash'])}'>{name}</a>\n"
+                f"      👁 {file['views']} · 👥 {file['ips']} · 📦 {get_size(file['bytes'])}"
+            )
+    await message.reply_text("\n".join(lines), quote=True, disable_web_page_preview=True)
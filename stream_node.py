@@ -0,0 +1,55 @@
+import os, asyncio, logging, time
+
+#Dont Remove My Credit @AV_BOTz_UPDATE
+#This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+# Streaming-only entry point: `python stream_node.py`
+# Serves the web routes with the bot and the MULTI_TOKEN clients of this node's environment,
+# without plugins, bot updates, restart messages or premium checks.
+# Run as many nodes as needed behind a load balancer next to a single bot.py.
+os.environ["STREAM_NODE"] = "True"
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logging.getLogger("aiohttp").setLevel(logging.ERROR)
+logging.getLogger("pyrogram").setLevel(logging.ERROR)
+logging.getLogger("aiohttp.web").setLevel(logging.ERROR)
+
+from info import *
+from aiohttp import web
+from pyrogram import idle
+from web import web_server
+from web.server import Webavbot, multi_clients
+from web.server.clients import initialize_clients
+from web.utils.client_pool import client_pool
+from web.utils.speedtest import speedtest
+
+loop = asyncio.get_event_loop()
+
+async def start():
+    started = time.time()
+    await Webavbot.start()
+    await initialize_clients()
+    asyncio.create_task(client_pool.monitor())
+    if SPEEDTEST_FILES and SPEEDTEST_INTERVAL:
+        asyncio.create_task(speedtest.monitor(SPEEDTEST_INTERVAL))
+    app = web.AppRunner(await web_server())
+    await app.setup()
+    await web.TCPSite(app, "0.0.0.0", PORT).start()
+    logging.info(f"Stream node ready in {time.time() - started:.1f}s with {len(multi_clients)} clients on port {PORT}")
+    await idle()
+    await app.cleanup()
+    await Webavbot.stop()
+
+#Dont Remove My Credit @AV_BOTz_UPDATE
+#This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+if __name__ == '__main__':
+    try:
+        loop.run_until_complete(start())
+    except KeyboardInterrupt:
+        logging.info('----------------------- Stream Node Stopped -----------------------')
@@ -1,5 +1,6 @@
 from aiohttp import web
 from .stream_routes import routes
+from .server.drain import drainer
 from asyncio import sleep
 from datetime import datetime, timedelta
 from database.users_db import db
@@ -7,7 +8,7 @@ from info import PREMIUM_LOGS
 from pyrogram import Client
 
 async def web_server():
-    web_app = web.Application(client_max_size=30000000)
+    web_app = web.Application(client_max_size=30000000, middlewares=[drainer.middleware])
     web_app.add_routes(routes)
     return web_app
 
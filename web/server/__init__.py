@@ -1,3 +1,4 @@
+import os
 import logging
 from pyrogram import Client, types
 from typing import Union, Optional, AsyncGenerator
@@ -17,8 +18,30 @@ for mod in ["aiohttp", "pyrogram", "aiohttp.web"]:
 # This Repo Is By @BOT_OWNER26 
 # For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
 
+def session_options(name: str) -> dict:
+    """Client arguments that keep the session of `name` in SESSION_DIR, or in memory without it."""
+    if not SESSION_DIR:
+        return {"name": name, "in_memory": True}
+    os.makedirs(SESSION_DIR, exist_ok=True)
+    return {"name": name, "workdir": SESSION_DIR}
+
+
 class WebXBot(Client):
-    def __init__(self):
+    def __init__(self, stream_only: bool = False):
+        """
+        The main bot. Stream workers and stream nodes (stream_only) log in with their own
+        session in SESSION_DIR and receive no updates, so only bot.py handles commands.
+        """
+        if stream_only:
+            super().__init__(
+                **session_options(f"{SESSION}_stream{STREAM_WORKER_INDEX}"),
+                api_id=API_ID,
+                api_hash=API_HASH,
+                bot_token=BOT_TOKEN,
+                sleep_threshold=SLEEP_THRESHOLD,
+                no_updates=True,
+            )
+            return
         super().__init__(
             name=SESSION,
             api_id=API_ID,
@@ -59,7 +82,7 @@ class WebXBot(Client):
 
 
 # ✅ Global single client instance
-Webavbot = WebXBot()
+Webavbot = WebXBot(stream_only=STREAM_NODE or STREAM_WORKER_INDEX > 0)
 
 # ✅ Client management setup
 multi_clients = {}
@@ -1,42 +1,131 @@
+import os
+import json
+import time
 import asyncio
 import logging
+import psutil
+from typing import Dict, Optional, Set, Tuple
 from info import *
 from pyrogram import Client
+from pyrogram.errors import Unauthorized
 from web.utils.config_parser import TokenParser
-from web.server import multi_clients, work_loads, Webavbot
+from web.server import multi_clients, work_loads, Webavbot, session_options
 
 # Dont Remove My Credit @AV_BOTz_UPDATE 
 # This Repo Is By @BOT_OWNER26 
 # For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
 
-async def initialize_clients():
+RUNTIME_TOKENS = os.path.join(SESSION_DIR, "tokens.json")
+
+# Auth keys of the media sessions on other DCs, kept in the session file of their client
+MEDIA_AUTH_SCHEMA = "CREATE TABLE IF NOT EXISTS media_auth_keys (dc_id INTEGER PRIMARY KEY, auth_key BLOB)"
+
+
+def load_media_auth_key(client: Client, dc_id: int) -> Optional[bytes]:
+    """Returns the auth key this client imported its authorization to `dc_id` with before."""
+    conn = client.storage.conn
+    conn.execute(MEDIA_AUTH_SCHEMA)
+    row = conn.execute("SELECT auth_key FROM media_auth_keys WHERE dc_id = ?", (dc_id,)).fetchone()
+    return row[0] if row else None
+
+
+def save_media_auth_key(client: Client, dc_id: int, auth_key: Optional[bytes]) -> None:
+    """Stores the media auth key of `dc_id` next to the session, None forgets it."""
+    conn = client.storage.conn
+    with conn:
+        conn.execute(MEDIA_AUTH_SCHEMA)
+        if auth_key is None:
+            conn.execute("DELETE FROM media_auth_keys WHERE dc_id = ?", (dc_id,))
+        else:
+            conn.execute("REPLACE INTO media_auth_keys VALUES (?, ?)", (dc_id, auth_key))
+
+
+def bot_id(token: str) -> int:
+    return int(token.split(":")[0])
+
+
+async def start_client(client_id: int, token: str) -> Client:
+    """Logs in the MULTI_TOKEN client `client_id`, reusing its saved session when there is one."""
+    def new_client() -> Client:
+        # Named after the bot, so a different token in the same slot never reuses the session
+        return Client(
+            **session_options(f"AVClient_{bot_id(token)}"),
+            api_id=API_ID,
+            api_hash=API_HASH,
+            bot_token=token,
+            sleep_threshold=SLEEP_THRESHOLD,
+            no_updates=True,
+        )
+
+    client = new_client()
+    try:
+        await client.start()
+    except Unauthorized:
+        if client.in_memory:
+            raise
+        # The saved login was revoked (e.g. a regenerated token): log in from scratch
+        logging.warning(f"Saved session of Client {client_id} is no longer valid, logging in again")
+        client.storage.database.unlink(missing_ok=True)
+        client = new_client()
+        await client.start()
+    return client
+
+
+def load_runtime_tokens() -> Tuple[Dict[int, str], Set[int]]:
+    """
+    Returns the clients added with /addclient and the bot ids removed with /removeclient,
+    which apply on top of MULTI_TOKEN across restarts.
+    """
+    if not SESSION_DIR:
+        return {}, set()
+    try:
+        with open(RUNTIME_TOKENS) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}, set()
+    return {int(k): v for k, v in state.get("added", {}).items()}, set(state.get("removed", []))
+
+
+def save_runtime_tokens(added: Dict[int, str], removed: Set[int]) -> None:
+    if not SESSION_DIR:
+        return
+    os.makedirs(SESSION_DIR, exist_ok=True)
+    with open(RUNTIME_TOKENS + ".tmp", "w") as f:
+        json.dump({"added": {str(k): v for k, v in added.items()}, "removed": sorted(removed)}, f)
+    os.replace(RUNTIME_TOKENS + ".tmp", RUNTIME_TOKENS)
+
+
+async def initialize_clients(worker_index: int = 0, workers: int = 1):
+    """
+    Starts the MULTI_TOKEN clients next to the main bot.
+    With several stream workers every process starts only its share of the tokens
+    (token number % workers == worker_index), so no bot is logged in twice.
+    """
     global MULTI_CLIENT
     multi_clients[0] = Webavbot
     work_loads[0] = 0
 
-    all_tokens = TokenParser().parse_from_env()
+    added, removed = load_runtime_tokens()
+    all_tokens = {
+        client_id: token
+        for client_id, token in {**TokenParser().parse_from_env(), **added}.items()
+        if client_id % workers == worker_index and bot_id(token) not in removed
+    }
 
     if not all_tokens:
         logging.warning("No additional clients found, using default client")
         return
 
-    async def start_client(client_id: int, token: str):
+    started = time.time()
+
+    async def launch(client_id: int, token: str):
         try:
             logging.info(f"Starting Client {client_id}...")
             if client_id == len(all_tokens):
                 await asyncio.sleep(2)
                 logging.info("This will take some time, please wait...")
 
-            client = await Client(
-                name=f"AVClient_{client_id}",
-                api_id=API_ID,
-                api_hash=API_HASH,
-                bot_token=token,
-                sleep_threshold=SLEEP_THRESHOLD,
-                no_updates=True,
-                in_memory=True
-            ).start()
-
+            client = await start_client(client_id, token)
             work_loads[client_id] = 0
             return client_id, client
 
@@ -46,7 +135,7 @@ async def initialize_clients():
 
     # Launch all clients
     results = await asyncio.gather(*[
-        start_client(i, token) for i, token in all_tokens.items()
+        launch(i, token) for i, token in all_tokens.items()
     ])
 
     # Filter out failed (None) results
@@ -58,5 +147,9 @@ async def initialize_clients():
     if len(multi_clients) > 1:
         MULTI_CLIENT = True
         logging.info("✅ Multi-Client Mode Enabled")
+        logging.info(
+            f"{len(valid_clients)} clients ready in {time.time() - started:.1f}s, "
+            f"{time.time() - psutil.Process().create_time():.1f}s after launch"
+        )
     else:
         logging.warning("No additional clients were initialized, using default client only.")
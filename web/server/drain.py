@@ -0,0 +1,225 @@
+import os
+import sys
+import signal
+import socket
+import sqlite3
+import asyncio
+import logging
+from typing import List, Optional
+from aiohttp import web
+from pyrogram import StopPropagation
+from pyrogram.handlers import RawUpdateHandler
+from pyrogram.storage import FileStorage
+from info import DRAIN_TIMEOUT
+from web.server import Webavbot, multi_clients
+from web.utils.access_log import access_log
+from web.utils.popularity import popularity
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+LISTEN_FD = "AVBOTZ_LISTEN_FD"  # Listening socket handed over by the process being restarted
+PREDECESSOR = "AVBOTZ_PREDECESSOR"  # Pid to tell once the new process is serving
+READY_TIMEOUT = 180  # Login can wait out a FloodWait, the old process keeps serving meanwhile
+HOLD_GROUP = -100  # Runs before every plugin handler
+
+
+def listen_socket(port: int, reuse_port: bool = False) -> socket.socket:
+    """Returns the socket handed over by a graceful restart, or binds a new one on `port`."""
+    fd = os.environ.pop(LISTEN_FD, None)
+    if fd:
+        sock = socket.socket(fileno=int(fd))
+        sock.set_inheritable(False)
+        return sock
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(("0.0.0.0", port))
+    sock.listen(128)
+    return sock
+
+
+class Drainer:
+    def __init__(self, timeout: int = DRAIN_TIMEOUT):
+        """
+        Counts the requests in flight and stops this process without cutting them off.
+        A restart hands the listening socket to a new process, so the port stays open;
+        the old one stops accepting once the new one serves, lets its requests finish
+        for up to `timeout` seconds and exits.
+        The socket is all the two processes share: before the new one starts, the old one
+        stops handling bot updates, stops its stream workers and moves its sessions off disk,
+        so no update is handled twice and the session files are never open in both.
+        Only the sessions carry over. The in-memory caches (parts, file ids, batch manifests,
+        MP4 layouts) start empty in the new process, the thumbnail disk cache is shared.
+        """
+        self.timeout = timeout
+        self.active = 0
+        self.draining = False
+        self.sock: Optional[socket.socket] = None
+        self.site: Optional[web.SockSite] = None
+        self.task: Optional[asyncio.Task] = None
+        self.holding = False
+        self.released: List[FileStorage] = []
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        self.active += 1
+        try:
+            response = await handler(request)
+        finally:
+            self.active -= 1
+        if self.draining:
+            # Players reconnect for their next request and reach the new process
+            response.force_close()
+        return response
+
+    async def hold(self, client, update, users, chats) -> None:
+        # Updates that reach us during a restart are the new process's to handle
+        if self.holding:
+            raise StopPropagation
+
+    async def serve(self, runner: web.AppRunner, sock: socket.socket) -> None:
+        self.sock = sock
+        if not Webavbot.no_updates:
+            Webavbot.add_handler(RawUpdateHandler(self.hold), group=HOLD_GROUP)
+        self.site = web.SockSite(runner, sock)
+        await self.site.start()
+        predecessor = os.environ.pop(PREDECESSOR, None)
+        if predecessor:
+            try:
+                os.kill(int(predecessor), signal.SIGUSR1)
+            except (OSError, ValueError):
+                pass
+
+    async def drain(self) -> None:
+        """Stops accepting connections and waits for the requests in flight, up to the deadline."""
+        self.draining = True
+        if self.site:
+            # Closes our copy of the socket only, a successor keeps accepting on its own
+            await self.site.stop()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while self.active and loop.time() < deadline:
+            await asyncio.sleep(1)
+        if self.active:
+            logging.warning(f"Drain deadline reached with {self.active} requests still running")
+        if access_log:
+            await access_log.flush()
+        await popularity.flush()
+
+    async def release_storage(self) -> None:
+        """
+        Saves every session that lives on disk and moves it into memory, so a new process
+        can open the files while this one keeps streaming with the same logins.
+        """
+        for client in {Webavbot, *multi_clients.values()}:
+            storage = client.storage
+            if not isinstance(storage, FileStorage) or storage.conn is None or storage in self.released:
+                continue
+            try:
+                await storage.save()
+                memory = sqlite3.connect(":memory:", check_same_thread=False)
+                storage.conn.backup(memory)
+                storage.conn.close()
+                storage.conn = memory
+                self.released.append(storage)
+            except Exception as e:
+                logging.warning(f"Could not release the session of {client.name}: {e}")
+
+    def restore_storage(self) -> None:
+        """Writes the sessions moved into memory back to their files and uses those again."""
+        for storage in self.released:
+            try:
+                file = sqlite3.connect(str(storage.database), timeout=1, check_same_thread=False)
+                storage.conn.backup(file)
+                storage.conn.close()
+                storage.conn = file
+            except Exception as e:
+                logging.warning(f"Could not restore the session file {storage.database}: {e}")
+        self.released.clear()
+
+    async def start_successor(self) -> bool:
+        """Starts a copy of this process on our listening socket and waits until it serves."""
+        fd = self.sock.fileno()
+        ready = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGUSR1, ready.set)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, *sys.argv,
+                pass_fds=(fd,),
+                env={**os.environ, LISTEN_FD: str(fd), PREDECESSOR: str(os.getpid())},
+            )
+            waiters = [asyncio.ensure_future(ready.wait()), asyncio.ensure_future(process.wait())]
+            await asyncio.wait(waiters, timeout=READY_TIMEOUT, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in waiters:
+                waiter.cancel()
+            if not ready.is_set():
+                logging.error(f"New process did not start serving (exit code {process.returncode})")
+                if process.returncode is None:
+                    process.kill()
+                return False
+            return True
+        finally:
+            loop.remove_signal_handler(signal.SIGUSR1)
+
+    async def restart(self) -> bool:
+        """
+        Gracefully restarts bot.py: once the new process serves, this one hands over in the background.
+        returns: False when the new process failed to start, this one then keeps running as before.
+        """
+        if self.sock is None or self.task is not None:
+            return False
+        from web.worker import start_workers, stop_workers
+        # Hand over the bot updates and the session files before the new process logs in.
+        # Our stream workers drain too, the new process starts its own
+        self.holding = True
+        await stop_workers()
+        await self.release_storage()
+        if not await self.start_successor():
+            self.restore_storage()
+            self.holding = False
+            start_workers()
+            return False
+        # Not awaited by the /restart handler: stopping the dispatcher waits for every handler
+        self.task = asyncio.create_task(self.hand_over())
+        return True
+
+    async def hand_over(self) -> None:
+        await Webavbot.dispatcher.stop()
+        await self.drain()
+        for client in {Webavbot, *multi_clients.values()}:
+            try:
+                if client.is_connected:
+                    await client.stop()
+            except Exception as e:
+                logging.warning(f"Could not stop {client.name}: {e}")
+
+        logging.info("----------------------- Drained, handed over -----------------------")
+        if os.getpid() == 1:
+            # Leaving would stop the container along with the new process
+            reap_children()
+        os._exit(0)
+
+
+def reap_children() -> None:
+    """Stays as a minimal init: reaps the processes restarts leave behind and forwards stop signals."""
+    def forward(signum, frame):
+        signal.signal(signum, signal.SIG_IGN)
+        os.killpg(os.getpgrp(), signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    while True:
+        try:
+            os.waitpid(-1, 0)
+        except ChildProcessError:
+            return
+        except InterruptedError:
+            continue
+
+
+drainer = Drainer()
@@ -1,30 +1,78 @@
-import re, math, logging, secrets, time, mimetypes
+import re, json, hashlib, logging, secrets, time, mimetypes
+from typing import Optional
+from contextlib import aclosing
 from aiohttp import web
 from aiohttp.http_exceptions import BadStatusLine
 from info import *
 from web.server import multi_clients, work_loads, Webavbot
 from web.server.exceptions import FIleNotFound, InvalidHash
-from web.utils.custom_dl import ByteStreamer
-from utils import get_readable_time
+from pyrogram.file_id import FileId
+from web.utils.custom_dl import ByteStreamer, CHUNK_SIZE, get_byte_streamer
+from web.utils.client_ring import client_ring, select_client
+from web.utils.worker_stats import read_workers
+from utils import get_readable_time, get_size
 from web.utils import StartTime, __version__
-from web.utils.render_template import render_page
+from web.utils.render_template import render_page, get_stream_url, get_watch_url, get_download_url, get_thumb_url, render_batch_page, render_batch_playlist
+from web.utils.hls import build_segments, render_playlist
+from web.utils.hedging import hedge_budget
+from web.utils.stream_writer import CoalescingWriter, stream_stats
+from web.utils.stream_budget import stream_governor
+from web.utils.part_cache import part_cache
+from web.utils.readahead import access_tracker, schedule_read_ahead
+from web.utils.thumbnails import thumb_cache, thumb_mime_type
+from web.utils.warmup import stream_warmer, ingest_warmer
+from web.utils.client_pool import client_pool
+from web.utils.speedtest import speedtest
+from web.utils.access_log import access_log
+from web.utils.popularity import popularity, SORT_KEYS
+from web.utils.storage import storage
+from web.utils.replicas import replicas
+from web.utils.batch import batch_manifests, check_batch_token, get_batch_members
+from web.utils.zipstream import ZipMember, ZipStream, zip_slots
+from web.utils.uploader import ParallelUploader, post_upload, IncompleteUpload, UploadError
+from web.utils.file_properties import get_hash
+from database.users_db import db
 
 routes = web.RouteTableDef()
-class_cache = {}
 
 @routes.get("/", allow_head=True)
 async def root_route_handler(_):
+    connected_bots = len(multi_clients)
+    loads = {
+        "bot" + str(i + 1): load
+        for i, (_, load) in enumerate(
+            sorted(work_loads.items(), key=lambda x: x[1], reverse=True)
+        )
+    }
+    if STREAM_WORKERS > 1:
+        # Every worker process publishes its own clients, add them up
+        workers = {state["worker"]: state for state in read_workers()}
+        workers[STREAM_WORKER_INDEX] = {"connected_bots": len(multi_clients), "loads": work_loads}
+        connected_bots = sum(state["connected_bots"] for state in workers.values())
+        loads = {
+            f"worker{worker}_bot{int(index) + 1}": load
+            for worker, state in sorted(workers.items())
+            for index, load in sorted(state["loads"].items(), key=lambda x: x[1], reverse=True)
+        }
+
     return web.json_response({
         "server_status": "running",
         "uptime": get_readable_time(time.time() - StartTime),
         "telegram_bot": "@" + BOT_USERNAME,
-        "connected_bots": len(multi_clients),
-        "loads": {
-            "bot" + str(i + 1): load
-            for i, (_, load) in enumerate(
-                sorted(work_loads.items(), key=lambda x: x[1], reverse=True)
-            )
-        },
+        "connected_bots": connected_bots,
+        "workers": STREAM_WORKERS,
+        "affinity_spills": client_ring.spills if CLIENT_AFFINITY else None,
+        "client_health": client_pool.health(),
+        "loads": loads,
+        "hedging": hedge_budget.stats() if HEDGE_REQUESTS else None,
+        "streams": stream_stats,
+        "memory": stream_governor.stats(),
+        "part_cache": part_cache.stats(),
+        "thumbnails": thumb_cache.stats(),
+        "warmup": stream_warmer.stats() if WATCH_WARMUP else None,
+        "ingest_warmup": ingest_warmer.stats() if INGEST_WARMUP else None,
+        "storage": storage.stats() if len(BIN_CHANNELS) > 1 else None,
+        "replicas": replicas.stats() if REPLICA_RATE else None,
         "version": __version__,
     })
 
@@ -45,6 +93,7 @@ async def render_watch_response(request: web.Request, is_embed: bool):
         
         # Render the player page with file info
         html_content = await render_page(video_id, secure_hash, request=request, is_embed=is_embed)
+        warm_stream(request, video_id, secure_hash)
         
         # Create response with CORS headers for iframe embedding
         response = web.Response(text=html_content, content_type="text/html")
@@ -100,6 +149,7 @@ async def render_stream_response(request: web.Request, is_embed: bool):
             secure_hash = request.rel_url.query.get("hash")
             
         html_content = await render_page(id, secure_hash, request=request, is_embed=is_embed)
+        warm_stream(request, id, secure_hash)
         
         response = web.Response(text=html_content, content_type="text/html")
         response.headers["Access-Control-Allow-Origin"] = "*"
@@ -117,6 +167,408 @@ async def render_stream_response(request: web.Request, is_embed: bool):
         logging.critical(e)
         return web.Response(status=500, text=str(e))
 
+@routes.get(r"/hls/{id:\d+}/index.m3u8", allow_head=True)
+async def hls_playlist_handler(request: web.Request):
+    """HLS playlist of EXT-X-BYTERANGE segments over the regular stream URL, for fragmented MP4s"""
+    try:
+        id = int(request.match_info["id"])
+        secure_hash = request.rel_url.query.get("hash", "")
+        index, tg_connect, file_id = await get_streamer(id, secure_hash)
+
+        file_name = (file_id.file_name or "").lower()
+        if file_id.mime_type != "video/mp4" and not file_name.endswith(".mp4"):
+            return web.Response(status=415, text="415: HLS is only available for MP4 files")
+
+        layout = await tg_connect.get_mp4_layout(file_id)
+        segments = build_segments(layout, HLS_SEGMENT_DURATION) if layout else []
+        if not segments:
+            # Only fragmented MP4s with a sidx index are made of fragments HLS players accept
+            return web.Response(status=404, text="404: HLS is only available for fragmented MP4s with a sidx index")
+
+        playlist = render_playlist(layout, segments, get_stream_url(id, secure_hash))
+        return web.Response(
+            text=playlist,
+            content_type="application/vnd.apple.mpegurl",
+            headers={
+                "Cache-Control": "public, max-age=3600",
+                "Access-Control-Allow-Origin": "*",
+                "Access-Control-Allow-Methods": "GET, OPTIONS",
+            }
+        )
+    except InvalidHash as e:
+        raise web.HTTPForbidden(text=e.message)
+    except FIleNotFound as e:
+        raise web.HTTPNotFound(text=e.message)
+    except Exception as e:
+        logging.critical(f"Error in hls_playlist_handler: {e}")
+        return web.Response(status=500, text=str(e))
+
+@routes.get(r"/thumb/{id:\d+}", allow_head=True)
+async def thumb_handler(request: web.Request):
+    """Poster image of a file, served from the Telegram-provided thumbnail"""
+    try:
+        id = int(request.match_info["id"])
+        secure_hash = request.rel_url.query.get("hash", "")
+        index, tg_connect, file_id = await get_streamer(id, secure_hash)
+
+        if not file_id.thumb_unique_id:
+            raise web.HTTPNotFound(text="This file has no thumbnail")
+
+        # The thumbnail of a file never changes, so its unique id is a strong ETag
+        etag = f'"{file_id.thumb_unique_id}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, OPTIONS",
+        }
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers=headers)
+
+        thumb = await tg_connect.get_thumbnail(file_id)
+        if not thumb:
+            raise web.HTTPNotFound(text="This file has no thumbnail")
+
+        return web.Response(body=thumb, content_type=thumb_mime_type(thumb), headers=headers)
+    except InvalidHash as e:
+        raise web.HTTPForbidden(text=e.message)
+    except FIleNotFound as e:
+        raise web.HTTPNotFound(text=e.message)
+    except web.HTTPException:
+        raise
+    except Exception as e:
+        logging.critical(f"Error in thumb_handler: {e}")
+        return web.Response(status=500, text=str(e))
+
+@routes.get("/speedtest")
+async def speedtest_handler(request: web.Request):
+    """
+    Time to first byte, MB/s and errors of every client and DC on the SPEEDTEST_FILES.
+    Runs a new test when the last one is more than 5 minutes old, otherwise returns it.
+    Needs `Authorization: Bearer <ADMIN_TOKEN>`: a test pulls every client upstream.
+    """
+    if not SPEEDTEST_FILES or not ADMIN_TOKEN:
+        raise web.HTTPNotFound(text="404: SPEEDTEST_FILES or ADMIN_TOKEN is not set")
+    if not secrets.compare_digest(request.headers.get("Authorization", ""), f"Bearer {ADMIN_TOKEN}"):
+        return web.Response(status=401, text="401: Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+    try:
+        return web.json_response(await speedtest.latest_or_run())
+    except Exception as e:
+        logging.critical(f"Error in speedtest_handler: {e}")
+        return web.Response(status=500, text=str(e))
+
+@routes.get("/api/top", allow_head=True)
+async def api_top_handler(request: web.Request):
+    """
+    The most watched files of every TOP_WINDOWS window, or of `hours` when given.
+    `by` sorts by views (default), requests, bytes or ips, `limit` caps each list (max 100).
+    """
+    try:
+        query = request.rel_url.query
+        windows = [int(query["hours"])] if "hours" in query else TOP_WINDOWS
+        limit = min(int(query.get("limit", "10")), 100)
+        sort = query.get("by", "views")
+        if sort not in SORT_KEYS or limit < 1 or any(hours < 1 for hours in windows):
+            return web.Response(status=400, text=f"400: by must be one of {', '.join(SORT_KEYS)}, hours and limit positive")
+    except ValueError:
+        return web.Response(status=400, text="400: hours and limit must be numbers")
+    try:
+        top = {}
+        for hours in windows:
+            # Without the hashes, a list of hot files must not double as a list of links
+            files = await popularity.top(hours, limit, sort)
+            top[f"{hours}h"] = [{k: v for k, v in file.items() if k != "hash"} for file in files]
+        return web.json_response({"by": sort, "top": top}, headers={"Cache-Control": "public, max-age=60"})
+    except Exception as e:
+        logging.critical(f"Error in api_top_handler: {e}")
+        return web.Response(status=500, text=str(e))
+
+@routes.get("/api/files", allow_head=True)
+async def api_files_handler(request: web.Request):
+    """
+    Metadata of many files at once for frontends.
+    `ids` is a comma separated list of {hash}{id} tokens, the same form as the short stream links.
+    """
+    try:
+        tokens = [token for token in request.rel_url.query.get("ids", "").split(",") if token]
+        if not tokens or len(tokens) > 100:
+            return web.Response(status=400, text="400: Pass between 1 and 100 ids")
+
+        wanted = {}
+        for token in tokens:
+            match = re.match(r"^([a-zA-Z0-9_-]{6})(\d+)$", token)
+            if not match:
+                return web.Response(status=400, text=f"400: Invalid id {token}")
+            wanted[token] = (match.group(1), int(match.group(2)))
+
+        # Resolve every id on the client that serves it, so its properties land in the right cache
+        by_client = {}
+        for _, id in wanted.values():
+            by_client.setdefault(select_client(id), []).append(id)
+        file_ids = {}
+        for index, ids in by_client.items():
+            tg_connect = get_byte_streamer(multi_clients[index])
+            file_ids.update(await tg_connect.get_many_file_properties(ids))
+
+        files, missing = [], []
+        for token, (secure_hash, id) in wanted.items():
+            file_id = file_ids.get(id)
+            # A wrong hash is reported like a missing file, so ids can't be probed
+            if file_id is None or file_id.unique_id[:6] != secure_hash:
+                missing.append(token)
+                continue
+            file_name = file_id.file_name or f"AV_File_{id}.mkv"
+            files.append({
+                "id": token,
+                "name": file_name,
+                "size": file_id.file_size,
+                "mime_type": file_id.mime_type,
+                "duration": file_id.duration,
+                "stream_url": get_stream_url(id, secure_hash),
+                "download_url": get_download_url(id, secure_hash, file_name),
+                "watch_url": get_watch_url(id, secure_hash, file_name),
+                "thumb_url": get_thumb_url(id, secure_hash) if file_id.thumb_unique_id else None,
+            })
+
+        body = json.dumps({"files": files, "missing": missing})
+        etag = f'"{hashlib.sha1(body.encode()).hexdigest()}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "public, max-age=300",
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, OPTIONS",
+        }
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers=headers)
+        return web.Response(text=body, content_type="application/json", headers=headers)
+    except Exception as e:
+        logging.critical(f"Error in api_files_handler: {e}")
+        return web.Response(status=500, text=str(e))
+
+@routes.post("/upload")
+async def upload_handler(request: web.Request):
+    """
+    Uploads the raw request body to a storage channel and returns its links, like a file sent to the bot.
+    Needs `Authorization: Bearer <UPLOAD_TOKEN>`, a Content-Length and the file name in `?name=`.
+    """
+    if not UPLOAD_TOKEN:
+        raise web.HTTPNotFound()
+    if not secrets.compare_digest(request.headers.get("Authorization", ""), f"Bearer {UPLOAD_TOKEN}"):
+        return web.Response(status=401, text="401: Invalid upload token", headers={"WWW-Authenticate": "Bearer"})
+
+    file_size = request.content_length
+    if not file_size:
+        return web.Response(status=411, text="411: Content-Length is required")
+    if file_size > 2000 * 1024 * 1024:
+        return web.Response(status=413, text="413: Files can't be larger than 2000 MiB")
+
+    file_name = request.rel_url.query.get("name") or f"AV_File_{int(time.time())}.mkv"
+    mime_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+
+    try:
+        # Parts uploaded by a bot can only be used by that bot, so the main bot posts the file
+        client = multi_clients[0]
+        uploader = ParallelUploader(client, file_name, file_size)
+        file = await uploader.upload(request.content.readexactly)
+        message, id = await storage.store(
+            lambda chat_id: post_upload(client, file, file_name, mime_type, chat_id=chat_id)
+        )
+        if not message:
+            raise UploadError("Telegram didn't return the posted message")
+    except IncompleteUpload as e:
+        logging.warning(f"Upload of {file_name} was cut short: {e}")
+        return web.Response(status=400, text=f"400: {e}")
+    except UploadError as e:
+        logging.error(f"Upload of {file_name} failed: {e}")
+        return web.Response(status=502, text=f"502: {e}")
+    except Exception as e:
+        logging.critical(f"Error in upload_handler: {e}")
+        return web.Response(status=500, text=str(e))
+
+    if INGEST_WARMUP:
+        ingest_warmer.add(id)
+    secure_hash = get_hash(message)
+    await db.files.insert_one({
+        "user_id": 0,
+        "file_name": file_name,
+        "file_size": get_size(file_size),
+        "file_id": id,
+        "hash": secure_hash,
+        "timestamp": time.time()
+    })
+
+    return web.json_response({
+        "id": f"{secure_hash}{id}",
+        "name": file_name,
+        "size": file_size,
+        "mime_type": mime_type,
+        "stream_url": get_stream_url(id, secure_hash),
+        "download_url": get_download_url(id, secure_hash, file_name),
+        "watch_url": get_watch_url(id, secure_hash, file_name),
+    })
+
+def batch_link_refused(request: web.Request, batch_id: str) -> Optional[web.Response]:
+    """
+    The batch routes only open with the expiring token /start BATCH- hands out after its
+    premium / verification check, so the web is no way around it.
+    """
+    if not check_batch_token(batch_id, request.rel_url.query.get("token", "")):
+        return web.Response(status=403, text="403: This batch link is invalid or expired, open the batch in the bot again")
+    return None
+
+def batch_link_protected() -> web.Response:
+    return web.Response(status=403, text="403: This batch is protected, its files can only be streamed one by one")
+
+@routes.get(r"/batch/{batch_id:[\w-]+}", allow_head=True)
+async def batch_page_handler(request: web.Request):
+    """Page with the stream and download link of every file of a batch"""
+    try:
+        batch_id = request.match_info["batch_id"]
+        refused = batch_link_refused(request, batch_id)
+        if refused:
+            return refused
+        members = get_batch_members(await batch_manifests.get(batch_id))
+        return web.Response(
+            text=await render_batch_page(batch_id, members, request.rel_url.query["token"]),
+            content_type="text/html",
+            headers={"Cache-Control": "private, max-age=300"}
+        )
+    except FIleNotFound as e:
+        raise web.HTTPNotFound(text=e.message)
+    except Exception as e:
+        logging.critical(f"Error in batch_page_handler: {e}")
+        return web.Response(status=500, text=str(e))
+
+@routes.get(r"/batch/{batch_id:[\w-]+}.m3u", allow_head=True)
+async def batch_playlist_handler(request: web.Request):
+    """M3U playlist of a batch, so a whole season plays in VLC / MX Player"""
+    try:
+        batch_id = request.match_info["batch_id"]
+        refused = batch_link_refused(request, batch_id)
+        if refused:
+            return refused
+        if BATCH_PROTECT_CONTENT:
+            return batch_link_protected()
+        members = get_batch_members(await batch_manifests.get(batch_id))
+        return web.Response(
+            text=render_batch_playlist(batch_id, members, request.rel_url.query["token"]),
+            content_type="audio/x-mpegurl",
+            headers={
+                "Content-Disposition": f'inline; filename="AV_Batch_{batch_id[-8:]}.m3u"',
+                "Cache-Control": "private, max-age=300",
+                "Access-Control-Allow-Origin": "*",
+            }
+        )
+    except FIleNotFound as e:
+        raise web.HTTPNotFound(text=e.message)
+    except Exception as e:
+        logging.critical(f"Error in batch_playlist_handler: {e}")
+        return web.Response(status=500, text=str(e))
+
+@routes.get(r"/batch/{batch_id:[\w-]+}/{index:\d+}/{filename}", allow_head=True)
+async def batch_file_handler(request: web.Request):
+    """Streams one file of a batch, with Range support like the regular stream route"""
+    try:
+        batch_id = request.match_info["batch_id"]
+        refused = batch_link_refused(request, batch_id)
+        if refused:
+            return refused
+        index = int(request.match_info["index"])
+        # Protected batches are only streamed, as Telegram doesn't let them be saved either
+        download = request.rel_url.query.get("download", "0") == "1" and not BATCH_PROTECT_CONTENT
+        members = get_batch_members(await batch_manifests.get(batch_id))
+        if index >= len(members):
+            raise FIleNotFound
+
+        # Batch file ids belong to the main bot, so only its client can fetch them
+        return await stream_file(request, 0, get_byte_streamer(multi_clients[0]), members[index].file_id, download)
+    except FIleNotFound as e:
+        raise web.HTTPNotFound(text=e.message)
+    except Exception as e:
+        logging.critical(f"Error in batch_file_handler: {e}")
+        return web.Response(status=500, text=str(e))
+
+@routes.get(r"/batch/{batch_id:[\w-]+}.zip", allow_head=True)
+async def batch_zip_handler(request: web.Request):
+    """Every file of a batch as one store-mode ZIP, streamed straight from Telegram"""
+    try:
+        batch_id = request.match_info["batch_id"]
+        refused = batch_link_refused(request, batch_id)
+        if refused:
+            return refused
+        if BATCH_PROTECT_CONTENT:
+            return batch_link_protected()
+        members = get_batch_members(await batch_manifests.get(batch_id))
+        if not members:
+            raise FIleNotFound
+
+        if not stream_governor.admit(CHUNK_SIZE):
+            return web.Response(
+                status=503,
+                text="503: Server is busy, try again shortly",
+                headers={"Retry-After": "5"}
+            )
+        if not zip_slots.take(request.remote):
+            return web.Response(
+                status=429,
+                text="429: Too many ZIP downloads are running, try again when one is done",
+                headers={"Retry-After": "60"}
+            )
+        try:
+            return await stream_batch_zip(request, batch_id, members)
+        finally:
+            zip_slots.give(request.remote)
+    except FIleNotFound as e:
+        raise web.HTTPNotFound(text=e.message)
+    except Exception as e:
+        logging.critical(f"Error in batch_zip_handler: {e}")
+        return web.Response(status=500, text=str(e))
+
+async def stream_batch_zip(request: web.Request, batch_id: str, members: list) -> web.StreamResponse:
+    """Streams the ZIP of a batch whose link was checked, within a ZIP slot"""
+    # Batch file ids belong to the main bot, so only its client can fetch them
+    index = 0
+    tg_connect = get_byte_streamer(multi_clients[index])
+    archive = ZipStream([
+        ZipMember(
+            member.name,
+            member.size,
+            lambda file_id=member.file_id: tg_connect.iter_range(file_id, index, 0, file_id.file_size - 1)
+        )
+        for member in members
+    ])
+
+    response = web.StreamResponse(
+        status=200,
+        headers={
+            "Content-Type": "application/zip",
+            "Content-Length": str(archive.size),
+            "Content-Disposition": f'attachment; filename="AV_Batch_{batch_id[-8:]}.zip"',
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, OPTIONS",
+        }
+    )
+    await response.prepare(request)
+    if request.method == "HEAD":
+        return response
+
+    writer = CoalescingWriter(response, request.transport)
+    try:
+        async with aclosing(archive.stream()) as stream:
+            async for chunk in stream:
+                await writer.write(chunk)
+        await writer.flush()
+        await response.write_eof()
+    except Exception as e:
+        # A short archive is corrupt, so drop the connection instead of finishing it
+        logging.error(f"Error streaming batch {batch_id}: {e}")
+        if request.transport:
+            request.transport.close()
+    finally:
+        writer.close()
+        writer.report(f"batch {batch_id}")
+    return response
+
 @routes.get(r"/{path:\S+}", allow_head=True)
 async def stream_handler(request: web.Request):
     try:
@@ -139,23 +591,57 @@ async def stream_handler(request: web.Request):
         logging.critical(e)
         return web.Response(status=500, text=str(e))
 
-async def media_streamer(request: web.Request, id: int, secure_hash: str, download: bool = False):
-    range_header = request.headers.get("Range", None)
-
-    index = min(work_loads, key=work_loads.get)
+async def get_streamer(id: int, secure_hash: str):
+    """
+    Picks the client that should serve the file and resolves it with its ByteStreamer.
+    returns: (client index, ByteStreamer, FileId)
+    """
+    index = select_client(id)
     faster_client = multi_clients[index]
 
-    if MULTI_CLIENT:
-        logging.info(f"📡 Client {index} is now serving: {request.remote}")
-
-    tg_connect = class_cache.get(faster_client) or ByteStreamer(faster_client)
-    class_cache[faster_client] = tg_connect
+    tg_connect = get_byte_streamer(faster_client)
 
     file_id = await tg_connect.get_file_properties(id)
 
     if file_id.unique_id[:6] != secure_hash:
         raise InvalidHash
+    return index, tg_connect, file_id
 
+def warm_stream(request: web.Request, id: int, secure_hash: str) -> None:
+    """
+    Starts warming the stream of a page that was just rendered, since the
+    player will request it right after. HEAD requests (link checkers) don't count.
+    """
+    if not WATCH_WARMUP or request.method != "GET":
+        return
+
+    async def warm():
+        _, tg_connect, file_id = await get_streamer(id, secure_hash)
+        await tg_connect.warm_up(file_id)
+
+    stream_warmer.schedule(id, warm)
+
+async def media_streamer(request: web.Request, id: int, secure_hash: str, download: bool = False):
+    copy = id
+    if request.method == "GET":
+        replicas.record(id)
+        copy = replicas.route(id, request.remote)
+    try:
+        index, tg_connect, file_id = await get_streamer(copy, secure_hash)
+    except FIleNotFound:
+        if copy == id:
+            raise
+        # The copy was deleted under us, serve the original
+        replicas.forget(id, copy)
+        index, tg_connect, file_id = await get_streamer(id, secure_hash)
+
+    if MULTI_CLIENT:
+        logging.info(f"📡 Client {index} is now serving: {request.remote}")
+
+    return await stream_file(request, index, tg_connect, file_id, download, id)
+
+async def stream_file(request: web.Request, index: int, tg_connect: ByteStreamer, file_id: FileId, download: bool = False, id: int = None):
+    range_header = request.headers.get("Range", None)
     file_size = file_id.file_size
 
     if range_header:
@@ -178,13 +664,17 @@ async def media_streamer(request: web.Request, id: int, secure_hash: str, downlo
         )
 
     # Setup stream vars
-    chunk_size = 1024 * 1024
-    offset = from_bytes - (from_bytes % chunk_size)
-    first_part_cut = from_bytes - offset
-    last_part_cut = until_bytes % chunk_size + 1
-    part_count = math.ceil(until_bytes / chunk_size) - math.floor(offset / chunk_size)
+    if not stream_governor.admit(CHUNK_SIZE):
+        return web.Response(
+            status=503,
+            text="503: Server is busy, try again shortly",
+            headers={"Retry-After": "5"}
+        )
     req_length = until_bytes - from_bytes + 1
 
+    if SMART_READ_AHEAD and request.method == "GET":
+        schedule_read_ahead(tg_connect, file_id, request.remote, from_bytes, until_bytes, CHUNK_SIZE)
+
     # Determine MIME type with better MKV support
     mime_type = file_id.mime_type or "application/octet-stream"
     file_name = file_id.file_name or f"{secrets.token_hex(2)}.bin"
@@ -201,6 +691,18 @@ async def media_streamer(request: web.Request, id: int, secure_hash: str, downlo
     elif file_name.lower().endswith('.ts'):
         mime_type = 'video/MP2T'
 
+    # Serve MP4s with moov at the end as a moov-first virtual file
+    layout = None
+    if FASTSTART and mime_type == 'video/mp4' and not download:
+        layout = await tg_connect.get_mp4_layout(file_id)
+    if layout and layout.segments:
+        body = layout.iter_range(
+            from_bytes, until_bytes,
+            lambda start, end: tg_connect.iter_range(file_id, index, start, end)
+        )
+    else:
+        body = tg_connect.iter_range(file_id, index, from_bytes, until_bytes)
+
     response = web.StreamResponse(
         status=206 if range_header else 200,
         reason="Partial Content" if range_header else "OK",
@@ -221,14 +723,27 @@ async def media_streamer(request: web.Request, id: int, secure_hash: str, downlo
 
     await response.prepare(request)
 
+    writer = CoalescingWriter(response, request.transport)
     try:
-        async for chunk in tg_connect.yield_file(
-            file_id, index, offset, first_part_cut, last_part_cut, part_count, chunk_size
-        ):
-            await response.write(chunk)
+        # aclosing() releases the stream's budget as soon as the player disconnects
+        async with aclosing(body) as stream:
+            async for chunk in stream:
+                await writer.write(chunk)
+        await writer.flush()
     except Exception as e:
-        logging.exception(f"Error streaming file {file_id.file_unique_id}: {e}")
+        logging.exception(f"Error streaming file {file_id.unique_id}: {e}")
     finally:
+        writer.close()
+        writer.report(file_name)
+        if access_log:
+            access_log.record(file_id, from_bytes, until_bytes, writer.bytes, index, request.remote)
+        if id is not None and request.method == "GET":
+            popularity.record(id, file_id, request.remote, from_bytes, writer.bytes)
+        if SMART_READ_AHEAD and request.method == "GET":
+            access_tracker.stopped(request.remote or "", file_id.media_id, from_bytes, writer.bytes)
+        if writer.bytes < req_length:
+            # A body shorter than its Content-Length would leave the player waiting on a kept-alive connection
+            response.force_close()
         await response.write_eof()
 
     return response
@@ -0,0 +1,103 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import aiofiles
+from typing import List, NamedTuple, Optional
+from pyrogram.file_id import FileId
+from info import ACCESS_LOG, ACCESS_LOG_FLUSH, STREAM_WORKER_INDEX
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+HEADER = "# time media_id file_size first last sent client viewer video\n"
+BUFFER_LINES = 512
+
+
+class Access(NamedTuple):
+    time: float
+    media_id: int
+    file_size: int
+    first: int  # Inclusive byte range the player asked for
+    last: int
+    sent: int  # Bytes actually streamed, less when the player went away early
+    client: int
+    viewer: str  # Hash of the player's IP, Range requests of one viewer build on each other
+    video: bool
+
+    def line(self) -> str:
+        return (
+            f"{self.time:.3f} {self.media_id} {self.file_size} {self.first} {self.last} "
+            f"{self.sent} {self.client} {self.viewer} {int(self.video)}\n"
+        )
+
+    @classmethod
+    def parse(cls, line: str) -> Optional["Access"]:
+        fields = line.split()
+        if len(fields) != 9 or line.startswith("#"):
+            return None
+        return cls(
+            float(fields[0]), int(fields[1]), int(fields[2]), int(fields[3]), int(fields[4]),
+            int(fields[5]), int(fields[6]), fields[7], fields[8] == "1",
+        )
+
+
+def viewer_hash(ip: Optional[str]) -> str:
+    return hashlib.blake2b((ip or "").encode(), digest_size=4).hexdigest()
+
+
+class AccessLog:
+    def __init__(self, path: str, interval: float = 10):
+        """
+        Appends one compact line per streamed range to `path`, buffered in memory
+        for up to `interval` seconds (or BUFFER_LINES lines) so streams never wait on the disk.
+        Read it back with `Access.parse` or replay it with `python -m bench.replay`.
+        """
+        self.path = path
+        self.interval = interval
+        self.buffer: List[str] = []
+        self.full = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+        self.written = 0
+
+    def record(self, file_id: FileId, first: int, last: int, sent: int, client: int, ip: Optional[str]) -> None:
+        self.buffer.append(Access(
+            time.time(), file_id.media_id, file_id.file_size, first, last, sent, client,
+            viewer_hash(ip), (file_id.mime_type or "").startswith("video/"),
+        ).line())
+        if len(self.buffer) >= BUFFER_LINES:
+            self.full.set()
+        if self.task is None:
+            self.task = asyncio.create_task(self.flush_later())
+
+    async def flush_later(self) -> None:
+        try:
+            await asyncio.wait_for(self.full.wait(), self.interval)
+        except asyncio.TimeoutError:
+            pass
+        self.task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Writes the buffered lines in one append."""
+        async with self.lock:
+            lines, self.buffer = self.buffer, []
+            self.full.clear()
+            if not lines:
+                return
+            try:
+                new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+                async with aiofiles.open(self.path, mode="a") as f:
+                    await f.write((HEADER if new else "") + "".join(lines))
+                self.written += len(lines)
+            except OSError as e:
+                logging.warning(f"Could not write the access log, dropped {len(lines)} lines: {e}")
+
+
+# Every stream worker keeps its own file, `bench.replay` merges them
+access_log = AccessLog(
+    f"{ACCESS_LOG}.{STREAM_WORKER_INDEX}" if STREAM_WORKER_INDEX else ACCESS_LOG, ACCESS_LOG_FLUSH
+) if ACCESS_LOG else None
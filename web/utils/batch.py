@@ -0,0 +1,148 @@
+import re
+import hmac
+import json
+import time
+import base64
+import hashlib
+import asyncio
+import logging
+import mimetypes
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple
+from pyrogram.file_id import FileId
+from info import BOT_TOKEN, BATCH_LINK_EXPIRE
+from web.server import Webavbot
+from web.server.exceptions import FIleNotFound
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+BATCH_ID = re.compile(r"^[A-Za-z0-9_-]{16,128}$")
+# Every process and stream node has the bot token, so all of them accept the same links
+LINK_KEY = hashlib.sha256(b"batch-links:" + BOT_TOKEN.encode()).digest()
+
+
+class BatchMember(NamedTuple):
+    name: str
+    size: int
+    caption: str
+    file_id: FileId
+
+
+class BatchManifestCache:
+    def __init__(self, max_entries: int = 64, ttl: int = 30 * 60):
+        """
+        Caches the JSON manifests written by /batch, keyed by the id in their BATCH- link.
+        Concurrent loads of the same manifest share one download.
+
+        :param max_entries: Number of manifests kept, oldest are forgotten first.
+        :param ttl: Seconds a manifest is kept before it is downloaded again.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.inflight: Dict[str, asyncio.Future] = {}
+
+    async def get(self, batch_id: str) -> List[dict]:
+        """
+        Returns the list of files of a batch manifest.
+        raises: FIleNotFound when the id is malformed or the manifest can't be loaded.
+        """
+        entry = self.entries.get(batch_id)
+        if entry and time.monotonic() - entry[1] < self.ttl:
+            self.entries.move_to_end(batch_id)
+            return entry[0]
+
+        waiter = self.inflight.get(batch_id)
+        if waiter is not None:
+            return await asyncio.shield(waiter)
+
+        waiter = self.inflight[batch_id] = asyncio.get_running_loop().create_future()
+        waiter.add_done_callback(lambda f: f.exception())
+        try:
+            files = await self.download(batch_id)
+        except BaseException as e:
+            waiter.set_exception(e if isinstance(e, FIleNotFound) else FIleNotFound())
+            raise
+        else:
+            waiter.set_result(files)
+            self.entries[batch_id] = (files, time.monotonic())
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            return files
+        finally:
+            del self.inflight[batch_id]
+
+    @staticmethod
+    async def download(batch_id: str) -> List[dict]:
+        if not BATCH_ID.match(batch_id):
+            raise FIleNotFound
+        try:
+            data = await Webavbot.download_media(batch_id, in_memory=True)
+            files = json.loads(data.getvalue())
+        except Exception as e:
+            logging.error(f"Unable to load batch manifest {batch_id}: {e}")
+            raise FIleNotFound
+        if not isinstance(files, list):
+            raise FIleNotFound
+        return files
+
+
+def _signature(batch_id: str, user_id: int, expires: int) -> str:
+    digest = hmac.new(LINK_KEY, f"{batch_id}:{user_id}:{expires}".encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:18]).decode()
+
+
+def sign_batch(batch_id: str, user_id: int, ttl: int = BATCH_LINK_EXPIRE) -> str:
+    """
+    Returns the token that opens the web routes of a batch for `ttl` seconds.
+    Only the bot hands it out, after the same checks as sending the batch in Telegram.
+    """
+    expires = int(time.time()) + ttl
+    return f"{user_id}.{expires}.{_signature(batch_id, user_id, expires)}"
+
+
+def check_batch_token(batch_id: str, token: str) -> bool:
+    try:
+        user_id, expires, signature = token.split(".")
+        user_id, expires = int(user_id), int(expires)
+    except ValueError:
+        return False
+    return expires >= time.time() and hmac.compare_digest(signature, _signature(batch_id, user_id, expires))
+
+
+def get_batch_members(files: List[dict]) -> List[BatchMember]:
+    """
+    Decodes the files of a manifest into streamable members with unique file names.
+    Files whose file_id can't be decoded are skipped.
+    """
+    members = []
+    seen = set()
+    for i, file in enumerate(files, start=1):
+        try:
+            file_id = FileId.decode(file["file_id"])
+        except Exception:
+            logging.warning(f"Skipping undecodable batch file {i}")
+            continue
+        size = int(file.get("size") or 0)
+        setattr(file_id, "file_size", size)
+
+        name = (file.get("title") or f"AV_File_{i}").replace("/", "_").replace("\\", "_")
+        base, dot, ext = name.rpartition(".")
+        if not dot:
+            base, ext = name, ""
+        unique, n = name, 1
+        while unique.lower() in seen:
+            n += 1
+            unique = f"{base} ({n}).{ext}" if ext else f"{base} ({n})"
+        seen.add(unique.lower())
+        setattr(file_id, "file_name", unique)
+        setattr(file_id, "mime_type", mimetypes.guess_type(unique)[0] or "application/octet-stream")
+
+        members.append(BatchMember(unique, size, file.get("caption") or "", file_id))
+    return members
+
+
+# ✅ Process-wide instance shared by the /start handler and the web routes
+batch_manifests = BatchManifestCache()
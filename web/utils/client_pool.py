@@ -0,0 +1,239 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, List
+from pyrogram import Client, raw
+from pyrogram.errors import AuthBytesInvalid, FloodWait
+from info import (
+    CLIENT_ERROR_LIMIT, CLIENT_FLOOD_LIMIT, CLIENT_PROBATION, CLIENT_HEALTH_INTERVAL, DRAIN_TIMEOUT
+)
+from web.server import multi_clients, work_loads
+from web.utils.config_parser import TokenParser
+from web.server.clients import bot_id, start_client, load_runtime_tokens, save_runtime_tokens
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+ACTIVE = "active"
+PROBATION = "probation"  # Back in rotation, but the next error sends it straight back
+QUARANTINED = "quarantined"
+DRAINING = "draining"
+
+ERROR_WINDOW = 60
+MAX_QUARANTINE = 6 * 3600
+# Failures of the client's connection. Errors of the file itself (expired reference,
+# bad offset, deleted message) say nothing about the client and don't count
+TRANSPORT_ERRORS = (TimeoutError, ConnectionError, FloodWait, AuthBytesInvalid)
+
+
+class ClientPool:
+    def __init__(
+        self,
+        error_limit: int = 5,
+        flood_limit: int = 60,
+        probation: int = 300,
+    ):
+        """
+        Tracks the health of the clients in multi_clients and which of them new streams may use.
+        A client is quarantined after `error_limit` errors within a minute or a FloodWait
+        of at least `flood_limit` seconds. After `probation` seconds (doubled every time it
+        fails again) it is checked and, if it answers, serves on probation for as long again.
+        """
+        self.error_limit = max(1, error_limit)
+        self.flood_limit = flood_limit
+        self.probation = probation
+        self.states: Dict[int, str] = {}
+        self.until: Dict[int, float] = {}
+        self.strikes: Dict[int, int] = {}
+        self.errors: Dict[int, Deque[float]] = {}
+        self.reasons: Dict[int, str] = {}
+        self.quarantines = 0
+        self.lock = asyncio.Lock()
+
+    def state(self, index: int) -> str:
+        return self.states.get(index, ACTIVE)
+
+    def loads(self) -> Dict[int, int]:
+        """Returns the loads of the clients new streams may be sent to."""
+        loads = {
+            index: load for index, load in work_loads.items()
+            if self.state(index) in (ACTIVE, PROBATION)
+        }
+        # Better a struggling client than none at all
+        return loads or dict(work_loads)
+
+    def record_error(self, index: int, error: BaseException) -> None:
+        """Counts an error of the client `index` against its health."""
+        state = self.state(index)
+        if state in (QUARANTINED, DRAINING):
+            return
+        if isinstance(error, FloodWait) and error.value >= self.flood_limit:
+            self.quarantine(index, f"FloodWait of {error.value}s", error.value)
+            return
+        if state == PROBATION:
+            self.quarantine(index, f"{type(error).__name__} on probation")
+            return
+
+        now = time.time()
+        errors = self.errors.setdefault(index, deque())
+        errors.append(now)
+        while errors and errors[0] < now - ERROR_WINDOW:
+            errors.popleft()
+        if len(errors) >= self.error_limit:
+            self.quarantine(index, f"{len(errors)} errors in {ERROR_WINDOW}s, last {type(error).__name__}")
+
+    def quarantine(self, index: int, reason: str, duration: int = 0) -> None:
+        strikes = self.strikes.get(index, 0)
+        duration = max(duration, min(self.probation * 2 ** strikes, MAX_QUARANTINE))
+        self.states[index] = QUARANTINED
+        self.until[index] = time.time() + duration
+        self.strikes[index] = strikes + 1
+        self.reasons[index] = reason
+        self.errors.pop(index, None)
+        self.quarantines += 1
+        logging.warning(f"Client {index} quarantined for {duration}s: {reason}")
+
+    def readmit(self, index: int) -> None:
+        self.states[index] = ACTIVE
+        self.strikes.pop(index, None)
+        self.errors.pop(index, None)
+        self.until.pop(index, None)
+        self.reasons.pop(index, None)
+
+    @staticmethod
+    async def probe(client: Client) -> None:
+        await asyncio.wait_for(
+            client.invoke(raw.functions.users.GetUsers(id=[raw.types.InputUserSelf()])), timeout=30
+        )
+
+    async def check(self, index: int) -> None:
+        client = multi_clients.get(index)
+        state = self.state(index)
+        if client is None or state == DRAINING:
+            return
+        now = time.time()
+        if state == PROBATION and now >= self.until[index]:
+            logging.info(f"Client {index} passed probation")
+            self.states[index] = ACTIVE
+            # Passing probation forgives one strike, not the whole history
+            self.strikes[index] = max(0, self.strikes.get(index, 0) - 1)
+            return
+        if state == QUARANTINED and now < self.until[index]:
+            return
+
+        try:
+            await self.probe(client)
+        except Exception as e:
+            if state == QUARANTINED:
+                self.quarantine(index, f"Health check failed: {type(e).__name__}")
+            else:
+                self.record_error(index, e)
+            return
+        if state == QUARANTINED:
+            self.states[index] = PROBATION
+            self.until[index] = now + self.probation
+            logging.info(f"Client {index} is back on probation")
+
+    async def monitor(self, interval: int = CLIENT_HEALTH_INTERVAL) -> None:
+        """Checks every client each `interval` seconds and re-admits quarantined ones that recovered."""
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.gather(*(self.check(index) for index in list(multi_clients)))
+
+    async def add(self, token: str) -> int:
+        """
+        Logs in a new client and puts it in rotation.
+        returns: its index. raises: ValueError when that bot is already serving.
+        """
+        async with self.lock:
+            if any(client.me and client.me.id == bot_id(token) for client in multi_clients.values()):
+                raise ValueError("This bot is already in the pool")
+            added, removed = load_runtime_tokens()
+            # Past every MULTI_TOKEN number too, including those other stream workers serve
+            index = max([*multi_clients, *added, *TokenParser().parse_from_env()]) + 1
+            client = await start_client(index, token)
+            multi_clients[index] = client
+            work_loads[index] = 0
+            self.readmit(index)
+
+            added[index] = token
+            removed.discard(bot_id(token))
+            save_runtime_tokens(added, removed)
+            logging.info(f"Client {index} added to the pool")
+            return index
+
+    async def remove(self, index: int, timeout: int = DRAIN_TIMEOUT) -> int:
+        """
+        Takes the client `index` out of rotation, lets its streams finish for up to
+        `timeout` seconds, then logs it out of the pool.
+        returns: the streams that were still running at the deadline.
+        """
+        if index == 0:
+            raise ValueError("The main bot can't be removed")
+        client = multi_clients.get(index)
+        if client is None:
+            raise KeyError(index)
+        self.states[index] = DRAINING
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while work_loads.get(index) and loop.time() < deadline:
+            await asyncio.sleep(1)
+        running = work_loads.get(index, 0)
+
+        async with self.lock:
+            multi_clients.pop(index, None)
+            work_loads.pop(index, None)
+            for table in (self.states, self.until, self.strikes, self.errors, self.reasons):
+                table.pop(index, None)
+
+            from .custom_dl import class_cache
+            tg_connect = class_cache.pop(client, None)
+            if tg_connect:
+                await tg_connect.stop()
+            try:
+                await client.stop()
+            except Exception as e:
+                logging.warning(f"Could not stop client {index}: {e}")
+
+            added, removed = load_runtime_tokens()
+            added.pop(index, None)
+            if client.me:
+                removed.add(client.me.id)
+            save_runtime_tokens(added, removed)
+        logging.info(f"Client {index} removed from the pool")
+        return running
+
+    def stats(self) -> List[Dict]:
+        now = time.time()
+        clients = []
+        for index in sorted(multi_clients):
+            client = multi_clients[index]
+            state = self.state(index)
+            entry = {
+                "index": index,
+                "bot": client.me.username if client.me else None,
+                "state": state,
+                "load": work_loads.get(index, 0),
+                "recent_errors": len(self.errors.get(index, ())),
+            }
+            if state in (QUARANTINED, PROBATION):
+                entry["seconds_left"] = max(0, int(self.until[index] - now))
+                entry["reason"] = self.reasons.get(index)
+            clients.append(entry)
+        return clients
+
+    def health(self) -> Dict:
+        return {
+            "quarantines": self.quarantines,
+            "unhealthy": [entry for entry in self.stats() if entry["state"] != ACTIVE],
+        }
+
+
+client_pool = ClientPool(
+    error_limit=CLIENT_ERROR_LIMIT,
+    flood_limit=CLIENT_FLOOD_LIMIT,
+    probation=CLIENT_PROBATION,
+)
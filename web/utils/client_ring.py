@@ -0,0 +1,82 @@
+import math
+import bisect
+import hashlib
+from typing import Dict, FrozenSet, List, Tuple
+from info import CLIENT_AFFINITY, AFFINITY_LOAD_FACTOR
+from .client_pool import client_pool
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+
+def ring_hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class ClientRing:
+    def __init__(self, replicas: int = 64, load_factor: float = 1.25):
+        """
+        Consistent hash ring from message ids to client indexes with bounded loads.
+        A file always goes to the same client while that client is not busier than
+        `load_factor` times the average, so its cached properties and media session
+        are reused instead of being duplicated on every client.
+        When it is, the file spills over to the next client on the ring.
+
+        :param replicas: Points every client gets on the ring.
+        :param load_factor: How far above the average load a client may go.
+        """
+        self.replicas = replicas
+        self.load_factor = max(1.0, load_factor)
+        self.clients: FrozenSet[int] = frozenset()
+        self.points: List[int] = []
+        self.owners: List[int] = []
+        self.spills = 0
+
+    def build(self, clients: FrozenSet[int]) -> None:
+        ring: List[Tuple[int, int]] = sorted(
+            (ring_hash(f"{client}-{replica}"), client)
+            for client in clients
+            for replica in range(self.replicas)
+        )
+        self.points = [point for point, _ in ring]
+        self.owners = [client for _, client in ring]
+        self.clients = clients
+
+    def pick(self, id: int, loads: Dict[int, int]) -> int:
+        """Returns the client index that should serve the message `id`."""
+        clients = frozenset(loads)
+        if clients != self.clients:
+            self.build(clients)
+
+        # Bounded loads: nobody takes more than load_factor times the average, counting this request
+        cap = math.ceil(self.load_factor * (sum(loads.values()) + 1) / len(clients))
+        start = bisect.bisect(self.points, ring_hash(str(id))) % len(self.points)
+        seen = set()
+        for i in range(len(self.points)):
+            client = self.owners[(start + i) % len(self.points)]
+            if client in seen:
+                continue
+            if loads[client] < cap:
+                if seen:
+                    self.spills += 1
+                return client
+            seen.add(client)
+            if len(seen) == len(clients):
+                break
+        return min(loads, key=loads.get)
+
+
+client_ring = ClientRing(load_factor=AFFINITY_LOAD_FACTOR)
+
+
+def select_client(id: int) -> int:
+    """
+    Returns the index of the client that should serve the message `id` among the
+    healthy ones: its place on the client ring with CLIENT_AFFINITY, otherwise the
+    least loaded one.
+    """
+    loads = client_pool.loads()
+    if CLIENT_AFFINITY:
+        return client_ring.pick(id, loads)
+    return min(loads, key=loads.get)
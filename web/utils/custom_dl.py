@@ -1,14 +1,40 @@
 import asyncio
 import logging
 from info import *
-from typing import Dict, Union
+from collections import deque
+from typing import AsyncGenerator, Deque, Dict, List, Optional, Union
 from web.server import work_loads
 from pyrogram import Client, utils, raw
-from .file_properties import get_file_ids
+from .file_properties import FileNotFound, get_file_ids, get_message_file_ids
 from pyrogram.session import Session, Auth
 from pyrogram.errors import AuthBytesInvalid
 from web.server.exceptions import FIleNotFound
+from web.server.clients import load_media_auth_key, save_media_auth_key
 from pyrogram.file_id import FileId, FileType, ThumbnailSource
+from .hedging import dc_latency, hedge_budget
+from .stream_budget import stream_governor
+from .part_cache import part_cache
+from .mp4 import Mp4Layout, RangeReader, layout_cache
+from .thumbnails import thumb_cache
+from .client_pool import TRANSPORT_ERRORS, client_pool
+from .storage import SHARD_BITS, link_id, resolve
+
+CHUNK_SIZE = 1024 * 1024
+
+# Limits how many background prefetches run at once across all clients
+prefetch_slots = asyncio.Semaphore(4)
+
+
+def part_range(from_bytes: int, until_bytes: int, chunk_size: int = CHUNK_SIZE):
+    """
+    Maps the inclusive byte range onto Telegram parts.
+    returns: (offset, first_part_cut, last_part_cut, part_count)
+    """
+    offset = from_bytes - (from_bytes % chunk_size)
+    first_part_cut = from_bytes - offset
+    last_part_cut = until_bytes % chunk_size + 1
+    part_count = until_bytes // chunk_size - offset // chunk_size + 1
+    return offset, first_part_cut, last_part_cut, part_count
 
 
 class ByteStreamer:
@@ -21,8 +47,17 @@ class ByteStreamer:
 
         functions:
             generate_file_properties: returns the properties for a media of a specific message contained in Tuple.
+            get_many_file_properties: returns the properties of many messages with one request.
             generate_media_session: returns the media session for the DC that contains the media file.
+            fetch_part: requests a single part, hedging slow requests when enabled.
+            read_part: returns a part through the shared part cache.
+            prefetch: warms the part cache in the background.
+            warm_up: prepares the media session and first part of a file before it's requested.
+            iter_range: yield an inclusive byte range of the file.
+            get_mp4_layout: returns the parsed (and faststart) layout of an MP4 file.
+            get_thumbnail: returns the Telegram thumbnail of a media file.
             yield_file: yield a file from telegram servers for streaming.
+            stop: stops the cache cleaner and hedge sessions of a client leaving the pool.
 
         This is a modified version of the <https://github.com/eyaadh/megadlbot_oss/blob/master/mega/telegram/utils/custom_download.py>
         Thanks to Eyaadh <https://github.com/eyaadh>
@@ -30,7 +65,8 @@ class ByteStreamer:
         self.clean_timer = 30 * 60
         self.client: Client = client
         self.cached_file_ids: Dict[int, FileId] = {}
-        asyncio.create_task(self.clean_cache())
+        self.hedge_sessions: Dict[int, Session] = {}
+        self.clean_task = asyncio.create_task(self.clean_cache())
 
     async def get_file_properties(self, id: int) -> FileId:
         """
@@ -48,7 +84,12 @@ class ByteStreamer:
         Generates the properties of a media file on a specific message.
         returns ths properties in a FIleId class.
         """
-        file_id = await get_file_ids(self.client, BIN_CHANNEL, id)
+        chat_id, message_id = resolve(id)
+        try:
+            file_id = await get_file_ids(self.client, chat_id, message_id)
+        except FileNotFound:
+            # Deleted messages (like retired replicas) are a 404, not a 500
+            raise FIleNotFound
         logging.debug(f"Generated file ID and Unique ID for message with ID {id}")
         if not file_id:
             logging.debug(f"Message with ID {id} not found")
@@ -57,6 +98,32 @@ class ByteStreamer:
         logging.debug(f"Cached media message with ID {id}")
         return self.cached_file_ids[id]
 
+    async def get_many_file_properties(self, ids: List[int]) -> Dict[int, FileId]:
+        """
+        Returns the properties of every message in `ids` that holds a media file.
+        The ones that aren't cached yet are fetched with one get_messages call per storage channel.
+        Messages that are missing or have no media are left out.
+        """
+        missing: Dict[int, List[int]] = {}
+        for id in dict.fromkeys(ids):
+            if id in self.cached_file_ids:
+                continue
+            try:
+                _, message_id = resolve(id)
+            except FIleNotFound:
+                continue
+            missing.setdefault(id >> SHARD_BITS, []).append(message_id)
+        for shard, message_ids in missing.items():
+            messages = await self.client.get_messages(BIN_CHANNELS[shard], message_ids)
+            for message in messages:
+                if not message:
+                    continue
+                try:
+                    self.cached_file_ids[link_id(shard, message.id)] = await get_message_file_ids(message)
+                except Exception:
+                    logging.debug(f"Message with ID {message.id} has no media")
+        return {id: self.cached_file_ids[id] for id in ids if id in self.cached_file_ids}
+
     async def generate_media_session(self, client: Client, file_id: FileId) -> Session:
         """
         Generates the media session for the DC that contains the media file.
@@ -66,51 +133,106 @@ class ByteStreamer:
         media_session = client.media_sessions.get(file_id.dc_id, None)
 
         if media_session is None:
-            if file_id.dc_id != await client.storage.dc_id():
-                media_session = Session(
-                    client,
-                    file_id.dc_id,
-                    await Auth(
-                        client, file_id.dc_id, await client.storage.test_mode()
-                    ).create(),
-                    await client.storage.test_mode(),
-                    is_media=True,
-                )
-                await media_session.start()
+            media_session = await self.create_media_session(client, file_id.dc_id)
+            client.media_sessions[file_id.dc_id] = media_session
+        else:
+            logging.debug(f"Using cached media session for DC {file_id.dc_id}")
+        return media_session
 
-                for _ in range(6):
-                    exported_auth = await client.invoke(
-                        raw.functions.auth.ExportAuthorization(dc_id=file_id.dc_id)
-                    )
+    async def generate_hedge_session(self, client: Client, file_id: FileId) -> Session:
+        """
+        Generates a second media session for the DC that contains the media file.
+        Hedged requests are sent through it so a stalled part on the primary
+        session doesn't hold up its duplicate.
+        """
+        media_session = self.hedge_sessions.get(file_id.dc_id, None)
 
-                    try:
-                        await media_session.send(
-                            raw.functions.auth.ImportAuthorization(
-                                id=exported_auth.id, bytes=exported_auth.bytes
-                            )
-                        )
-                        break
-                    except AuthBytesInvalid:
-                        logging.debug(
-                            f"Invalid authorization bytes for DC {file_id.dc_id}"
+        if media_session is None:
+            media_session = await self.create_media_session(client, file_id.dc_id)
+            self.hedge_sessions[file_id.dc_id] = media_session
+        return media_session
+
+    async def create_media_session(self, client: Client, dc_id: int) -> Session:
+        """
+        Starts a new media session for the given DC, importing the authorization
+        of the client when the DC is not its home DC.
+        """
+        if dc_id != await client.storage.dc_id():
+            media_session = await self.resume_media_session(client, dc_id)
+            if media_session is not None:
+                return media_session
+
+            auth_key = await Auth(
+                client, dc_id, await client.storage.test_mode()
+            ).create()
+            media_session = Session(
+                client,
+                dc_id,
+                auth_key,
+                await client.storage.test_mode(),
+                is_media=True,
+            )
+            await media_session.start()
+
+            for _ in range(6):
+                exported_auth = await client.invoke(
+                    raw.functions.auth.ExportAuthorization(dc_id=dc_id)
+                )
+
+                try:
+                    await media_session.send(
+                        raw.functions.auth.ImportAuthorization(
+                            id=exported_auth.id, bytes=exported_auth.bytes
                         )
-                        continue
-                else:
-                    await media_session.stop()
-                    raise AuthBytesInvalid
+                    )
+                    save_media_auth_key(client, dc_id, auth_key)
+                    break
+                except AuthBytesInvalid:
+                    logging.debug(
+                        f"Invalid authorization bytes for DC {dc_id}"
+                    )
+                    continue
             else:
-                media_session = Session(
-                    client,
-                    file_id.dc_id,
-                    await client.storage.auth_key(),
-                    await client.storage.test_mode(),
-                    is_media=True,
-                )
-                await media_session.start()
-            logging.debug(f"Created media session for DC {file_id.dc_id}")
-            client.media_sessions[file_id.dc_id] = media_session
+                await media_session.stop()
+                raise AuthBytesInvalid
         else:
-            logging.debug(f"Using cached media session for DC {file_id.dc_id}")
+            media_session = Session(
+                client,
+                dc_id,
+                await client.storage.auth_key(),
+                await client.storage.test_mode(),
+                is_media=True,
+            )
+            await media_session.start()
+        logging.debug(f"Created media session for DC {dc_id}")
+        return media_session
+
+    @staticmethod
+    async def resume_media_session(client: Client, dc_id: int) -> Optional[Session]:
+        """
+        Starts a media session for `dc_id` with the auth key saved by an earlier run,
+        skipping the key exchange and authorization import.
+        returns: None when there is no saved key or Telegram no longer accepts it.
+        """
+        auth_key = load_media_auth_key(client, dc_id)
+        if auth_key is None:
+            return None
+
+        media_session = Session(
+            client, dc_id, auth_key, await client.storage.test_mode(), is_media=True
+        )
+        try:
+            # A key Telegram dropped makes start() reconnect forever instead of failing
+            await asyncio.wait_for(media_session.start(), timeout=15)
+            await media_session.send(
+                raw.functions.users.GetUsers(id=[raw.types.InputUserSelf()])
+            )
+        except Exception as e:
+            logging.debug(f"Saved auth key for DC {dc_id} was rejected: {e}")
+            await media_session.stop()
+            save_media_auth_key(client, dc_id, None)
+            return None
+        logging.debug(f"Resumed media session for DC {dc_id}")
         return media_session
 
     @staticmethod
@@ -160,6 +282,139 @@ class ByteStreamer:
             )
         return location
 
+    async def fetch_part(
+        self,
+        media_session: Session,
+        file_id: FileId,
+        location,
+        offset: int,
+        chunk_size: int,
+    ) -> raw.types.upload.File:
+        """
+        Requests a single part of the file from the media session.
+        With HEDGE_REQUESTS enabled, a part that is slower than the rolling p95
+        of its DC is requested again through a second media session and whichever
+        answer arrives first is used. HEDGE_BUDGET caps how many parts may be hedged.
+        """
+        request = raw.functions.upload.GetFile(
+            location=location, offset=offset, limit=chunk_size
+        )
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        delay = dc_latency.hedge_delay(file_id.dc_id) if HEDGE_REQUESTS else None
+        hedge_budget.on_request()
+
+        if delay is None:
+            r = await media_session.send(request)
+            dc_latency.record(file_id.dc_id, loop.time() - started)
+            return r
+
+        primary = asyncio.ensure_future(media_session.send(request))
+        hedge = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if not done and hedge_budget.try_acquire():
+                logging.debug(f"Hedging part at offset {offset} on DC {file_id.dc_id}")
+                try:
+                    hedge_session = await self.generate_hedge_session(self.client, file_id)
+                    hedge = asyncio.ensure_future(hedge_session.send(request))
+                except Exception as e:
+                    logging.debug(f"Could not start hedge session for DC {file_id.dc_id}: {e}")
+
+            pending = {primary, hedge} if hedge else {primary}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            hedge_budget.hedge_wins += 1
+                        dc_latency.record(file_id.dc_id, loop.time() - started)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def read_part(
+        self,
+        media_session: Session,
+        file_id: FileId,
+        location,
+        offset: int,
+        chunk_size: int,
+        store: bool = False,
+    ) -> bytes:
+        """
+        Returns the bytes of one part, served from the shared part cache when it
+        was prefetched or is already being fetched by another stream.
+        """
+        async def fetch() -> bytes:
+            r = await self.fetch_part(media_session, file_id, location, offset, chunk_size)
+            return r.bytes if isinstance(r, raw.types.upload.File) else b""
+
+        key = (file_id.media_id, file_id.thumbnail_size, offset)
+        return await part_cache.get_or_fetch(key, fetch, store=store)
+
+    async def prefetch(self, file_id: FileId, offsets: List[int], chunk_size: int) -> None:
+        """
+        Fetches the parts at `offsets` into the shared part cache in the background,
+        so the request that needs them next finds them warm. Skipped while the
+        stream budget is under pressure.
+        """
+        offsets = [
+            offset for offset in offsets
+            if (file_id.media_id, file_id.thumbnail_size, offset) not in part_cache
+        ]
+        if not offsets or stream_governor.pressure >= 0.5:
+            return
+        async with prefetch_slots:
+            try:
+                media_session = await self.generate_media_session(self.client, file_id)
+                location = await self.get_location(file_id)
+                for offset in offsets:
+                    await stream_governor.acquire(chunk_size)
+                    try:
+                        await self.read_part(media_session, file_id, location, offset, chunk_size, store=True)
+                    finally:
+                        stream_governor.release(chunk_size)
+            except Exception as e:
+                logging.debug(f"Prefetch of {file_id.media_id} failed: {e}")
+
+    async def warm_up(self, file_id: FileId) -> None:
+        """
+        Prepares everything the first request of the file would otherwise wait for:
+        the media session of its DC and its first part (or the MP4 layout with FASTSTART).
+        """
+        await self.generate_media_session(self.client, file_id)
+        file_name = (file_id.file_name or "").lower()
+        if FASTSTART and (file_id.mime_type == "video/mp4" or file_name.endswith(".mp4")):
+            await self.get_mp4_layout(file_id)
+        else:
+            await self.prefetch(file_id, [0], CHUNK_SIZE)
+
+    async def fetch_reserved_part(
+        self,
+        media_session: Session,
+        file_id: FileId,
+        location,
+        offset: int,
+        chunk_size: int,
+    ) -> bytes:
+        """
+        Reserves room for one part in the global stream budget and reads it.
+        The reservation is released by the caller once the part is consumed,
+        or here if the request fails or is cancelled.
+        """
+        await stream_governor.acquire(chunk_size)
+        try:
+            return await self.read_part(media_session, file_id, location, offset, chunk_size)
+        except BaseException:
+            stream_governor.release(chunk_size)
+            raise
+
     async def yield_file(
         self,
         file_id: FileId,
@@ -169,29 +424,36 @@ class ByteStreamer:
         last_part_cut: int,
         part_count: int,
         chunk_size: int,
-    ) -> Union[str, None]:
+    ) -> AsyncGenerator[memoryview, None]:
         """
-        Custom generator that yields the bytes of the media file.
+        Custom generator that yields the bytes of the media file as memoryview slices.
+        Up to `stream_governor.read_ahead_depth()` parts are requested ahead of the consumer.
         Modded from <https://github.com/eyaadh/megadlbot_oss/blob/master/mega/telegram/utils/custom_download.py#L20>
         Thanks to Eyaadh <https://github.com/eyaadh>
         """
         client = self.client
         work_loads[index] += 1
         logging.debug(f"Starting to yielding file with client {index}.")
-        media_session = await self.generate_media_session(client, file_id)
-
+        pending: Deque[asyncio.Future] = deque()
         current_part = 1
-        location = await self.get_location(file_id)
 
         try:
-            r = await media_session.send(
-                raw.functions.upload.GetFile(
-                    location=location, offset=offset, limit=chunk_size
-                ),
-            )
-            if isinstance(r, raw.types.upload.File):
-                while True:
-                    chunk = r.bytes
+            media_session = await self.generate_media_session(client, file_id)
+            location = await self.get_location(file_id)
+            next_offset = offset
+
+            while current_part <= part_count:
+                depth = stream_governor.read_ahead_depth()
+                while len(pending) < depth and current_part + len(pending) <= part_count:
+                    pending.append(asyncio.ensure_future(
+                        self.fetch_reserved_part(media_session, file_id, location, next_offset, chunk_size)
+                    ))
+                    next_offset += chunk_size
+
+                r = await pending.popleft()
+                try:
+                    # Slicing a memoryview hands out the part without copying it
+                    chunk = memoryview(r)
                     if not chunk:
                         break
                     elif part_count == 1:
@@ -202,23 +464,73 @@ class ByteStreamer:
                         yield chunk[:last_part_cut]
                     else:
                         yield chunk
+                finally:
+                    stream_governor.release(chunk_size)
 
-                    current_part += 1
-                    offset += chunk_size
+                current_part += 1
+        except (TimeoutError, AttributeError) as e:
+            if isinstance(e, TRANSPORT_ERRORS):
+                client_pool.record_error(index, e)
+        except TRANSPORT_ERRORS as e:
+            client_pool.record_error(index, e)
+            raise
+        finally:
+            for task in pending:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None:
+                    stream_governor.release(chunk_size)
+            logging.debug(f"Finished yielding file with {current_part} parts.")
+            # The client may have been removed from the pool while we were streaming
+            if index in work_loads:
+                work_loads[index] -= 1
 
-                    if current_part > part_count:
-                        break
+    def iter_range(self, file_id: FileId, index: int, from_bytes: int, until_bytes: int) -> AsyncGenerator[memoryview, None]:
+        """
+        Yields the inclusive byte range of the media file.
+        """
+        offset, first_part_cut, last_part_cut, part_count = part_range(from_bytes, until_bytes)
+        return self.yield_file(
+            file_id, index, offset, first_part_cut, last_part_cut, part_count, CHUNK_SIZE
+        )
 
-                    r = await media_session.send(
-                        raw.functions.upload.GetFile(
-                            location=location, offset=offset, limit=chunk_size
-                        ),
-                    )
-        except (TimeoutError, AttributeError):
-            pass
-        finally:
-            logging.debug("Finished yielding file with {current_part} parts.")
-            work_loads[index] -= 1
+    async def get_mp4_layout(self, file_id: FileId) -> Optional[Mp4Layout]:
+        """
+        Returns the cached top-level layout of an MP4 file, parsing it on first use.
+        The parts read while parsing are kept in the part cache for the stream that follows.
+        """
+        media_session = await self.generate_media_session(self.client, file_id)
+        location = await self.get_location(file_id)
+
+        async def fetch_part(offset: int) -> bytes:
+            return await self.read_part(media_session, file_id, location, offset, CHUNK_SIZE, store=True)
+
+        reader = RangeReader(fetch_part, file_id.file_size, CHUNK_SIZE)
+        return await layout_cache.get(file_id.media_id, reader)
+
+    async def get_thumbnail(self, file_id: FileId) -> Optional[bytes]:
+        """
+        Returns the largest Telegram-provided thumbnail of the media file,
+        or None when the media has no thumbnail.
+        Thumbnails are cached in memory and on disk by their file_unique_id.
+        """
+        if not file_id.thumb_file_id:
+            return None
+
+        async def fetch() -> bytes:
+            thumb_id = FileId.decode(file_id.thumb_file_id)
+            media_session = await self.generate_media_session(self.client, thumb_id)
+            location = await self.get_location(thumb_id)
+            data = b""
+            # Thumbnails are a few KB, but keep reading in case one spans several parts
+            while True:
+                r = await self.fetch_part(media_session, thumb_id, location, len(data), CHUNK_SIZE)
+                chunk = r.bytes if isinstance(r, raw.types.upload.File) else b""
+                data += chunk
+                if len(chunk) < CHUNK_SIZE:
+                    return data
+
+        return await thumb_cache.get(file_id.thumb_unique_id, fetch) or None
 
     async def clean_cache(self) -> None:
         """
@@ -228,3 +540,21 @@ class ByteStreamer:
             await asyncio.sleep(self.clean_timer)
             self.cached_file_ids.clear()
             logging.debug("Cleaned the cache")
+
+    async def stop(self) -> None:
+        self.clean_task.cancel()
+        for session in self.hedge_sessions.values():
+            await session.stop()
+        self.hedge_sessions.clear()
+
+
+# One ByteStreamer per client, shared by the web routes and the bot plugins
+class_cache: Dict[Client, ByteStreamer] = {}
+
+
+def get_byte_streamer(client: Client) -> ByteStreamer:
+    """Returns the ByteStreamer of the client, creating it on first use."""
+    tg_connect = class_cache.get(client)
+    if tg_connect is None:
+        tg_connect = class_cache[client] = ByteStreamer(client)
+    return tg_connect
@@ -56,6 +56,10 @@ async def get_file_ids(client: Client, chat_id: int, id: int) -> Optional[FileId
         logging.error(f"Error getting message: {e}")
         raise FileNotFound("Message could not be fetched from Telegram")
 
+    return await get_message_file_ids(message)
+
+# ✅ File Info of an Already Fetched Message
+async def get_message_file_ids(message: Message) -> FileId:
     if not message or message.empty:
         raise FileNotFound("Message is empty or invalid")
 
@@ -74,6 +78,14 @@ async def get_file_ids(client: Client, chat_id: int, id: int) -> Optional[FileId
     setattr(file_id, "mime_type", getattr(media, "mime_type", "application/octet-stream"))
     setattr(file_id, "file_name", getattr(media, "file_name", "Unnamed"))
     setattr(file_id, "unique_id", file_unique_id or "XXXXXX")
+    setattr(file_id, "duration", getattr(media, "duration", 0) or 0)
+
+    # ✅ Largest Telegram-provided thumbnail, used for posters and previews
+    thumbs = getattr(media, "thumbs", None) or []
+    thumb = thumbs[-1] if thumbs else None
+    setattr(file_id, "thumb_file_id", getattr(thumb, "file_id", None))
+    setattr(file_id, "thumb_unique_id", getattr(thumb, "file_unique_id", None))
+    setattr(file_id, "thumb_size", getattr(thumb, "file_size", 0))
 
     return file_id
 
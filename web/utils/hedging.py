@@ -0,0 +1,82 @@
+import math
+from collections import deque
+from typing import Deque, Dict, Optional
+from info import HEDGE_BUDGET, HEDGE_MIN_DELAY
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+
+class DcLatencyTracker:
+    def __init__(self, window: int = 256, min_samples: int = 20):
+        """
+        Keeps a rolling window of GetFile part latencies for every DC.
+
+        :param window: Number of recent samples kept per DC.
+        :param min_samples: Samples required before a p95 is reported.
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.samples: Dict[int, Deque[float]] = {}
+
+    def record(self, dc_id: int, seconds: float) -> None:
+        samples = self.samples.get(dc_id)
+        if samples is None:
+            samples = self.samples[dc_id] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def p95(self, dc_id: int) -> Optional[float]:
+        """
+        Returns the 95th percentile latency of the DC in seconds,
+        or None while there are not enough samples to trust it.
+        """
+        samples = self.samples.get(dc_id)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, math.ceil(len(ordered) * 0.95) - 1)]
+
+    def hedge_delay(self, dc_id: int) -> Optional[float]:
+        p95 = self.p95(dc_id)
+        if p95 is None:
+            return None
+        return max(p95, HEDGE_MIN_DELAY)
+
+
+class HedgeBudget:
+    def __init__(self, ratio: float, burst: float = 10.0):
+        """
+        Token bucket that caps the extra upstream load caused by hedging.
+        Every primary part request earns `ratio` tokens and every hedge costs one,
+        so hedges never exceed `ratio` of the requests plus a small burst.
+        """
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+        self.primary = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def on_request(self) -> None:
+        self.primary += 1
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        self.hedged += 1
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.primary,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+# ✅ Process-wide instances shared by every ByteStreamer
+dc_latency = DcLatencyTracker()
+hedge_budget = HedgeBudget(HEDGE_BUDGET)
@@ -0,0 +1,60 @@
+import math
+from typing import List, NamedTuple
+from .mp4 import Mp4Layout
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+
+class HlsSegment(NamedTuple):
+    duration: float
+    start: int
+    length: int
+
+
+def build_segments(layout: Mp4Layout, target_duration: float) -> List[HlsSegment]:
+    """
+    Groups the moof+mdat fragments of a fragmented MP4 into segments that last at least
+    `target_duration` seconds and start on a random access point.
+    HLS fMP4 segments have to be fragments, so progressive MP4s, fragmented ones
+    without a sidx index and moov-at-end files get an empty list.
+    """
+    fragments = layout.fragments
+    if not fragments or layout.segments is not None or not layout.fragmented:
+        return []
+    if not fragments[0].sap or fragments[-1].start + fragments[-1].size > layout.file_size:
+        return []
+
+    segments = []
+    start, length, duration = fragments[0].start, 0, 0.0
+    for fragment in fragments:
+        if length and fragment.sap and duration >= target_duration:
+            segments.append(HlsSegment(duration, start, length))
+            start, length, duration = fragment.start, 0, 0.0
+        length += fragment.size
+        duration += fragment.duration
+    segments.append(HlsSegment(max(duration, 0.001), start, length))
+    return segments
+
+
+def render_playlist(layout: Mp4Layout, segments: List[HlsSegment], stream_url: str) -> str:
+    """
+    Renders a VOD media playlist whose segments are EXT-X-BYTERANGEs of `stream_url`.
+    The init section (ftyp and moov) comes from the same URL.
+    """
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:7",
+        f"#EXT-X-TARGETDURATION:{math.ceil(max(segment.duration for segment in segments))}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+        "#EXT-X-PLAYLIST-TYPE:VOD",
+        "#EXT-X-INDEPENDENT-SEGMENTS",
+        f'#EXT-X-MAP:URI="{stream_url}",BYTERANGE="{layout.moov_start + len(layout.moov)}@0"',
+    ]
+    for segment in segments:
+        lines.append(f"#EXTINF:{segment.duration:.3f},")
+        lines.append(f"#EXT-X-BYTERANGE:{segment.length}@{segment.start}")
+        lines.append(stream_url)
+    lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
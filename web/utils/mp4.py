@@ -0,0 +1,351 @@
+import asyncio
+import logging
+import struct
+from collections import OrderedDict
+from typing import AsyncGenerator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+MAX_MOOV_SIZE = 32 * 1024 * 1024
+LAYOUT_CACHE_SIZE = 64 * 1024 * 1024
+CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+
+class Box(NamedTuple):
+    kind: bytes
+    start: int
+    size: int
+    header: int
+
+    @property
+    def end(self) -> int:
+        return self.start + self.size
+
+    @property
+    def payload(self) -> int:
+        return self.start + self.header
+
+
+class Segment(NamedTuple):
+    start: int  # offset in the served file
+    length: int
+    source: int  # offset in the original file, -1 for in-memory data
+    data: Optional[bytes]
+
+
+class RangeReader:
+    def __init__(self, fetch_part: Callable[[int], Awaitable[bytes]], file_size: int, chunk_size: int):
+        """
+        Random-access reader over a Telegram file that fetches whole parts
+        and remembers them while a file is being parsed.
+        """
+        self.fetch_part = fetch_part
+        self.file_size = file_size
+        self.chunk_size = chunk_size
+        self.parts: Dict[int, bytes] = {}
+
+    async def read(self, start: int, length: int) -> bytes:
+        end = min(start + length, self.file_size)
+        out = bytearray()
+        offset = start - start % self.chunk_size
+        while offset < end:
+            part = self.parts.get(offset)
+            if part is None:
+                part = self.parts[offset] = await self.fetch_part(offset)
+            if not part:
+                break
+            out += part[max(start, offset) - offset:min(end, offset + len(part)) - offset]
+            offset += self.chunk_size
+        return bytes(out)
+
+
+def parse_box_header(data: bytes, pos: int, limit: int) -> Optional[Box]:
+    if pos + 8 > len(data):
+        return None
+    size, kind = struct.unpack_from(">I4s", data, pos)
+    header = 8
+    if size == 1:
+        if pos + 16 > len(data):
+            return None
+        size = struct.unpack_from(">Q", data, pos + 8)[0]
+        header = 16
+    elif size == 0:
+        size = limit - pos
+    if size < header:
+        return None
+    return Box(kind, pos, size, header)
+
+
+def iter_boxes(data: Union[bytes, bytearray], start: int, end: int) -> List[Box]:
+    """
+    Lists the boxes found in data[start:end] of an in-memory buffer.
+    """
+    boxes = []
+    pos = start
+    while pos + 8 <= end:
+        box = parse_box_header(data, pos, end)
+        if box is None or box.end > end:
+            break
+        boxes.append(box)
+        pos = box.end
+    return boxes
+
+
+async def read_top_level_boxes(reader: RangeReader, limit: int = 64) -> List[Box]:
+    """
+    Walks the top-level box headers until both moov and mdat are found,
+    so fragmented files with thousands of boxes are not read end to end.
+    """
+    boxes = []
+    seen = set()
+    pos = 0
+    while pos + 8 <= reader.file_size and len(boxes) < limit:
+        header = await reader.read(pos, 16)
+        box = parse_box_header(header, 0, reader.file_size - pos)
+        if box is None:
+            break
+        boxes.append(Box(box.kind, pos, box.size, box.header))
+        seen.add(box.kind)
+        if {b"moov", b"mdat"} <= seen:
+            break
+        pos += box.size
+    return boxes
+
+
+def find_boxes(moov: Union[bytes, bytearray], kinds: set, start: int = 0, end: Optional[int] = None) -> List[Box]:
+    """
+    Recursively collects the boxes of the given kinds inside moov's container boxes.
+    """
+    end = len(moov) if end is None else end
+    found = []
+    for box in iter_boxes(moov, start, end):
+        if box.kind in kinds:
+            found.append(box)
+        if box.kind in CONTAINER_BOXES:
+            found.extend(find_boxes(moov, kinds, box.payload, box.end))
+    return found
+
+
+def shift_chunk_offsets(moov: bytearray, delta: int, threshold: int) -> bool:
+    """
+    Adds `delta` to every stco/co64 chunk offset at or after `threshold`.
+    Returns False if a 32-bit stco table would overflow.
+    """
+    root = iter_boxes(moov, 0, len(moov))
+    if not root or root[0].kind != b"moov":
+        return False
+    for box in find_boxes(moov, {b"stco", b"co64"}, root[0].payload, root[0].end):
+        count = struct.unpack_from(">I", moov, box.payload + 4)[0]
+        table = box.payload + 8
+        if box.kind == b"stco":
+            width, fmt, limit = 4, ">I", 0xFFFFFFFF
+        else:
+            width, fmt, limit = 8, ">Q", 0xFFFFFFFFFFFFFFFF
+        if table + count * width > box.end:
+            return False
+        for i in range(count):
+            pos = table + i * width
+            value = struct.unpack_from(fmt, moov, pos)[0]
+            if value >= threshold:
+                value += delta
+                if value > limit:
+                    return False
+                struct.pack_into(fmt, moov, pos, value)
+    return True
+
+
+class Fragment(NamedTuple):
+    start: int  # offset of the moof
+    size: int  # moof and mdat together
+    duration: float  # seconds
+    sap: bool  # starts with a random access point
+
+
+def parse_sidx(data: bytes, start: int) -> Optional[List[Fragment]]:
+    """
+    Lists the fragments a sidx box located at `start` of the file points to.
+    Returns None for hierarchical indexes, whose references point to more sidx boxes.
+    """
+    box = parse_box_header(data, 0, len(data))
+    if box is None or box.kind != b"sidx" or box.size > len(data):
+        return None
+    version = data[box.payload]
+    timescale = struct.unpack_from(">I", data, box.payload + 8)[0]
+    if version == 0:
+        first_offset = struct.unpack_from(">I", data, box.payload + 16)[0]
+        pos = box.payload + 20
+    else:
+        first_offset = struct.unpack_from(">Q", data, box.payload + 20)[0]
+        pos = box.payload + 28
+    count = struct.unpack_from(">H", data, pos + 2)[0]
+    pos += 4
+    if not timescale or pos + count * 12 > box.end:
+        return None
+
+    fragments = []
+    offset = start + box.size + first_offset
+    for i in range(count):
+        reference, duration, sap = struct.unpack_from(">III", data, pos + i * 12)
+        if reference >> 31:
+            return None
+        size = reference & 0x7FFFFFFF
+        fragments.append(Fragment(offset, size, duration / timescale, bool(sap >> 31)))
+        offset += size
+    return fragments
+
+
+class Mp4Layout:
+    def __init__(
+        self,
+        file_size: int,
+        moov: bytes,
+        moov_start: int,
+        mdat: Box,
+        segments: Optional[List[Segment]],
+        fragments: Optional[List[Fragment]] = None,
+    ):
+        """
+        The parsed top level of an MP4 file as it is served.
+
+        attributes:
+            moov: the moov box with chunk offsets that match the served file.
+            moov_start: offset of moov in the served file.
+            mdat: the first mdat box, at its position in the served file.
+            segments: the faststart mapping onto the original file, or None
+                when the file is served unchanged.
+            fragments: the moof+mdat fragments listed by the sidx of a fragmented
+                file, None for progressive files and fragmented ones without sidx.
+        """
+        self.file_size = file_size
+        self.moov = moov
+        self.moov_start = moov_start
+        self.mdat = mdat
+        self.segments = segments
+        self.fragments = fragments
+
+    @property
+    def mdat_start(self) -> int:
+        return self.mdat.start
+
+    @property
+    def fragmented(self) -> bool:
+        """True for fragmented MP4s: their moov has an mvex and the samples live in moof fragments."""
+        return bool(find_boxes(self.moov, {b"mvex"}))
+
+    @property
+    def size(self) -> int:
+        # Roughly what a fragment entry takes in memory
+        return len(self.moov) + 100 * len(self.fragments or ())
+
+    async def iter_range(
+        self,
+        start: int,
+        end: int,
+        read_original: Callable[[int, int], AsyncGenerator[Union[bytes, memoryview], None]],
+    ) -> AsyncGenerator[Union[bytes, memoryview], None]:
+        """
+        Yields bytes start..end (inclusive) of the faststart file, reading the
+        parts that are not held in memory through `read_original(start, end)`.
+        """
+        for segment in self.segments:
+            segment_end = segment.start + segment.length - 1
+            if segment_end < start or segment.start > end:
+                continue
+            lo = max(start, segment.start) - segment.start
+            hi = min(end, segment_end) - segment.start
+            if segment.data is not None:
+                yield memoryview(segment.data)[lo:hi + 1]
+            else:
+                stream = read_original(segment.source + lo, segment.source + hi)
+                try:
+                    async for chunk in stream:
+                        yield chunk
+                finally:
+                    await stream.aclose()
+
+
+async def parse_layout(reader: RangeReader) -> Optional[Mp4Layout]:
+    """
+    Reads the top-level boxes and the moov box of an MP4 file. When moov sits
+    after mdat, its chunk offsets are rewritten for a moov-first layout and
+    the segments mapping that layout onto the original bytes are returned.
+    """
+    boxes = await read_top_level_boxes(reader)
+    if not boxes or boxes[0].kind != b"ftyp":
+        return None
+    moov = next((box for box in boxes if box.kind == b"moov"), None)
+    mdat = next((box for box in boxes if box.kind == b"mdat"), None)
+    if moov is None or mdat is None or moov.size > MAX_MOOV_SIZE:
+        return None
+
+    data = bytearray(await reader.read(moov.start, moov.size))
+    if len(data) != moov.size:
+        return None
+    if moov.start < mdat.start:
+        fragments = None
+        sidx = next((box for box in boxes if box.kind == b"sidx"), None)
+        if sidx is not None and sidx.size <= MAX_MOOV_SIZE:
+            fragments = parse_sidx(await reader.read(sidx.start, sidx.size), sidx.start)
+        return Mp4Layout(reader.file_size, bytes(data), moov.start, mdat, None, fragments)
+
+    if not shift_chunk_offsets(data, moov.size, mdat.start):
+        return None
+    data = bytes(data)
+    segments = [
+        Segment(0, mdat.start, 0, None),
+        Segment(mdat.start, moov.size, -1, data),
+        Segment(mdat.start + moov.size, moov.start - mdat.start, mdat.start, None),
+    ]
+    if moov.end < reader.file_size:
+        segments.append(Segment(moov.end, reader.file_size - moov.end, moov.end, None))
+    served_mdat = Box(mdat.kind, mdat.start + moov.size, mdat.size, mdat.header)
+    return Mp4Layout(reader.file_size, data, mdat.start, served_mdat, segments)
+
+
+class LayoutCache:
+    def __init__(self, capacity: int):
+        """
+        Keeps parsed MP4 layouts per media id, including the files that turned out
+        not to need (or support) faststart, so every file is parsed once.
+        """
+        self.capacity = capacity
+        self.size = 0
+        self.layouts: "OrderedDict[int, Optional[Mp4Layout]]" = OrderedDict()
+        self.loading: Dict[int, asyncio.Future] = {}
+
+    def put(self, media_id: int, layout: Optional[Mp4Layout]) -> None:
+        self.layouts[media_id] = layout
+        self.size += layout.size if layout else 0
+        while self.size > self.capacity and len(self.layouts) > 1:
+            _, evicted = self.layouts.popitem(last=False)
+            self.size -= evicted.size if evicted else 0
+
+    async def get(self, media_id: int, reader: RangeReader) -> Optional[Mp4Layout]:
+        if media_id in self.layouts:
+            self.layouts.move_to_end(media_id)
+            return self.layouts[media_id]
+        if media_id in self.loading:
+            return await asyncio.shield(self.loading[media_id])
+
+        future = asyncio.get_running_loop().create_future()
+        self.loading[media_id] = future
+        try:
+            layout = await parse_layout(reader)
+        except Exception as e:
+            # Transient errors are not cached, the next request tries again
+            logging.debug(f"Could not parse MP4 layout of {media_id}: {e}")
+            future.set_result(None)
+            return None
+        except BaseException:
+            future.set_result(None)
+            raise
+        finally:
+            del self.loading[media_id]
+        self.put(media_id, layout)
+        future.set_result(layout)
+        return layout
+
+
+layout_cache = LayoutCache(LAYOUT_CACHE_SIZE)
@@ -0,0 +1,129 @@
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from info import PART_CACHE_SIZE, PART_CACHE_POLICY
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+PartKey = Tuple[int, str, int]  # (media_id, thumbnail_size, offset)
+
+POLICIES = ("lru", "fifo", "lfu")
+
+
+class PartFetchError(Exception):
+    message = "Part fetch failed"
+
+
+class PartCache:
+    def __init__(self, capacity: int, policy: str = "lru"):
+        """
+        Cache of file parts shared by every client, keyed by (media_id, thumbnail_size, offset).
+        Requests for a part that is already being fetched wait for that fetch
+        instead of sending a duplicate GetFile.
+
+        :param capacity: Maximum number of bytes kept in the cache.
+        :param policy: Part evicted first: "lru" the least recently used, "fifo" the oldest,
+            "lfu" the least often used (oldest among equals).
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown part cache policy {policy!r}, use one of {', '.join(POLICIES)}")
+        self.capacity = capacity
+        self.policy = policy
+        self.size = 0
+        self.parts: "OrderedDict[PartKey, bytes]" = OrderedDict()
+        self.uses: Dict[PartKey, int] = {}
+        self.inflight: Dict[PartKey, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key: PartKey) -> bool:
+        return key in self.parts or key in self.inflight
+
+    def get(self, key: PartKey) -> Optional[bytes]:
+        data = self.parts.get(key)
+        if data is not None:
+            if self.policy == "lru":
+                self.parts.move_to_end(key)
+            elif self.policy == "lfu":
+                self.uses[key] += 1
+        return data
+
+    def evict(self) -> None:
+        if self.policy == "lfu":
+            key = min(self.parts, key=self.uses.__getitem__)
+            evicted = self.parts.pop(key)
+        else:
+            key, evicted = self.parts.popitem(last=False)
+        self.uses.pop(key, None)
+        self.size -= len(evicted)
+
+    def put(self, key: PartKey, data: bytes) -> None:
+        if not data or len(data) > self.capacity:
+            return
+        old = self.parts.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        # Make room first, so LFU never evicts the part it is storing
+        while self.size + len(data) > self.capacity:
+            self.evict()
+        self.parts[key] = data
+        self.uses.setdefault(key, 0)
+        self.size += len(data)
+
+    async def get_or_fetch(
+        self,
+        key: PartKey,
+        fetch: Callable[[], Awaitable[bytes]],
+        store: bool = False,
+    ) -> bytes:
+        """
+        Returns the part from the cache, from a fetch already in flight, or by
+        calling `fetch`. Only parts fetched with `store=True` are kept, so
+        sequential streams don't flush the parts that were prefetched for others.
+        """
+        data = self.get(key)
+        if data is not None:
+            self.hits += 1
+            return data
+
+        waiter = self.inflight.get(key)
+        if waiter is not None:
+            try:
+                data = await asyncio.shield(waiter)
+                self.hits += 1
+                return data
+            except PartFetchError:
+                pass  # the other fetch failed, try again ourselves
+
+        self.misses += 1
+        waiter = asyncio.get_running_loop().create_future()
+        waiter.add_done_callback(lambda f: f.exception())
+        self.inflight[key] = waiter
+        try:
+            data = await fetch()
+        except BaseException:
+            waiter.set_exception(PartFetchError())
+            raise
+        else:
+            waiter.set_result(data)
+            if store:
+                self.put(key, data)
+            return data
+        finally:
+            if self.inflight.get(key) is waiter:
+                del self.inflight[key]
+
+    def stats(self) -> Dict:
+        return {
+            "policy": self.policy,
+            "size": self.size,
+            "parts": len(self.parts),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# ✅ Process-wide instance shared by every ByteStreamer
+part_cache = PartCache(PART_CACHE_SIZE * 1024 * 1024, PART_CACHE_POLICY)
@@ -0,0 +1,140 @@
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+from pyrogram.file_id import FileId
+from info import POPULARITY_FLUSH, POPULARITY_RETENTION
+from database.users_db import db
+from .access_log import viewer_hash
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+SORT_KEYS = ("views", "requests", "bytes", "ips")
+
+Bucket = Tuple[int, int]  # (message id, start of the hour)
+
+
+class Popularity:
+    def __init__(self, interval: float = 60, retention: int = 30):
+        """
+        Counts the requests, views (requests from byte 0) and bytes of every file per hour
+        in memory and adds them to MongoDB every `interval` seconds with one bulk_write
+        of `$inc`, so no request waits on the database.
+        Viewers are kept per hour as hashed IPs with `$addToSet`, so the unique IPs of a
+        window are counted once across hours, stream workers and nodes.
+
+        :param retention: Days the hourly counters are kept in MongoDB.
+        """
+        self.interval = interval
+        self.retention = retention
+        self.pending: Dict[Bucket, List[int]] = {}
+        self.viewers: Dict[Bucket, Set[str]] = {}
+        self.files: Dict[int, Tuple[str, str]] = {}
+        self.seen: Dict[Bucket, Set[str]] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+        self.indexed = False
+        self.flushes = 0
+
+    def record(self, id: int, file_id: FileId, ip: Optional[str], from_bytes: int, sent: int) -> None:
+        if not self.interval:
+            return
+        now = int(time.time())
+        bucket = (id, now - now % 3600)
+        counts = self.pending.setdefault(bucket, [0, 0, 0])
+        counts[0] += from_bytes == 0
+        counts[1] += 1
+        counts[2] += sent
+        seen = self.seen.setdefault(bucket, set())
+        if ip not in seen:
+            seen.add(ip)
+            self.viewers.setdefault(bucket, set()).add(viewer_hash(ip))
+        self.files[id] = (file_id.file_name or "", file_id.unique_id[:6])
+        if self.task is None:
+            self.task = asyncio.create_task(self.flush_later())
+
+    async def flush_later(self) -> None:
+        await asyncio.sleep(self.interval)
+        self.task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Adds the counts gathered since the last flush to MongoDB, keeping them for the next one on failure."""
+        async with self.lock:
+            pending, self.pending = self.pending, {}
+            viewers, self.viewers = self.viewers, {}
+            files, self.files = self.files, {}
+            # Only the current hour still needs its IPs
+            hour = int(time.time()) // 3600 * 3600
+            self.seen = {bucket: ips for bucket, ips in self.seen.items() if bucket[1] >= hour}
+            if not pending:
+                return
+
+            operations = []
+            for (id, start), (views, requests, sent) in pending.items():
+                name, secure_hash = files.get(id, ("", ""))
+                operations.append(UpdateOne(
+                    {"_id": f"{id}:{start}"},
+                    {
+                        "$inc": {"views": views, "requests": requests, "bytes": sent},
+                        "$addToSet": {"viewers": {"$each": sorted(viewers.get((id, start), ()))}},
+                        "$set": {"name": name, "hash": secure_hash},
+                        "$setOnInsert": {"file_id": id, "hour": datetime.utcfromtimestamp(start)},
+                    },
+                    upsert=True,
+                ))
+            if not self.indexed:
+                # Best effort: without the TTL index old counters stay, but they still count
+                self.indexed = True
+                try:
+                    await db.expire_file_stats(self.retention * 86400)
+                except OperationFailure as e:
+                    logging.warning(f"Could not set the retention of the popularity counters: {e}")
+                except Exception:
+                    self.indexed = False  # Database unreachable, the write below fails too
+            try:
+                await db.inc_file_stats(operations)
+                self.flushes += 1
+            except Exception as e:
+                logging.warning(f"Could not save the popularity of {len(pending)} files, retrying later: {e}")
+                for bucket, counts in pending.items():
+                    merged = self.pending.setdefault(bucket, [0, 0, 0])
+                    for i, count in enumerate(counts):
+                        merged[i] += count
+                for bucket, hashes in viewers.items():
+                    self.viewers.setdefault(bucket, set()).update(hashes)
+                for id, meta in files.items():
+                    self.files.setdefault(id, meta)
+                if self.task is None:
+                    self.task = asyncio.create_task(self.flush_later())
+
+    async def top(self, hours: int, limit: int = 10, sort: str = "views") -> List[Dict]:
+        """
+        The hottest files of the last `hours` hours, counted in whole hours and
+        without what this process gathered since its last flush.
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Sort by one of {', '.join(SORT_KEYS)}")
+        now = int(time.time())
+        since = datetime.utcfromtimestamp(now - now % 3600 - (hours - 1) * 3600)
+        files = await db.top_files(since, limit, sort)
+        return [
+            {
+                "id": file["_id"],
+                "name": file["name"],
+                "hash": file["hash"],
+                "views": file["views"],
+                "requests": file["requests"],
+                "bytes": file["bytes"],
+                "ips": file["ips"],
+            }
+            for file in files
+        ]
+
+
+popularity = Popularity(POPULARITY_FLUSH, POPULARITY_RETENTION)
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import List, Optional, Set, Tuple
+from pyrogram.file_id import FileId
+from info import READ_AHEAD_PARTS
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+Range = Tuple[int, int]
+
+
+class AccessTracker:
+    def __init__(self, max_entries: int = 4096, ttl: int = 10 * 60):
+        """
+        Remembers the last Range each (client IP, file) pair requested, and where
+        its response stopped once it's done.
+
+        :param max_entries: Number of (IP, file) pairs kept, oldest are forgotten first.
+        :param ttl: Seconds after which a pair counts as a fresh open again.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[Tuple[str, int], List]" = OrderedDict()
+
+    def record(self, ip: str, media_id: int, start: int, end: int) -> Optional[Range]:
+        """
+        Stores the range and returns the previous one of the pair, its end being where
+        the response stopped if it's done, or None when this is the first request in `ttl` seconds.
+        """
+        key = (ip, media_id)
+        now = time.monotonic()
+        previous = self.entries.pop(key, None)
+        self.entries[key] = [start, end, now]
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        if previous is None or now - previous[2] > self.ttl:
+            return None
+        return previous[0], previous[1]
+
+    def stopped(self, ip: str, media_id: int, start: int, sent: int) -> None:
+        """Records that the response to the range starting at `start` ended after `sent` bytes."""
+        entry = self.entries.get((ip, media_id))
+        if entry is not None and entry[0] == start:
+            entry[1] = start + sent - 1
+
+
+def plan_read_ahead(
+    previous: Optional[Range],
+    file_size: int,
+    start: int,
+    end: int,
+    chunk_size: int,
+    is_video: bool,
+) -> List[int]:
+    """
+    Returns the part offsets worth prefetching for this request.
+
+    - First open of a video from its start: the last part, where MP4 `moov` and MKV cues
+      usually live. Players ask for it right after, whatever the end of the first range.
+    - A range that continues around where the previous response stopped: the READ_AHEAD_PARTS
+      parts after its first one, fetched alongside the stream instead of one after the other.
+    """
+    offsets = []
+    last_offset = (file_size - 1) - (file_size - 1) % chunk_size
+    if previous is None:
+        if is_video and start < chunk_size and file_size > 2 * chunk_size:
+            offsets.append(last_offset)
+    elif abs(start - (previous[1] + 1)) <= chunk_size:
+        first = start - start % chunk_size + chunk_size
+        offsets.extend(
+            offset for offset in range(first, first + READ_AHEAD_PARTS * chunk_size, chunk_size)
+            if offset <= end
+        )
+    return offsets
+
+
+access_tracker = AccessTracker()
+_background: Set[asyncio.Task] = set()
+
+
+def schedule_read_ahead(tg_connect, file_id: FileId, ip: str, start: int, end: int, chunk_size: int) -> None:
+    """
+    Records the request and starts a background prefetch of the parts the
+    player is likely to ask for next.
+    """
+    previous = access_tracker.record(ip or "", file_id.media_id, start, end)
+    is_video = (file_id.mime_type or "").startswith("video/")
+    offsets = plan_read_ahead(previous, file_id.file_size, start, end, chunk_size, is_video)
+    if not offsets:
+        return
+    task = asyncio.create_task(tg_connect.prefetch(file_id, offsets, chunk_size))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
@@ -10,16 +10,48 @@ from web.server import Webavbot
 from utils import get_size
 from web.utils.file_properties import get_file_ids
 from web.server.exceptions import InvalidHash
+from web.utils.storage import resolve
+from web.utils.batch import BatchMember
+from typing import List
 
 # Dont Remove My Credit @AV_BOTz_UPDATE 
 # This Repo Is By @BOT_OWNER26 
 # For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
 
+def get_stream_url(id: int, secure_hash: str) -> str:
+    """Returns the public stream URL of a BIN_CHANNEL message."""
+    url_base = URL if URL.endswith("/") else URL + "/"
+    return urllib.parse.urljoin(url_base, f"{id}?hash={secure_hash}")
+
+def get_watch_url(id: int, secure_hash: str, file_name: str) -> str:
+    """Returns the public player page URL of a BIN_CHANNEL message."""
+    url_base = URL if URL.endswith("/") else URL + "/"
+    return urllib.parse.urljoin(url_base, f"watch/{id}/{urllib.parse.quote(file_name)}?hash={secure_hash}")
+
+def get_download_url(id: int, secure_hash: str, file_name: str) -> str:
+    """Returns the public download URL (attachment disposition) of a BIN_CHANNEL message."""
+    url_base = URL if URL.endswith("/") else URL + "/"
+    return urllib.parse.urljoin(url_base, f"file/{id}/{urllib.parse.quote(file_name)}?hash={secure_hash}&download=1")
+
+def get_thumb_url(id: int, secure_hash: str) -> str:
+    """Returns the public thumbnail URL of a BIN_CHANNEL message."""
+    url_base = URL if URL.endswith("/") else URL + "/"
+    return urllib.parse.urljoin(url_base, f"thumb/{id}?hash={secure_hash}")
+
+def get_batch_url(batch_id: str, path: str = "", token: str = "") -> str:
+    """Returns the URL of a batch opened with `token`, `path` is appended (e.g. ".zip" or "/0/name.mkv")."""
+    url_base = URL if URL.endswith("/") else URL + "/"
+    return urllib.parse.urljoin(url_base, f"batch/{batch_id}{path}?token={token}")
+
+def get_batch_file_url(batch_id: str, index: int, name: str, token: str = "") -> str:
+    return get_batch_url(batch_id, f"/{index}/{urllib.parse.quote(name)}", token)
+
 async def render_page(id: str, secure_hash: str, request: aiohttp.web.Request = None, src: str = None, is_embed: bool = False) -> str:
     # Step 1: Fetch Telegram file and metadata
     try:
-        file = await Webavbot.get_messages(int(BIN_CHANNEL), int(id))
-        file_data = await get_file_ids(Webavbot, int(BIN_CHANNEL), int(id))
+        chat_id, message_id = resolve(int(id))
+        file = await Webavbot.get_messages(chat_id, message_id)
+        file_data = await get_file_ids(Webavbot, chat_id, message_id)
     except Exception as e:
         logging.error(f"Error fetching file info: {e}")
         raise
@@ -31,12 +63,8 @@ async def render_page(id: str, secure_hash: str, request: aiohttp.web.Request =
         raise InvalidHash
 
     # Step 3: Construct file URL
-    if not URL.endswith("/"):
-        url_base = URL + "/"
-    else:
-        url_base = URL
-
-    src = urllib.parse.urljoin(url_base, f"{id}?hash={secure_hash}")
+    src = get_stream_url(id, secure_hash)
+    thumb_url = get_thumb_url(id, secure_hash) if file_data.thumb_unique_id else None
 
     # Step 4: Determine file tag and get size
     tag = file_data.mime_type.split("/")[0].strip()
@@ -78,6 +106,7 @@ async def render_page(id: str, secure_hash: str, request: aiohttp.web.Request =
     return template.render(
         file_name=file_name,
         file_url=src,
+        thumb_url=thumb_url,
         file_size=file_size,
         file_extension=file_data.file_name.split(".")[-1].lower() if file_data.file_name else "mkv",
         file_unique_id=file_data.unique_id,
@@ -88,6 +117,44 @@ async def render_page(id: str, secure_hash: str, request: aiohttp.web.Request =
         request=request,
         args=request.query if request else {},
                                     )
+
+async def render_batch_page(batch_id: str, members: List[BatchMember], token: str) -> str:
+    """
+    Renders the page listing the stream and download links of every file of a batch.
+    With BATCH_PROTECT_CONTENT it only offers streaming, like the protected messages in Telegram.
+    """
+    async with aiofiles.open(os.path.join("web", "template", "batch.html"), mode='r') as f:
+        template = jinja2.Template(await f.read())
+
+    return template.render(
+        file_count=len(members),
+        total_size=get_size(sum(member.size for member in members)),
+        files=[
+            {
+                "name": member.name,
+                "size": get_size(member.size),
+                "url": get_batch_file_url(batch_id, i, member.name, token),
+            }
+            for i, member in enumerate(members)
+        ],
+        batch_url=get_batch_url(batch_id, token=token),
+        playlist_url=get_batch_url(batch_id, ".m3u", token),
+        zip_url=get_batch_url(batch_id, ".zip", token),
+        protect_content=BATCH_PROTECT_CONTENT,
+        disclaimer=avbotz_template.DISCLAIMER,
+        report_link=avbotz_template.REPORT_LINK,
+    )
+
+def render_batch_playlist(batch_id: str, members: List[BatchMember], token: str) -> str:
+    """Renders an M3U playlist of every file of a batch for VLC / MX Player."""
+    lines = ["#EXTM3U"]
+    for i, member in enumerate(members):
+        # Line breaks in a title would end the #EXTINF entry early
+        title = " ".join(member.name.split())
+        lines.append(f"#EXTINF:-1,{title}")
+        lines.append(get_batch_file_url(batch_id, i, member.name, token))
+    return "\n".join(lines) + "\n"
+
 # Dont Remove My Credit @AV_BOTz_UPDATE 
 # This Repo Is By @BOT_OWNER26 
 # For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
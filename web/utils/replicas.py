@@ -0,0 +1,158 @@
+import time
+import zlib
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Set
+from pyrogram.errors import FloodWait
+from info import BIN_CHANNELS, REPLICA_RATE, REPLICA_COUNT, REPLICA_GRACE
+from database.users_db import db
+from web.server import Webavbot
+from .storage import SHARD_BITS, link_id, resolve, storage
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+WINDOW = 60
+COOLDOWN = 10 * 60  # A file that stayed below half the rate this long loses its copies
+CHECK_INTERVAL = 60
+
+
+class ReplicaManager:
+    def __init__(self, rate: float, copies: int = 2, grace: int = 3 * 3600):
+        """
+        Copies files that get more than `rate` stream requests a minute into `copies` more
+        storage channel messages and spreads their viewers over the original and the copies.
+        Every copy has its own link id, so the client ring sends each to another client and
+        media session instead of piling the whole file on one.
+        The copies are shared with the other processes through MongoDB. Once no process has
+        seen the file hot for COOLDOWN seconds they leave rotation, and their messages are
+        deleted after `grace` seconds, when the streams that were reading them are done.
+        """
+        self.rate = rate
+        self.copies = max(1, copies)
+        self.grace = grace
+        self.hits: Dict[int, Deque[float]] = {}
+        self.replicas: Dict[int, List[int]] = {}
+        self.pending: Set[int] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.created = 0
+        self.deleted = 0
+
+    def rate_of(self, id: int, now: float) -> float:
+        """Stream requests per minute of the file `id` over the last WINDOW seconds."""
+        hits = self.hits.get(id)
+        while hits and hits[0] < now - WINDOW:
+            hits.popleft()
+        return len(hits) * 60 / WINDOW if hits else 0.0
+
+    def record(self, id: int) -> None:
+        if not self.rate:
+            return
+        if self.task is None:
+            self.task = asyncio.create_task(self.monitor())
+        now = time.monotonic()
+        self.hits.setdefault(id, deque()).append(now)
+        if id in self.replicas or id in self.pending or self.rate_of(id, now) < self.rate:
+            return
+        self.pending.add(id)
+        asyncio.create_task(self.replicate(id))
+
+    def route(self, id: int, ip: Optional[str]) -> int:
+        """Returns the copy of the file `id` this viewer streams from, always the same one for the same IP."""
+        replicas = self.replicas.get(id)
+        if not replicas:
+            return id
+        copies = [id, *replicas]
+        return copies[zlib.crc32((ip or "").encode()) % len(copies)]
+
+    def forget(self, id: int, replica: int) -> None:
+        """Takes a copy that could not be read out of rotation in this process."""
+        replicas = self.replicas.get(id)
+        if replicas and replica in replicas:
+            replicas.remove(replica)
+
+    async def replicate(self, id: int) -> None:
+        try:
+            if not await db.claim_replicas(id):
+                return  # Another process copies it, the next check picks the copies up
+            chat_id, message_id = resolve(id)
+            shard = id >> SHARD_BITS
+            replicas = []
+            for step in range(1, self.copies + 1):
+                # Forwarding keeps the document on its DC, the copies spread clients and media sessions
+                target = (shard + step) % len(BIN_CHANNELS)
+                try:
+                    message = await Webavbot.forward_messages(BIN_CHANNELS[target], chat_id, message_id)
+                except FloodWait as e:
+                    storage.cool(target, e.value)
+                    continue
+                replicas.append(link_id(target, message.id))
+            await db.set_replicas(id, replicas)
+            if replicas:
+                self.replicas[id] = replicas
+                self.created += len(replicas)
+                logging.info(f"Hot file {id} copied to {replicas}")
+        except Exception as e:
+            logging.warning(f"Could not copy hot file {id}: {e}")
+        finally:
+            self.pending.discard(id)
+
+    async def delete(self, replicas: List[int]) -> None:
+        by_chat: Dict[int, List[int]] = {}
+        for replica in replicas:
+            chat_id, message_id = resolve(replica)
+            by_chat.setdefault(chat_id, []).append(message_id)
+        for chat_id, message_ids in by_chat.items():
+            await Webavbot.delete_messages(chat_id, message_ids)
+        self.deleted += len(replicas)
+
+    async def check(self) -> None:
+        """Syncs the copies with MongoDB, keeps hot files hot and retires or deletes the others."""
+        now = time.monotonic()
+        for id in list(self.hits):
+            if not self.rate_of(id, now):
+                del self.hits[id]
+
+        utcnow = datetime.utcnow()
+        replicas = {}
+        for doc in await db.get_all_replicas():
+            id = doc["_id"]
+            if doc["retired"] is not None:
+                if doc["retired"] < utcnow - timedelta(seconds=self.grace) and await db.delete_replicas(id):
+                    await self.delete(doc["replicas"])
+                    logging.info(f"Deleted the copies of file {id}")
+                continue
+            if self.rate_of(id, now) >= self.rate / 2:
+                await db.touch_replicas(id)
+            elif doc["hot_until"] < utcnow - timedelta(seconds=COOLDOWN):
+                if await db.retire_replicas(id):
+                    logging.info(f"File {id} cooled down, its copies leave rotation")
+                continue
+            if doc["replicas"]:
+                # Copies this process found unreadable stay out
+                known = self.replicas.get(id)
+                replicas[id] = [r for r in doc["replicas"] if known is None or r in known]
+        self.replicas = replicas
+
+    async def monitor(self) -> None:
+        while True:
+            await asyncio.sleep(CHECK_INTERVAL)
+            try:
+                await self.check()
+            except Exception as e:
+                logging.warning(f"Replica check failed: {e}")
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        return {
+            "hot": {id: self.rate_of(id, now) for id in list(self.hits) if self.rate_of(id, now) >= self.rate / 2},
+            "replicated": self.replicas,
+            "created": self.created,
+            "deleted": self.deleted,
+        }
+
+
+replicas = ReplicaManager(REPLICA_RATE, REPLICA_COUNT, REPLICA_GRACE)
@@ -0,0 +1,176 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+from info import SPEEDTEST_FILES, SPEEDTEST_SIZE, SPEEDTEST_MIN_SPEED, STREAM_READ_AHEAD
+from web.server import multi_clients, work_loads
+from .custom_dl import CHUNK_SIZE, get_byte_streamer
+from .client_pool import TRANSPORT_ERRORS, client_pool
+from .stream_budget import stream_governor
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+
+class SpeedResult(NamedTuple):
+    client: int
+    dc: Optional[int]
+    file: int
+    ttfb: Optional[float]  # Seconds until the first part arrived, media session setup included
+    speed: Optional[float]  # MB/s after the first part
+    size: int
+    error: Optional[str]
+
+
+class SpeedTester:
+    def __init__(self, files: List[int], size: int = 8, min_speed: float = 0, max_age: int = 300):
+        """
+        Pulls the first `size` MB of the reference messages `files` through every client,
+        the way streams read them but without the part cache, and keeps the latest result
+        of each client and DC. Put reference files on different DCs to compare them.
+
+        :param min_speed: Clients slower than this (MB/s) are quarantined, 0 to never.
+        :param max_age: Results younger than this are reused by `latest_or_run`.
+        """
+        self.files = files
+        self.size = max(1, size) * 1024 * 1024
+        self.min_speed = min_speed
+        self.max_age = max_age
+        self.results: Dict[Tuple[int, int], SpeedResult] = {}
+        self.errors: Dict[int, int] = {}
+        self.dc_errors: Dict[int, int] = {}
+        self.finished: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    async def measure(self, index: int, id: int) -> SpeedResult:
+        tg_connect = get_byte_streamer(multi_clients[index])
+        file_id = None
+        work_loads[index] += 1
+        pending: Deque[asyncio.Future] = deque()
+        try:
+            file_id = await tg_connect.get_file_properties(id)
+            size = min(self.size, file_id.file_size)
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            media_session = await tg_connect.generate_media_session(tg_connect.client, file_id)
+            location = await tg_connect.get_location(file_id)
+
+            async def fetch(offset: int) -> int:
+                await stream_governor.acquire(CHUNK_SIZE)
+                try:
+                    r = await tg_connect.fetch_part(media_session, file_id, location, offset, CHUNK_SIZE)
+                    return len(r.bytes)
+                finally:
+                    stream_governor.release(CHUNK_SIZE)
+
+            offsets = deque(range(0, size, CHUNK_SIZE))
+            received, first = 0, None
+            while offsets or pending:
+                while offsets and len(pending) < max(1, STREAM_READ_AHEAD):
+                    pending.append(asyncio.ensure_future(fetch(offsets.popleft())))
+                part = await pending.popleft()
+                if not part:
+                    break
+                received += part
+                if first is None:
+                    first = loop.time()
+                    received = 0
+
+            if first is None:
+                # Nothing came back: says nothing about the client, only that the file is empty
+                return SpeedResult(index, file_id.dc_id, id, None, None, 0, "No data in the reference file")
+            elapsed = loop.time() - first
+            speed = received / elapsed / (1024 * 1024) if elapsed > 0 and received else None
+            return SpeedResult(index, file_id.dc_id, id, first - started, speed, size, None)
+        except Exception as e:
+            self.errors[index] = self.errors.get(index, 0) + 1
+            if file_id is not None:
+                self.dc_errors[file_id.dc_id] = self.dc_errors.get(file_id.dc_id, 0) + 1
+            if isinstance(e, TRANSPORT_ERRORS):
+                client_pool.record_error(index, e)
+            return SpeedResult(
+                index, file_id.dc_id if file_id else None, id, None, None, 0, f"{type(e).__name__}: {e}"
+            )
+        finally:
+            for task in pending:
+                task.cancel()
+            if index in work_loads:
+                work_loads[index] -= 1
+
+    async def run(self) -> List[SpeedResult]:
+        """Tests every client against every reference file, one at a time so they don't compete."""
+        for key in [key for key in self.results if key[0] not in multi_clients]:
+            del self.results[key]
+        results = []
+        for index in sorted(multi_clients):
+            for id in self.files:
+                if index not in multi_clients:
+                    break
+                result = await self.measure(index, id)
+                self.results[(index, id)] = result
+                results.append(result)
+                logging.debug(f"Speedtest of client {index} on message {id}: {result}")
+
+        if self.min_speed:
+            for result in results:
+                if result.speed is not None and result.speed < self.min_speed:
+                    client_pool.quarantine(
+                        result.client, f"Speedtest {result.speed:.1f} MB/s on DC {result.dc}"
+                    )
+        self.finished = time.time()
+        return results
+
+    async def latest_or_run(self) -> Dict:
+        """Returns the latest report, running a new test first when it's older than `max_age`."""
+        if self.finished is None or time.time() - self.finished > self.max_age:
+            if self.task is None or self.task.done():
+                self.task = asyncio.create_task(self.run())
+            await asyncio.shield(self.task)
+        return self.report()
+
+    async def monitor(self, interval: int) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self.task is None or self.task.done():
+                    self.task = asyncio.create_task(self.run())
+                await self.task
+            except Exception as e:
+                logging.error(f"Speedtest failed: {e}")
+
+    def report(self) -> Dict:
+        """Latest results per client and per DC, with the errors counted since start."""
+        def summary(results: List[SpeedResult]) -> Dict:
+            good = [r for r in results if r.error is None]
+            speeds = [r.speed for r in good if r.speed is not None]
+            return {
+                "ttfb_ms": round(sum(r.ttfb for r in good) / len(good) * 1000) if good else None,
+                "mb_per_s": round(sum(speeds) / len(speeds), 2) if speeds else None,
+                "failed": len(results) - len(good),
+            }
+
+        by_client: Dict[int, List[SpeedResult]] = {}
+        by_dc: Dict[int, List[SpeedResult]] = {}
+        for result in self.results.values():
+            by_client.setdefault(result.client, []).append(result)
+            if result.dc is not None:
+                by_dc.setdefault(result.dc, []).append(result)
+
+        return {
+            "finished": self.finished,
+            "files": self.files,
+            "clients": {
+                index: {**summary(results), "errors": self.errors.get(index, 0)}
+                for index, results in sorted(by_client.items())
+            },
+            "dcs": {
+                dc: {**summary(results), "errors": self.dc_errors.get(dc, 0)}
+                for dc, results in sorted(by_dc.items())
+            },
+            "results": [result._asdict() for result in self.results.values()],
+        }
+
+
+speedtest = SpeedTester(SPEEDTEST_FILES, SPEEDTEST_SIZE, SPEEDTEST_MIN_SPEED)
@@ -0,0 +1,115 @@
+import time
+import random
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from pyrogram.errors import FloodWait
+from pyrogram.types import Message
+from info import BIN_CHANNELS, STORAGE_POLICY
+from web.server.exceptions import FIleNotFound
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+# Link ids carry the position of the storage channel above the message id.
+# Channel 0 is BIN_CHANNEL, so its link ids are plain message ids and old links keep working.
+SHARD_BITS = 32
+POLICIES = ("round_robin", "random", "user")
+
+
+def link_id(shard: int, message_id: int) -> int:
+    """Returns the id used in links for the message `message_id` of storage channel `shard`."""
+    return shard << SHARD_BITS | message_id
+
+
+def resolve(id: int) -> Tuple[int, int]:
+    """
+    Maps a link id onto its storage channel.
+    returns: (chat id, message id). raises: FIleNotFound for a channel that isn't configured.
+    """
+    shard, message_id = id >> SHARD_BITS, id & ((1 << SHARD_BITS) - 1)
+    if shard >= len(BIN_CHANNELS) or not message_id:
+        raise FIleNotFound
+    return BIN_CHANNELS[shard], message_id
+
+
+class StorageChannels:
+    def __init__(self, channels: List[int], policy: str = "round_robin"):
+        """
+        Spreads new files over the storage channels `channels`, so each one carries
+        a share of the forwards and FloodWaits. A channel that answers with a FloodWait
+        is skipped until it is over.
+
+        :param policy: "round_robin" takes the channels in turn, "random" any of them,
+            "user" always the same one for the same sender, so their files stay together.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown STORAGE_POLICY {policy!r}, use one of {', '.join(POLICIES)}")
+        self.channels = channels
+        self.policy = policy
+        self.next = 0
+        self.cooling: Dict[int, float] = {}
+        self.stored: Dict[int, int] = {}
+        self.floods = 0
+
+    def ready(self, shard: int) -> bool:
+        return self.cooling.get(shard, 0) <= time.time()
+
+    def pick(self, key: Optional[int] = None) -> int:
+        """Returns the storage channel position for the next file of the sender `key`."""
+        count = len(self.channels)
+        if self.policy == "random":
+            first = random.randrange(count)
+        elif self.policy == "user" and key is not None:
+            first = key % count
+        else:
+            first, self.next = self.next, (self.next + 1) % count
+        for step in range(count):
+            shard = (first + step) % count
+            if self.ready(shard):
+                return shard
+        # All of them are waiting, take the one that is free first
+        return min(range(count), key=lambda shard: self.cooling[shard])
+
+    def cool(self, shard: int, seconds: int) -> None:
+        self.cooling[shard] = time.time() + seconds
+        self.floods += 1
+        logging.warning(f"Storage channel {self.channels[shard]} is in FloodWait for {seconds}s")
+
+    async def store(self, send: Callable[[int], Awaitable[Optional[Message]]], key: Optional[int] = None) -> Tuple[Optional[Message], int]:
+        """
+        Calls `send` with the chat id of a storage channel, moving on to the next channel on FloodWait.
+        returns: (stored message, its link id). raises: the FloodWait when every channel is waiting.
+        """
+        for _ in range(len(self.channels)):
+            shard = self.pick(key)
+            try:
+                message = await send(self.channels[shard])
+            except FloodWait as e:
+                self.cool(shard, e.value)
+                if not any(self.ready(other) for other in range(len(self.channels))):
+                    raise
+                continue
+            if message is None:
+                return None, 0
+            self.stored[shard] = self.stored.get(shard, 0) + 1
+            return message, link_id(shard, message.id)
+        raise FloodWait(value=int(min(self.cooling.values()) - time.time()) + 1)
+
+    async def forward(self, message: Message, key: Optional[int] = None) -> Tuple[Message, int]:
+        """Forwards `message` to a storage channel. returns: (forwarded message, its link id)."""
+        return await self.store(lambda chat_id: message.forward(chat_id=chat_id), key)
+
+    def stats(self) -> List[Dict]:
+        now = time.time()
+        return [
+            {
+                "channel": channel,
+                "stored": self.stored.get(shard, 0),
+                "flood_wait": max(0, int(self.cooling.get(shard, 0) - now)),
+            }
+            for shard, channel in enumerate(self.channels)
+        ]
+
+
+storage = StorageChannels(BIN_CHANNELS, STORAGE_POLICY)
@@ -0,0 +1,96 @@
+import asyncio
+from collections import deque
+from typing import Deque, Dict
+from info import STREAM_MEMORY_BUDGET, STREAM_READ_AHEAD
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+
+class MemoryGovernor:
+    def __init__(self, limit: int, read_ahead: int):
+        """
+        Process-wide budget for the part bytes held by all streams at once.
+
+        attributes:
+            limit: the number of bytes that may be in flight.
+            read_ahead: the read-ahead depth streams use while memory is plentiful.
+
+        functions:
+            acquire: waits until `size` bytes fit in the budget and reserves them.
+            hold: reserves bytes that are already allocated, without waiting.
+            release: returns reserved bytes and wakes up waiting streams.
+            read_ahead_depth: the read-ahead depth a stream should use right now.
+            admit: whether a new stream may start.
+        """
+        self.limit = limit
+        self.read_ahead = max(1, read_ahead)
+        self.used = 0
+        self.peak = 0
+        self.refused = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def pressure(self) -> float:
+        return self.used / self.limit if self.limit else 0.0
+
+    async def acquire(self, size: int) -> None:
+        # A single reservation is always allowed so an oversized part can't deadlock
+        while self.used and self.used + size > self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.used += size
+        self.peak = max(self.peak, self.used)
+
+    def hold(self, size: int) -> None:
+        """Counts bytes that are already allocated, like data queued in a transport, without waiting."""
+        self.used += size
+        self.peak = max(self.peak, self.used)
+
+    def release(self, size: int) -> None:
+        self.used = max(0, self.used - size)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def read_ahead_depth(self) -> int:
+        """
+        Shrinks the read-ahead depth as the budget fills up, so streams hold
+        fewer parts each instead of queueing behind each other.
+        """
+        pressure = self.pressure
+        if pressure < 0.5:
+            return self.read_ahead
+        if pressure < 0.75:
+            return max(1, self.read_ahead // 2)
+        return 1
+
+    def admit(self, size: int) -> bool:
+        """
+        Refuses new streams once the budget is nearly spent, so a traffic spike
+        gets 503s instead of an OOM-killed container.
+        """
+        if self.used + size > self.limit * 0.95:
+            self.refused += 1
+            return False
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "limit": self.limit,
+            "used": self.used,
+            "peak": self.peak,
+            "waiting": len(self._waiters),
+            "refused": self.refused,
+        }
+
+
+# ✅ Process-wide instance shared by every stream
+stream_governor = MemoryGovernor(STREAM_MEMORY_BUDGET * 1024 * 1024, STREAM_READ_AHEAD)
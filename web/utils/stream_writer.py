@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple, Union
+from aiohttp import web
+from info import WRITE_COALESCE_SIZE
+from .stream_budget import stream_governor
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+# ✅ Process-wide totals, reported by the "/" status route
+stream_stats: Dict[str, int] = {
+    "streams": 0,
+    "bytes": 0,
+    "writes": 0,
+    "copied_bytes": 0,
+}
+
+
+class CoalescingWriter:
+    def __init__(
+        self,
+        response: web.StreamResponse,
+        transport: Optional[asyncio.Transport] = None,
+        threshold: int = WRITE_COALESCE_SIZE,
+    ):
+        """
+        Writes chunks to a StreamResponse without copying them.
+        Chunks at least `threshold` bytes long (every full Telegram part) are handed
+        to the transport as they are, smaller ones (cut parts, ZIP headers and
+        descriptors) are held back and merged into a single write. The only copy a
+        stream makes is that merge, so its allocations are bounded by `threshold` per flush.
+        write() returns while the transport may still have the data queued, so the
+        part behind every send stays counted in stream_governor until `transport`
+        has passed all of it to the socket. close() releases what is left.
+        """
+        self.response = response
+        self.transport = transport
+        self.threshold = threshold
+        self.sent = 0
+        self.held: Deque[Tuple[int, int]] = deque()  # (stream offset the send ends at, bytes counted)
+        self.pending: List[Union[bytes, memoryview]] = []
+        self.pending_size = 0
+        self.bytes = 0
+        self.writes = 0
+        self.copied_bytes = 0
+
+    async def write(self, chunk: Union[bytes, memoryview]) -> None:
+        size = len(chunk)
+        if not size:
+            return
+        self.bytes += size
+        if size >= self.threshold:
+            await self.flush()
+            await self._send(chunk)
+            return
+        if self.pending_size + size > self.threshold:
+            await self.flush()
+        self.pending.append(chunk)
+        self.pending_size += size
+
+    async def flush(self) -> None:
+        if not self.pending:
+            return
+        if len(self.pending) == 1:
+            data = self.pending[0]
+        else:
+            data = b"".join(self.pending)
+            self.copied_bytes += len(data)
+        self.pending = []
+        self.pending_size = 0
+        await self._send(data)
+
+    async def _send(self, data: Union[bytes, memoryview]) -> None:
+        self.writes += 1
+        await self.response.write(data)
+        self.sent += len(data)
+        # A queued slice keeps its whole part alive
+        size = len(data.obj) if isinstance(data, memoryview) else len(data)
+        stream_governor.hold(size)
+        self.held.append((self.sent, size))
+        self.release_flushed()
+
+    def release_flushed(self) -> None:
+        """Releases the sends the transport no longer has queued."""
+        queued = self.transport.get_write_buffer_size() if self.transport and not self.transport.is_closing() else 0
+        flushed = self.sent - queued
+        while self.held and self.held[0][0] <= flushed:
+            stream_governor.release(self.held.popleft()[1])
+
+    def close(self) -> None:
+        while self.held:
+            stream_governor.release(self.held.popleft()[1])
+
+    def report(self, name: str) -> None:
+        stream_stats["streams"] += 1
+        stream_stats["bytes"] += self.bytes
+        stream_stats["writes"] += self.writes
+        stream_stats["copied_bytes"] += self.copied_bytes
+        logging.debug(
+            f"Streamed {self.bytes} bytes of {name} in {self.writes} writes, "
+            f"{self.copied_bytes} bytes copied"
+        )
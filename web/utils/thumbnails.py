@@ -0,0 +1,96 @@
+import os
+import logging
+import aiofiles
+from typing import Awaitable, Callable, Dict, Optional
+from info import THUMB_CACHE_DIR, THUMB_CACHE_SIZE
+from .part_cache import PartCache
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+
+def thumb_mime_type(data: bytes) -> str:
+    """Detects the image type of a Telegram thumbnail from its magic bytes."""
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    return "image/jpeg"
+
+
+class ThumbnailCache:
+    def __init__(self, capacity: int, cache_dir: Optional[str]):
+        """
+        Two level cache of Telegram thumbnails keyed by their file_unique_id,
+        which never changes for the same image.
+        Recent thumbnails are kept in memory and every thumbnail is written to
+        `cache_dir` so they survive restarts without another GetFile.
+
+        :param capacity: Maximum number of bytes kept in memory.
+        :param cache_dir: Directory of the disk cache, None to disable it.
+        """
+        self.memory = PartCache(capacity)
+        self.cache_dir = cache_dir
+        self.disk_hits = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, unique_id: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"{unique_id}.thumb")
+
+    async def read_disk(self, unique_id: str) -> Optional[bytes]:
+        path = self.path(unique_id)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            async with aiofiles.open(path, mode="rb") as f:
+                return await f.read()
+        except OSError as e:
+            logging.debug(f"Could not read cached thumbnail {unique_id}: {e}")
+            return None
+
+    async def write_disk(self, unique_id: str, data: bytes) -> None:
+        path = self.path(unique_id)
+        if not path:
+            return
+        try:
+            # Write to a temporary file first so a crash never leaves half a thumbnail behind
+            async with aiofiles.open(path + ".tmp", mode="wb") as f:
+                await f.write(data)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logging.debug(f"Could not cache thumbnail {unique_id} on disk: {e}")
+
+    async def get(self, unique_id: str, fetch: Callable[[], Awaitable[bytes]]) -> bytes:
+        """
+        Returns the thumbnail from memory, from disk, or by calling `fetch`.
+        Concurrent requests for the same thumbnail share one fetch.
+        """
+        async def load() -> bytes:
+            data = await self.read_disk(unique_id)
+            if data:
+                self.disk_hits += 1
+                return data
+            data = await fetch()
+            if data:
+                await self.write_disk(unique_id, data)
+            return data
+
+        return await self.memory.get_or_fetch(unique_id, load, store=True)
+
+    def stats(self) -> Dict[str, int]:
+        stats = self.memory.stats()
+        return {
+            "size": stats["size"],
+            "thumbs": stats["parts"],
+            "hits": stats["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": stats["misses"] - self.disk_hits,
+        }
+
+
+# ✅ Process-wide instance shared by every ByteStreamer
+thumb_cache = ThumbnailCache(THUMB_CACHE_SIZE * 1024 * 1024, THUMB_CACHE_DIR or None)
@@ -0,0 +1,171 @@
+import math
+import asyncio
+import logging
+from hashlib import md5
+from typing import Awaitable, Callable, List, Optional, Union
+from pyrogram import Client, raw, types
+from pyrogram.session import Session
+from info import BIN_CHANNEL, UPLOAD_CONNECTIONS
+from .stream_budget import stream_governor
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+PART_SIZE = 512 * 1024  # Largest part Telegram accepts for uploads
+BIG_FILE_SIZE = 10 * 1024 * 1024  # Files above this must use SaveBigFilePart
+
+
+class UploadError(Exception):
+    message = "Upload failed"
+
+
+class IncompleteUpload(UploadError):
+    message = "Request body ended before Content-Length"
+
+
+class ParallelUploader:
+    def __init__(self, client: Client, file_name: str, file_size: int, connections: int = UPLOAD_CONNECTIONS):
+        """
+        Uploads a file of known size to Telegram while it's being received.
+        Parts are sent through `connections` media sessions of the client at once,
+        and only the parts waiting for a free session are held in memory.
+
+        Uploaded parts belong to the authorization that sent them, so every part
+        of a file has to go through the same bot; the sessions give it several
+        connections instead.
+        """
+        self.client = client
+        self.file_name = file_name
+        self.file_size = file_size
+        self.connections = max(1, connections)
+        self.total_parts = max(1, math.ceil(file_size / PART_SIZE))
+        self.is_big = file_size > BIG_FILE_SIZE
+        self.file_id = client.rnd_id()
+        self.md5 = None if self.is_big else md5()
+
+    async def send_part(self, session: Session, part: int, data: bytes) -> None:
+        if self.is_big:
+            request = raw.functions.upload.SaveBigFilePart(
+                file_id=self.file_id, file_part=part, file_total_parts=self.total_parts, bytes=data
+            )
+        else:
+            request = raw.functions.upload.SaveFilePart(file_id=self.file_id, file_part=part, bytes=data)
+
+        for attempt in range(3):
+            try:
+                if await session.invoke(request):
+                    return
+            except Exception as e:
+                logging.debug(f"Part {part} of {self.file_name} failed (attempt {attempt + 1}): {e}")
+            await asyncio.sleep(attempt + 1)
+        raise UploadError(f"Part {part} of {self.file_name} could not be uploaded")
+
+    async def upload(
+        self, read: Callable[[int], Awaitable[bytes]]
+    ) -> Union[raw.types.InputFile, raw.types.InputFileBig]:
+        """
+        Uploads the file, calling `read(n)` for the next `n` bytes of it.
+        returns: the InputFile to attach the upload to a message.
+        raises: IncompleteUpload when the body ends early, UploadError when a part can't be sent.
+        """
+        client = self.client
+        queue: asyncio.Queue = asyncio.Queue(self.connections)
+        sessions: List[Session] = []
+        errors: List[BaseException] = []
+
+        async def worker(session: Session):
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                part, data = item
+                try:
+                    if not errors:
+                        await self.send_part(session, part, data)
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    stream_governor.release(PART_SIZE)
+
+        try:
+            for _ in range(self.connections):
+                session = Session(
+                    client, await client.storage.dc_id(), await client.storage.auth_key(),
+                    await client.storage.test_mode(), is_media=True
+                )
+                await session.start()
+                sessions.append(session)
+            workers = [asyncio.create_task(worker(session)) for session in sessions]
+
+            try:
+                received = 0
+                for part in range(self.total_parts):
+                    try:
+                        data = await read(min(PART_SIZE, self.file_size - received))
+                    except asyncio.IncompleteReadError as e:
+                        raise IncompleteUpload(
+                            f"Body ended after {received + len(e.partial)} of {self.file_size} bytes"
+                        ) from None
+                    if errors:
+                        break
+                    received += len(data)
+                    if self.md5:
+                        self.md5.update(data)
+                    await stream_governor.acquire(PART_SIZE)
+                    try:
+                        await queue.put((part, data))
+                    except BaseException:
+                        # No worker will take this part, so it can't give the reservation back
+                        stream_governor.release(PART_SIZE)
+                        raise
+            except BaseException as e:
+                # Stop the workers from sending what's left of an abandoned upload
+                errors.append(e)
+                raise
+            finally:
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+        finally:
+            for session in sessions:
+                await session.stop()
+
+        if errors:
+            raise UploadError(str(errors[0]))
+        if self.is_big:
+            return raw.types.InputFileBig(id=self.file_id, parts=self.total_parts, name=self.file_name)
+        return raw.types.InputFile(
+            id=self.file_id, parts=self.total_parts, name=self.file_name, md5_checksum=self.md5.hexdigest()
+        )
+
+
+async def post_upload(
+    client: Client,
+    file: Union[raw.types.InputFile, raw.types.InputFileBig],
+    file_name: str,
+    mime_type: str,
+    caption: str = "",
+    chat_id: int = BIN_CHANNEL,
+) -> Optional["types.Message"]:
+    """Posts an uploaded file to the storage channel `chat_id` as a document and returns the message."""
+    r = await client.invoke(
+        raw.functions.messages.SendMedia(
+            peer=await client.resolve_peer(chat_id),
+            media=raw.types.InputMediaUploadedDocument(
+                mime_type=mime_type,
+                file=file,
+                attributes=[raw.types.DocumentAttributeFilename(file_name=file_name)],
+            ),
+            message=caption,
+            random_id=client.rnd_id(),
+        )
+    )
+    for update in r.updates:
+        if isinstance(update, (raw.types.UpdateNewMessage, raw.types.UpdateNewChannelMessage)):
+            return await types.Message._parse(
+                client, update.message,
+                {u.id: u for u in r.users},
+                {c.id: c for c in r.chats},
+            )
+    return None
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Set
+from info import INGEST_WARMUP_RATE, INGEST_WARMUP_TAIL
+from web.server import multi_clients, work_loads
+from .custom_dl import CHUNK_SIZE, get_byte_streamer
+from .client_ring import select_client
+from .stream_budget import stream_governor
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+
+class StreamWarmer:
+    def __init__(self, concurrency: int = 2, max_pending: int = 16, ttl: int = 5 * 60, max_entries: int = 4096):
+        """
+        Runs background warm-ups of the stream path, bounded so that page views
+        from crawlers can't turn into unbounded upstream traffic.
+
+        :param concurrency: Warm-ups that may run at the same time.
+        :param max_pending: Warm-ups that may be running or waiting, extra ones are dropped.
+        :param ttl: Seconds during which the same key is not warmed again.
+        :param max_entries: Number of recently warmed keys remembered.
+        """
+        self.slots = asyncio.Semaphore(concurrency)
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.recent: "OrderedDict[Hashable, float]" = OrderedDict()
+        self.tasks: Set[asyncio.Task] = set()
+        self.warmed = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def schedule(self, key: Hashable, warm: Callable[[], Awaitable[None]]) -> bool:
+        """
+        Starts `warm` in the background unless `key` was warmed recently,
+        too many warm-ups are pending or the stream budget is under pressure.
+        returns: whether the warm-up was started.
+        """
+        now = time.monotonic()
+        while self.recent and now - next(iter(self.recent.values())) > self.ttl:
+            self.recent.popitem(last=False)
+
+        if key in self.recent or len(self.tasks) >= self.max_pending or stream_governor.pressure >= 0.5:
+            self.skipped += 1
+            return False
+
+        self.recent[key] = now
+        while len(self.recent) > self.max_entries:
+            self.recent.popitem(last=False)
+
+        task = asyncio.create_task(self.run(key, warm))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return True
+
+    async def run(self, key: Hashable, warm: Callable[[], Awaitable[None]]) -> None:
+        async with self.slots:
+            try:
+                await warm()
+                self.warmed += 1
+            except Exception as e:
+                self.failed += 1
+                logging.debug(f"Warm-up of {key} failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self.tasks),
+            "warmed": self.warmed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+        }
+
+
+class IngestWarmer:
+    def __init__(self, rate: float, max_queue: int = 256):
+        """
+        Low priority queue that fetches the head (and optionally the tail) of
+        newly forwarded files into the part cache, so the first viewer of a new
+        upload doesn't wait for Telegram.
+        A single worker drains the queue for all clients, so ingest bursts are
+        spread out to `rate` files per minute.
+
+        :param rate: Files warmed per minute.
+        :param max_queue: Files that may wait in the queue, newer ones are dropped.
+        """
+        self.interval = 60 / rate if rate > 0 else 0
+        self.max_queue = max_queue
+        self.queue: Optional[asyncio.Queue] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.warmed = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def add(self, id: int) -> None:
+        """Queues the file with the link id `id` for warming."""
+        if self.queue is None:
+            self.queue = asyncio.Queue(self.max_queue)
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self.run())
+        try:
+            self.queue.put_nowait(id)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            id = await self.queue.get()
+            started = loop.time()
+            try:
+                await self.warm(id)
+                self.warmed += 1
+            except Exception as e:
+                self.failed += 1
+                logging.debug(f"Ingest warm-up of {id} failed: {e}")
+            await asyncio.sleep(max(0.0, self.interval - (loop.time() - started)))
+
+    @staticmethod
+    async def warm(id: int) -> None:
+        if not work_loads:
+            return
+        index = select_client(id)
+        tg_connect = get_byte_streamer(multi_clients[index])
+        file_id = await tg_connect.get_file_properties(id)
+
+        offsets = [0]
+        last_offset = (file_id.file_size - 1) - (file_id.file_size - 1) % CHUNK_SIZE
+        # MP4 moov boxes and MKV cues usually sit at the end of the file
+        if INGEST_WARMUP_TAIL and last_offset > 0:
+            offsets.append(last_offset)
+        await tg_connect.prefetch(file_id, offsets, CHUNK_SIZE)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self.queue.qsize() if self.queue else 0,
+            "warmed": self.warmed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+# ✅ Process-wide instances used by the watch pages and the ingest handlers
+stream_warmer = StreamWarmer()
+ingest_warmer = IngestWarmer(INGEST_WARMUP_RATE)
@@ -0,0 +1,63 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import tempfile
+from typing import Dict, List
+from info import PORT
+from web.server import multi_clients, work_loads
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+STATE_DIR = os.path.join(tempfile.gettempdir(), f"avbotz-workers-{PORT}")
+PUBLISH_INTERVAL = 2
+STALE_AFTER = 10
+
+
+def publish(worker_index: int) -> None:
+    """Writes the client loads of this process where the other workers can read them."""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    path = os.path.join(STATE_DIR, f"{worker_index}.json")
+    state = {
+        "worker": worker_index,
+        "pid": os.getpid(),
+        "connected_bots": len(multi_clients),
+        "loads": {str(index): load for index, load in work_loads.items()},
+        "time": time.time(),
+    }
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+async def publish_loop(worker_index: int) -> None:
+    while True:
+        try:
+            publish(worker_index)
+        except OSError as e:
+            logging.debug(f"Could not publish worker {worker_index} stats: {e}")
+        await asyncio.sleep(PUBLISH_INTERVAL)
+
+
+def read_workers() -> List[Dict]:
+    """Returns the last published state of every worker that is still alive."""
+    states = []
+    try:
+        names = sorted(os.listdir(STATE_DIR))
+    except OSError:
+        return states
+    now = time.time()
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(STATE_DIR, name)) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if now - state.get("time", 0) < STALE_AFTER:
+            states.append(state)
+    return states
@@ -0,0 +1,166 @@
+import time
+import zlib
+import struct
+from contextlib import aclosing
+from typing import AsyncGenerator, AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Union
+from info import ZIP_CONCURRENCY, ZIP_PER_IP
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+Chunk = Union[bytes, memoryview]
+
+ZIP32_LIMIT = 0xFFFFFFFF
+FLAGS = 0x0808  # bit 3: sizes and CRC follow the data, bit 11: UTF-8 names
+
+
+class ZipMember(NamedTuple):
+    name: str
+    size: int
+    open: Callable[[], AsyncIterator[Chunk]]
+
+
+class ZipStream:
+    def __init__(self, members: List[ZipMember]):
+        """
+        Store-mode (uncompressed) ZIP archive produced on the fly from member streams.
+        Member sizes are known up front, so the archive size is too, while the
+        CRC32 of each member is computed as it streams and written after its data.
+        Zip64 records are used for members and offsets past 4 GiB.
+
+        attributes:
+            size: the exact size of the archive in bytes.
+        """
+        self.members = members
+        now = time.localtime()
+        self.dos_time = (now.tm_hour << 11) | (now.tm_min << 5) | (now.tm_sec // 2)
+        self.dos_date = (max(now.tm_year, 1980) - 1980) << 9 | (now.tm_mon << 5) | now.tm_mday
+        self.names = [member.name.encode("utf-8") for member in members]
+
+        self.offsets = []
+        offset = 0
+        for name, member in zip(self.names, members):
+            self.offsets.append(offset)
+            offset += len(self.local_header(name, member.size)) + member.size + self.descriptor_size(member.size)
+        self.cd_offset = offset
+        self.cd_size = sum(
+            len(self.central_header(name, member.size, offset, 0))
+            for name, member, offset in zip(self.names, members, self.offsets)
+        )
+        self.size = self.cd_offset + self.cd_size + len(self.end_records())
+
+    @staticmethod
+    def descriptor_size(size: int) -> int:
+        return 24 if size >= ZIP32_LIMIT else 16
+
+    def local_header(self, name: bytes, size: int) -> bytes:
+        if size >= ZIP32_LIMIT:
+            extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0)
+            version, sizes = 45, ZIP32_LIMIT
+        else:
+            extra, version, sizes = b"", 20, 0
+        return struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, version, FLAGS, 0, self.dos_time, self.dos_date,
+            0, sizes, sizes, len(name), len(extra),
+        ) + name + extra
+
+    @staticmethod
+    def descriptor(size: int, crc: int) -> bytes:
+        if size >= ZIP32_LIMIT:
+            return struct.pack("<IIQQ", 0x08074B50, crc, size, size)
+        return struct.pack("<IIII", 0x08074B50, crc, size, size)
+
+    def central_header(self, name: bytes, size: int, offset: int, crc: int) -> bytes:
+        zip64 = b""
+        if size >= ZIP32_LIMIT:
+            zip64 += struct.pack("<QQ", size, size)
+            size = ZIP32_LIMIT
+        if offset >= ZIP32_LIMIT:
+            zip64 += struct.pack("<Q", offset)
+            offset = ZIP32_LIMIT
+        extra = struct.pack("<HH", 0x0001, len(zip64)) + zip64 if zip64 else b""
+        version = 45 if zip64 else 20
+        return struct.pack(
+            "<IHHHHHHIIIHHHHHII", 0x02014B50, version, version, FLAGS, 0, self.dos_time, self.dos_date,
+            crc, size, size, len(name), len(extra), 0, 0, 0, 0, offset,
+        ) + name + extra
+
+    def end_records(self) -> bytes:
+        count = len(self.members)
+        records = b""
+        if count >= 0xFFFF or self.cd_offset >= ZIP32_LIMIT or self.cd_size >= ZIP32_LIMIT:
+            zip64_offset = self.cd_offset + self.cd_size
+            records += struct.pack(
+                "<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0, count, count, self.cd_size, self.cd_offset,
+            )
+            records += struct.pack("<IIQI", 0x07064B50, 0, zip64_offset, 1)
+        return records + struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+            min(self.cd_size, ZIP32_LIMIT), min(self.cd_offset, ZIP32_LIMIT), 0,
+        )
+
+    async def stream(self) -> AsyncGenerator[Chunk, None]:
+        """
+        Yields the archive. Raises ValueError when a member streams a different
+        number of bytes than announced, since the archive would be corrupt.
+        """
+        crcs = []
+        for name, member in zip(self.names, self.members):
+            yield self.local_header(name, member.size)
+            crc = 0
+            written = 0
+            if member.size:
+                async with aclosing(member.open()) as chunks:
+                    async for chunk in chunks:
+                        crc = zlib.crc32(chunk, crc)
+                        written += len(chunk)
+                        yield chunk
+            if written != member.size:
+                raise ValueError(f"{member.name} streamed {written} of {member.size} bytes")
+            crcs.append(crc)
+            yield self.descriptor(member.size, crc)
+
+        yield b"".join(
+            self.central_header(name, member.size, offset, crc)
+            for name, member, offset, crc in zip(self.names, self.members, self.offsets, crcs)
+        )
+        yield self.end_records()
+
+
+class ZipSlots:
+    def __init__(self, limit: int, per_ip: int = 1):
+        """
+        Caps the ZIP archives built at once. Each one pulls every file of a batch from
+        Telegram through the main client, so a few of them can starve the streams.
+
+        :param limit: Archives built at once by this process, 0 for no limit.
+        :param per_ip: Archives built at once for one IP, 0 for no limit.
+        """
+        self.limit = limit
+        self.per_ip = per_ip
+        self.active: Dict[str, int] = {}
+        self.refused = 0
+
+    @property
+    def used(self) -> int:
+        return sum(self.active.values())
+
+    def take(self, ip: Optional[str]) -> bool:
+        """Reserves a slot for an archive, False when the process or the IP is at its limit."""
+        ip = ip or ""
+        if (self.limit and self.used >= self.limit) or (self.per_ip and self.active.get(ip, 0) >= self.per_ip):
+            self.refused += 1
+            return False
+        self.active[ip] = self.active.get(ip, 0) + 1
+        return True
+
+    def give(self, ip: Optional[str]) -> None:
+        ip = ip or ""
+        if self.active.get(ip, 0) > 1:
+            self.active[ip] -= 1
+        else:
+            self.active.pop(ip, None)
+
+
+zip_slots = ZipSlots(ZIP_CONCURRENCY, ZIP_PER_IP)
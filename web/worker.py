@@ -0,0 +1,108 @@
+import os
+import sys
+import signal
+import asyncio
+import logging
+from typing import Dict
+from aiohttp import web
+from pyrogram import idle
+from info import PORT, STREAM_WORKERS, STREAM_WORKER_INDEX, SPEEDTEST_FILES, SPEEDTEST_INTERVAL
+from web import web_server
+from web.server import Webavbot, multi_clients
+from web.server.clients import initialize_clients
+from web.server.drain import drainer, listen_socket
+from web.utils.worker_stats import publish_loop
+from web.utils.client_pool import client_pool
+from web.utils.speedtest import speedtest
+
+# Dont Remove My Credit @AV_BOTz_UPDATE
+# This Repo Is By @BOT_OWNER26
+# For Any Kind Of Error Ask Us In Support Group @AV_SUPPORT_GROUP
+
+# Stream worker process: `python -m web.worker`, started by bot.py when STREAM_WORKERS > 1.
+# It serves the web routes on the same port as bot.py (SO_REUSEPORT) with its own share
+# of the MULTI_TOKEN clients, and never handles bot updates.
+
+
+workers: Dict[int, asyncio.subprocess.Process] = {}
+STOP_TIMEOUT = 30  # Seconds a restart waits for the stream workers to exit before starting the new process
+
+
+async def supervise_worker(index: int) -> None:
+    """Runs the stream worker `index` and restarts it whenever it exits."""
+    env = {**os.environ, "STREAM_WORKER_INDEX": str(index)}
+    while True:
+        process = await asyncio.create_subprocess_exec(sys.executable, "-m", "web.worker", env=env)
+        workers[index] = process
+        code = await process.wait()
+        if workers.get(index) is not process:
+            return
+        logging.warning(f"Stream worker {index} exited with code {code}, restarting in 5s")
+        await asyncio.sleep(5)
+
+
+def start_workers() -> None:
+    for index in range(1, STREAM_WORKERS):
+        asyncio.create_task(supervise_worker(index))
+
+
+async def stop_workers(timeout: int = STOP_TIMEOUT) -> None:
+    """
+    Lets every stream worker drain its streams and exit, without restarting it.
+    Waits up to `timeout` seconds for them to exit. Workers still streaming after that
+    have already moved their sessions into memory, they finish in the background.
+    """
+    stopping = []
+    for index in list(workers):
+        process = workers.pop(index)
+        if process.returncode is None:
+            process.terminate()
+            stopping.append(asyncio.ensure_future(process.wait()))
+    if not stopping:
+        return
+    _, running = await asyncio.wait(stopping, timeout=timeout)
+    if running:
+        # Their supervise_worker tasks still wait on them and reap them once their streams are done
+        logging.warning(f"{len(running)} stream workers are still draining, starting the new process anyway")
+
+
+async def watch_parent(parent: int) -> None:
+    # Drain and exit with bot.py instead of holding the port on our own
+    while os.getppid() == parent:
+        await asyncio.sleep(2)
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+async def main():
+    parent = os.getppid()
+    await Webavbot.start()
+    await initialize_clients(STREAM_WORKER_INDEX, STREAM_WORKERS)
+
+    app = web.AppRunner(await web_server())
+    await app.setup()
+    await drainer.serve(app, listen_socket(PORT, reuse_port=True))
+    logging.info(f"Stream worker {STREAM_WORKER_INDEX} is serving with {len(multi_clients)} clients")
+
+    tasks = [
+        asyncio.create_task(publish_loop(STREAM_WORKER_INDEX)),
+        asyncio.create_task(watch_parent(parent)),
+        asyncio.create_task(client_pool.monitor()),
+    ]
+    if SPEEDTEST_FILES and SPEEDTEST_INTERVAL:
+        tasks.append(asyncio.create_task(speedtest.monitor(SPEEDTEST_INTERVAL)))
+    await idle()
+
+    for task in tasks:
+        task.cancel()
+    # Stopped (SIGTERM) by bot.py handing over or exiting: free the session files
+    # for the new workers, then finish the running streams
+    await drainer.release_storage()
+    await drainer.drain()
+    await app.cleanup()
+    await Webavbot.stop()
+
+
+if __name__ == "__main__":
+    if not STREAM_WORKER_INDEX:
+        sys.exit("web.worker is started by bot.py, set STREAM_WORKERS instead")
+    asyncio.get_event_loop().run_until_complete(main())